@@ -1,8 +1,9 @@
 import logging
-import json
 import os
 
-from common import (common_const, utils)
+# 読み込み時間の計測開始点とするため、最初にimportする
+from common import lazy_loader
+from common import (common_const, response_encoder, utils)
 from validation.restaurant_param_check import RestaurantParamCheck
 from restaurant.restaurant_shop_master import RestaurantShopMaster
 
@@ -14,8 +15,8 @@ if LOGGER_LEVEL == 'DEBUG':
 else:
     logger.setLevel(logging.INFO)
 
-# テーブル操作クラスの初期化
-shop_master_table_controller = RestaurantShopMaster()
+# テーブル操作クラスの初期化(初回アクセス時に初期化する)
+shop_master_table_controller = lazy_loader.LazyObject(RestaurantShopMaster)
 
 
 def get_course_list(shop_id):
@@ -72,6 +73,8 @@ def lambda_handler(event, context):
         logger.exception('Occur Exception: %s', e)
         return utils.create_error_response('ERROR')
 
-    return utils.create_success_response(json.dumps(
-        course_list, default=utils.decimal_to_int,
-        ensure_ascii=False))
+    return utils.create_success_response(
+        response_encoder.dumps(course_list))
+
+
+lazy_loader.log_import_time(__name__)
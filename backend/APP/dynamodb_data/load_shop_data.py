@@ -0,0 +1,49 @@
+"""
+店舗情報のテストデータ投入
+dynamodb_data配下のjsonファイルをBatchWriteItemでまとめて店舗マスタに登録します
+
+実行方法(backendディレクトリで実行):
+    SHOP_INFO_TABLE=<ShopMasterTableのテーブル名> \
+        PYTHONPATH=Layer/layer python APP/dynamodb_data/load_shop_data.py
+"""
+from decimal import Decimal
+import glob
+import json
+import os
+
+from restaurant.restaurant_shop_master import RestaurantShopMaster
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_shop_items(data_dir=DATA_DIR):
+    """
+    jsonファイルから店舗情報を読み込む
+    ※DynamoDBのresourceはfloat型を登録できないため、数値はDecimal型で読み込みます
+
+    Parameters
+    ----------
+    data_dir : str, optional
+        jsonファイルのディレクトリ, by default DATA_DIR
+
+    Returns
+    -------
+    shop_items : list of dict
+        店舗情報のリスト
+    """
+    shop_items = []
+    for path in sorted(glob.glob(os.path.join(data_dir, '*.json'))):
+        with open(path, encoding='utf-8') as f:
+            shop_items.append(json.load(f, parse_float=Decimal))
+    return shop_items
+
+
+def main():
+    shop_items = load_shop_items()
+    RestaurantShopMaster().put_items(shop_items)
+    print(f'{len(shop_items)}件の店舗情報を登録しました。'
+          f'テーブル名:{os.environ.get("SHOP_INFO_TABLE")}')
+
+
+if __name__ == '__main__':
+    main()
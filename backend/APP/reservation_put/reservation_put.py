@@ -2,16 +2,23 @@ import logging
 import json
 import os
 import datetime
+import random
+import time
 
-import flex_message_builder
-from common import (common_const, line, utils)
+# 読み込み時間の計測開始点とするため、最初にimportする
+from common import lazy_loader
+from common import (common_const, response_encoder, utils)
 from validation.restaurant_param_check import RestaurantParamCheck
 # DynamoDB操作クラスのインポート
-from common.channel_access_token import ChannelAccessToken
 from common.remind_message import RemindMessage
+from common.id_token_verifier import IdTokenVerifier
+from botocore.exceptions import ClientError
+from aws.dynamodb.base import TransactWriter
 from restaurant.restaurant_reservation_info import RestaurantReservationInfo
-from restaurant.restaurant_shop_reservation import RestaurantShopReservation
+from restaurant.restaurant_shop_reservation import (
+    RestaurantShopReservation, VACANCY_FLG_MAP, NO_RESERVATION_VACANCY_FLG)
 from restaurant.restaurant_shop_master import RestaurantShopMaster
+from restaurant import (flex_message_builder, slot_array)
 
 
 # 環境変数
@@ -28,23 +35,25 @@ else:
     logger.setLevel(logging.INFO)
 
 # 定数の宣言
-THIRTY_MINUTES = datetime.timedelta(minutes=30)
+RESERVED_PROPORTION_MAP = {'RESERVED_MUCH': 0.8, 'RESERVED_FULL': 1}
 ONE_WEEK = datetime.timedelta(days=7)
 JST_UTC_TIMEDELTA = datetime.timedelta(hours=9)
-VACANCY_FLG_MAP = {'AVAILABLE_NOTHING': 0,
-                   'AVAILABLE_MUCH': 1, 'AVAILABLE_FEW': 2}
-RESERVED_PROPORTION_MAP = {'RESERVED_MUCH': 0.8, 'RESERVED_FULL': 1}
 ON_DAY_REMIND_DATE_DIFFERENCE = 0
+# 同時に予約があった場合に、予約枠の登録を再実行する最大回数
+PUT_RESERVATION_MAX_ATTEMPTS = 3
+# 同時に登録中のトランザクションと競合した場合に、再実行前に待機する秒数の基準値
+PUT_RESERVATION_RETRY_BASE_DELAY = 0.05
 
-# テーブル操作クラスの初期化
-shop_master_table_controller = RestaurantShopMaster()
-reservation_info_table_controller = RestaurantReservationInfo()
-shop_reservation_table_controller = RestaurantShopReservation()
-channel_access_token_table_controller = ChannelAccessToken()
-message_table_controller = RemindMessage()
+# テーブル操作クラスの初期化(初回アクセス時に初期化する)
+shop_master_table_controller = lazy_loader.LazyObject(RestaurantShopMaster)
+reservation_info_table_controller = lazy_loader.LazyObject(RestaurantReservationInfo)  # noqa: E501
+shop_reservation_table_controller = lazy_loader.LazyObject(RestaurantShopReservation)  # noqa: E501
+message_table_controller = lazy_loader.LazyObject(RemindMessage)
+# IDトークンはLINEの公開鍵でローカルに検証し、検証結果をコンテナ内で使い回す
+id_token_verifier = IdTokenVerifier(LIFF_CHANNEL_ID)
 
 
-def put_customer_reservation_info(body, shop_info):
+def put_customer_reservation_info(body, shop_info, transaction=None):
     """
     顧客予約情報テーブルに予約情報の登録を行う。
 
@@ -54,6 +63,8 @@ def put_customer_reservation_info(body, shop_info):
         ユーザーが選択した予約情報
     shop_info: dict
         予約する店舗の情報
+    transaction : TransactWriter, optional
+        書き込みを追加するトランザクション, by default None
 
     Returns
     -------
@@ -75,7 +86,7 @@ def put_customer_reservation_info(body, shop_info):
         "amount": get_course_price(shop_info, body['courseId']),
     }
     reservation_id = reservation_info_table_controller.put_item(
-        **customer_reservation_item)
+        **customer_reservation_item, transaction=transaction)
     return reservation_id
 
 
@@ -104,11 +115,13 @@ def get_course_price(shop_info, course_id):
     return course_price[0]
 
 
-def put_shop_reservation_info(body, shop_info):
+def put_shop_reservation_info(body, shop_info, transaction=None):
     """
     カレンダーに予約情報を登録する。
-    既に指定した月日に予約情報がある場合、Updateを行い、
-    予約情報がない場合、Insertを行う。
+    指定した月日の30分毎の予約人数と合計予約人数を、読み込みを行わずに加算する。
+    加算後にいずれかの枠が席数を超過する場合は条件エラーとなる。
+    予約人数の配列が無い、または現在の営業時間の配列でない場合も条件エラーとなるため、
+    init_shop_reservation_infoで作成してから再実行する。
 
     Parameters
     ----------
@@ -116,73 +129,242 @@ def put_shop_reservation_info(body, shop_info):
         ユーザーが選択した予約情報
     shop_info: dict
         shop_idを指定した取得した店舗の情報
+    transaction : TransactWriter, optional
+        書き込みを追加するトランザクション, by default None
+
+    Returns
+    -------
+    transact_index: int
+        トランザクション内の書き込みの番号
     """
-    # shopIdと予約日でそのデータがあるか検索する
-    reservation_item = shop_reservation_table_controller.get_item(
-        body['shopId'], body['reservationDate'])
+    reserved_slots, new_total_reserved_number = create_reserved_slots(body)
+
+    return shop_reservation_table_controller.add_reserved_number(
+        body['shopId'], body['reservationDate'],
+        shop_info['shop']['openTime'], get_slot_count(shop_info),
+        reserved_slots, new_total_reserved_number,
+        capacity=int(shop_info['shop']['seatsNumber']),
+        transaction=transaction)
 
+
+def create_reserved_slots(body):
+    """
+    予約開始時刻をkeyとして、加算する予約人数をvalueに持ったデータを作成する。
+
+    Parameters
+    ----------
+    body : dict
+        ユーザーが選択した予約情報
+
+    Returns
+    -------
+    reserved_slots: dict
+        30分毎の予約開始時刻(HH:MM)をキー、加算する予約人数を値としたdict
+    total_people_number: int
+        30分ごとの予約人数の合計
+    """
     new_reservation_list, new_total_reserved_number = divide_thirty_minutes(
         body['reservationStarttime'], body['reservationEndtime'],
         body['reservationPeopleNumber']
     )
+    reserved_slots = {
+        new_reservation_info['reservedStartTime']:
+            new_reservation_info['reservedNumber']
+        for new_reservation_info in new_reservation_list
+    }
 
-    # 店舗の1日の予約可能人数を算出する 計算:席数*営業時間の30分区切り
-    openTime = datetime.datetime.strptime(
-        shop_info['shop']['openTime'], "%H:%M")
-    closeTime = datetime.datetime.strptime(
-        shop_info['shop']['closeTime'], "%H:%M")
-    restaurant_open_term = int((closeTime - openTime) / THIRTY_MINUTES)
-    max_reservable_number = int(
-        shop_info['shop']['seatsNumber']) * restaurant_open_term
-
-    # if->指定した予約日に予約情報がある場合：更新
-    # else->指定した予約日に予約情報がない場合：新規作成
-    if reservation_item:
-        # 新規データと元データを統合するため、重複している時間の検索用に
-        # 予約開始時刻をkeyとして予約情報をvalueに持ったデータを作成する。
-        start_time_index = {}
-        for reserved_time_info in reservation_item['reservedInfo']:
-            start_time_index[reserved_time_info['reservedStartTime']
-                             ] = reserved_time_info
-
-        # if->予約がある時間帯：予約人数を足す
-        # else->予約が無い時間帯：その時間を新たに追加する
-        for new_reservation_info in new_reservation_list:
-            reservation_start_time = new_reservation_info['reservedStartTime']
-            if reservation_start_time in start_time_index:
-                start_time_index[reservation_start_time]['reservedNumber'] +=\
-                    new_reservation_info['reservedNumber']
-            else:
-                start_time_index[reservation_start_time] = new_reservation_info
-
-        # 一日の予約合計数と席数に対する予約合計数の比率を算出する(カレンダーの空き状況出力時に使用)
-        sum_total_reserved_number = reservation_item['totalReservedNumber'] + \
-            new_total_reserved_number
-        reserved_proportion = sum_total_reserved_number / max_reservable_number
-
-        key = {
-            'shop_id': body['shopId'],
-            'reserved_day': body['reservationDate']
-        }
-        update_value = {
-            'reserved_info': list(start_time_index.values()),
-            'total_reserved_number': sum_total_reserved_number,
-            'vacancy_flg': get_vacancy_flg(reserved_proportion)
-        }
-        shop_reservation_table_controller.update_item(**key, **update_value)
-    else:
-        # 席数に対する予約合計数の比率を算出する(カレンダーの空き状況出力時に使用)
-        reserved_proportion = new_total_reserved_number / max_reservable_number
-        new_reservation_item = {
-            'shop_id': body['shopId'],
-            'reserved_day': body['reservationDate'],
-            'reserved_year_month': utils.format_date(body['reservationDate'],
-                                                     '%Y-%m-%d', '%Y-%m'),
-            'reserved_info': new_reservation_list,
-            'total_reserved_number': new_total_reserved_number,
-            'vacancy_flg': get_vacancy_flg(reserved_proportion),
-        }
-        shop_reservation_table_controller.put_item(**new_reservation_item)
+    return reserved_slots, new_total_reserved_number
+
+
+def get_slot_count(shop_info):
+    """
+    店舗の営業時間内の30分枠の数を取得する。
+
+    Parameters
+    ----------
+    shop_info: dict
+        shop_idを指定した取得した店舗の情報
+
+    Returns
+    -------
+    slot_count: int
+        営業時間内の30分枠の数
+    """
+    return slot_array.get_slot_count(shop_info['shop']['openTime'],
+                                     shop_info['shop']['closeTime'])
+
+
+def init_shop_reservation_info(body, shop_info, item, transaction=None):
+    """
+    指定した月日の30分毎の予約人数の配列を、営業時間に合わせて作成し、予約人数を加算する。
+    予約情報がない場合は新規作成される。
+    旧形式の予約情報や、営業時間の変更前の配列は、予約人数を引き継いで作り直す。
+    作成前の予約情報から変更されていた場合は条件エラーとなる。
+
+    Parameters
+    ----------
+    body : dict
+        ユーザーが選択した予約情報
+    shop_info: dict
+        shop_idを指定した取得した店舗の情報
+    item : dict
+        指定した月日の予約情報(更新前のアイテム)
+    transaction : TransactWriter, optional
+        書き込みを追加するトランザクション, by default None
+
+    Returns
+    -------
+    transact_index: int
+        トランザクション内の書き込みの番号
+    """
+    reserved_slots, new_total_reserved_number = create_reserved_slots(body)
+
+    return shop_reservation_table_controller.init_reserved_slots(
+        body['shopId'], body['reservationDate'],
+        utils.format_date(body['reservationDate'], '%Y-%m-%d', '%Y-%m'),
+        shop_info['shop']['openTime'], get_slot_count(shop_info),
+        VACANCY_FLG_MAP['AVAILABLE_MUCH'], item, reserved_slots,
+        new_total_reserved_number, transaction=transaction)
+
+
+def put_reservation(body, shop_info):
+    """
+    予約枠、顧客予約情報、リマインドメッセージを1つのトランザクションで登録する。
+    途中で失敗した場合に一部のデータのみが登録された状態を残さない。
+    予約人数の配列が無い、または作り直しが必要な場合は、
+    取消理由の更新前のアイテムから配列を作成する書き込みに替えて再実行する。
+    同じ予約日に登録中のトランザクションと競合した場合は、少し待ってから再実行する。
+    (空き状況フラグは、登録後にupdate_vacancy_flgで更新する)
+
+    Parameters
+    ----------
+    body : dict
+        ユーザーが選択した予約情報
+    shop_info: dict
+        shop_idを指定した取得した店舗の情報
+
+    Returns
+    -------
+    reservation_id: str
+        予約情報を一意に判別するID
+        席数を超過する枠がある場合はNone
+    conflicting_slots: list of dict
+        席数を超過するため予約できなかった枠の時間と残席数
+    """
+    # 作り直しが必要な場合の更新前のアイテム(Noneの場合は配列に加算する)
+    item = None
+    for attempt in range(1, PUT_RESERVATION_MAX_ATTEMPTS + 1):
+        try:
+            with TransactWriter() as transaction:
+                # 予約情報のデータ登録
+                if item is None:
+                    shop_reservation_index = put_shop_reservation_info(
+                        body, shop_info, transaction)
+                else:
+                    shop_reservation_index = init_shop_reservation_info(
+                        body, shop_info, item, transaction)
+                reservation_id = put_customer_reservation_info(
+                    body, shop_info, transaction)
+
+                # pushメッセージをDynamoに保存
+                put_push_messages_to_dynamo(body, REMIND_DATE_DIFFERENCE,
+                                            transaction)
+            return reservation_id, []
+        except ClientError as e:
+            reason = TransactWriter.get_cancellation_reason(
+                e, shop_reservation_index)
+            if not reason or reason['Code'] not in (
+                    'ConditionalCheckFailed', 'TransactionConflict'):
+                raise e
+            error = e
+
+        if reason['Code'] == 'TransactionConflict':
+            # botocoreは再試行しないため、同時の書き込みと重ならないよう待機して同じ書き込みで再実行する
+            if attempt < PUT_RESERVATION_MAX_ATTEMPTS:
+                time.sleep(random.uniform(
+                    0, PUT_RESERVATION_RETRY_BASE_DELAY * (2 ** attempt)))
+            continue
+
+        # 更新前の予約人数から、席数を超過した枠を判定する
+        item = reason.get('Item', {})
+        if conflicting_slots := \
+                shop_reservation_table_controller.get_conflicting_slots(
+                    item, shop_info['shop']['openTime'],
+                    get_slot_count(shop_info),
+                    create_reserved_slots(body)[0],
+                    int(shop_info['shop']['seatsNumber'])):
+            return None, conflicting_slots
+        # 現在の営業時間の配列が作成済みの場合は、同時に予約があったため加算から再実行する
+        # 配列が無い(初回の予約、旧形式のデータ)、営業時間の変更前の配列の場合は作り直す
+        if shop_reservation_table_controller.has_slot_layout(
+                item, shop_info['shop']['openTime'],
+                get_slot_count(shop_info)):
+            item = None
+
+    raise error
+
+
+def update_vacancy_flg(shop_id, reserved_day, shop_info):
+    """
+    指定した月日の空き状況フラグを、合計予約人数に合わせて更新する。
+    合計予約人数を読み込まず、フラグ毎の人数範囲を条件とした更新を順に試す。
+    (条件判定は更新と同時に行われるため、同時に予約があっても最新の人数で判定される)
+    更新したフラグは、カレンダー表示用の月毎の集約アイテムにも反映する。
+
+    Parameters
+    ----------
+    shop_id : int
+        店舗ID
+    reserved_day : str
+        予約日
+    shop_info: dict
+        shop_idを指定した取得した店舗の情報
+    """
+    max_reservable_number = get_max_reservable_number(shop_info)
+    reserved_much_number = max_reservable_number * \
+        RESERVED_PROPORTION_MAP['RESERVED_MUCH']
+    reserved_full_number = max_reservable_number * \
+        RESERVED_PROPORTION_MAP['RESERVED_FULL']
+
+    # 空き状況フラグと合計予約人数の範囲(下限, 上限)
+    # ※予約の取消は無いため、予約可能人数が同じ間は空き状況フラグはこの順にのみ遷移する
+    # (席数、営業時間の変更で予約可能人数が変わった場合は、集約アイテムの逆向きの遷移も許可する)
+    vacancy_flg_ranges = [
+        (VACANCY_FLG_MAP['AVAILABLE_MUCH'], None, reserved_much_number),
+        (VACANCY_FLG_MAP['AVAILABLE_FEW'],
+         reserved_much_number, reserved_full_number),
+        (VACANCY_FLG_MAP['AVAILABLE_NOTHING'], reserved_full_number, None),
+    ]
+    for index, (vacancy_flg, min_number, max_number) in enumerate(
+            vacancy_flg_ranges):
+        if shop_reservation_table_controller.update_vacancy_flg(
+                shop_id, reserved_day, vacancy_flg, min_number, max_number):
+            # 同時に予約があった場合に、遷移前のフラグで上書きしないようにする
+            overwritable_vacancy_flgs = [NO_RESERVATION_VACANCY_FLG] + [
+                vacancy_flg_range[0]
+                for vacancy_flg_range in vacancy_flg_ranges[:index + 1]]
+            shop_reservation_table_controller.update_month_vacancy_flg(
+                shop_id, reserved_day, vacancy_flg, overwritable_vacancy_flgs,
+                max_reservable_number)
+            return
+
+
+def get_max_reservable_number(shop_info):
+    """
+    店舗の1日の予約可能人数を算出する。
+    計算:席数*営業時間の30分区切り
+
+    Parameters
+    ----------
+    shop_info: dict
+        shop_idを指定した取得した店舗の情報
+
+    Returns
+    -------
+    max_reservable_number: int
+        1日の予約可能人数
+    """
+    return int(shop_info['shop']['seatsNumber']) * get_slot_count(shop_info)
 
 
 def divide_thirty_minutes(reservation_start_time, reservation_end_time,
@@ -235,33 +417,9 @@ def divide_thirty_minutes(reservation_start_time, reservation_end_time,
     return reservation_info_list, total_people_number
 
 
-def get_vacancy_flg(reserved_proportion):
-    """
-    予約割合から判断し、空き状況のフラグを取得する。
-
-    Parameters
-    ----------
-    reserved_proportion : float
-        予約数/席数で計算した予約済み率
-
-    Returns
-    -------
-    vacancy_flg: int
-        空き状況フラグ
-    """
-    if(reserved_proportion < RESERVED_PROPORTION_MAP['RESERVED_MUCH']):
-        vacancy_flg = VACANCY_FLG_MAP['AVAILABLE_MUCH']
-    elif(reserved_proportion >= RESERVED_PROPORTION_MAP['RESERVED_MUCH'] and
-         reserved_proportion < RESERVED_PROPORTION_MAP['RESERVED_FULL']):
-        vacancy_flg = VACANCY_FLG_MAP['AVAILABLE_FEW']
-    else:
-        vacancy_flg = VACANCY_FLG_MAP['AVAILABLE_NOTHING']
-    return vacancy_flg
-
-
-def create_flex_message(body, remind_date_difference):
+def create_remind_template_params(body, remind_date_difference):
     """
-    LINEメッセージで送信するフレックスメッセージを作成する
+    リマインド通知のテンプレートパラメータを作成する
 
     Parameters
     ----------
@@ -272,43 +430,18 @@ def create_flex_message(body, remind_date_difference):
 
     Returns
     -------
-    flex_message : str
-        フレックスメッセージの形式に整形したjson型データ
+    template_params : dict
+        店名、予約日時、コース名、予約人数、日付の差分のテンプレートパラメータ
     """
     reservation_datetime = body['reservationDate'] + ' ' + \
         body['reservationStarttime'] + '-' + body['reservationEndtime']
 
-    flex_prm = {'shop_name': body['shopName'],
-                'reservation_date': reservation_datetime,
-                'course_name': body['courseName'],
-                'number_of_people': str(body['reservationPeopleNumber']),
-                'remind_date_difference': remind_date_difference
-                }
-    flex_message = flex_message_builder.create_restaurant_remind(**flex_prm)
-
-    return flex_message
+    return flex_message_builder.create_remind_template_params(
+        body['shopName'], reservation_datetime, body['courseName'],
+        str(body['reservationPeopleNumber']), remind_date_difference)
 
 
-def get_channel_access_token(channel_id):
-    """
-    短期チャネルアクセストークンをチャネル情報のテーブルから取得する
-
-    Parameters
-    ----------
-    channel_id : str
-        LINE公式アカウントもしくはMINIアプリのチャネルID
-        LINE Developersコンソールにて確認可能
-
-    Returns
-    -------
-    channelAccessToken : str
-        access_token:短期のチャネルアクセストークン
-    """
-    item = channel_access_token_table_controller.get_item(channel_id)
-    return item['channelAccessToken']
-
-
-def put_push_messages_to_dynamo(body, remind_date_difference):
+def put_push_messages_to_dynamo(body, remind_date_difference, transaction):
     """
     プッシュメッセージのメッセージ情報を作成し、DynamoDBに登録する。
     DynamoDBへの登録処理自体は共通処理にて行っている。
@@ -320,22 +453,32 @@ def put_push_messages_to_dynamo(body, remind_date_difference):
     remind_date_difference : int
         当日以前のリマインド行う日付の差分
         予約日以降のメッセージ送信を考慮し、マイナス値を許可（ex:3日前→-3）
+    transaction : TransactWriter
+        書き込みを追加するトランザクション
     """
     remind_date_on_day = body['reservationDate']
 
-    # 当日のリマインドメッセージを登録
-    flex_message_on_day = create_flex_message(body, ON_DAY_REMIND_DATE_DIFFERENCE)  # noqa:E501
-    message_table_controller.put_push_message(
-        body['userId'], CHANNEL_ID, flex_message_on_day,
-        remind_date_on_day)
-
-    # 指定日のリマインドメッセージを登録
-    flex_message_day_before = create_flex_message(body, remind_date_difference)  # noqa:E501
+    # フレックスメッセージ全体ではなく、テンプレートIDとパラメータのみを登録し、
+    # 送信時にバッチでメッセージを作成する
+    # 当日のリマインドメッセージ
+    template_params_on_day = create_remind_template_params(body, ON_DAY_REMIND_DATE_DIFFERENCE)  # noqa:E501
+    # 指定日のリマインドメッセージ
+    template_params_day_before = create_remind_template_params(body, remind_date_difference)  # noqa:E501
     remind_date_day_before = utils.calculate_date_str_difference(
         remind_date_on_day, remind_date_difference)
-    message_table_controller.put_push_message(
-        body['userId'], CHANNEL_ID, flex_message_day_before,
-        remind_date_day_before)
+
+    # 2件のリマインドメッセージをまとめて登録
+    push_messages = [
+        {'user_id': body['userId'], 'channel_id': CHANNEL_ID,
+         'template_id': flex_message_builder.REMIND_TEMPLATE_ID,
+         'template_params': template_params_on_day,
+         'remind_date': remind_date_on_day},
+        {'user_id': body['userId'], 'channel_id': CHANNEL_ID,
+         'template_id': flex_message_builder.REMIND_TEMPLATE_ID,
+         'template_params': template_params_day_before,
+         'remind_date': remind_date_day_before},
+    ]
+    message_table_controller.put_push_messages(push_messages, transaction)
 
 
 def lambda_handler(event, context):
@@ -364,8 +507,7 @@ def lambda_handler(event, context):
     body = json.loads(event['body'])
     #ユーザーID取得
     try:
-        user_profile = line.get_profile(
-            body['idToken'], LIFF_CHANNEL_ID)
+        user_profile = id_token_verifier.get_profile(body['idToken'])
         if 'error' in user_profile and 'expired' in user_profile['error_description']:  # noqa 501
             return utils.create_error_response('Forbidden', 403)
         else:
@@ -382,17 +524,42 @@ def lambda_handler(event, context):
         return utils.create_error_response(error_msg_disp, 400)
 
     try:
-        # 予約情報のデータ登録
         shop_info = shop_master_table_controller.get_item(body['shopId'])
-        put_shop_reservation_info(body, shop_info)
-        reservation_id = put_customer_reservation_info(body, shop_info)
+        # 営業時間外、30分単位でない時間帯は予約枠に登録できないため、店舗情報でチェックする
+        error_msg = param_checker.check_api_reservation_put_shop_hours(
+            shop_info['shop']['openTime'], shop_info['shop']['closeTime'])
+    except Exception as e:
+        logger.error('Occur Exception: %s', e)
+        return utils.create_error_response('ERROR')
 
-        # pushメッセージをDynamoに保存
-        put_push_messages_to_dynamo(body, REMIND_DATE_DIFFERENCE)
+    if error_msg:
+        error_msg_disp = ('\n').join(error_msg)
+        logger.error(error_msg_disp)
+        return utils.create_error_response(error_msg_disp, 400)
+
+    try:
+        reservation_id, conflicting_slots = put_reservation(body, shop_info)
 
     except Exception as e:
         logger.error('Occur Exception: %s', e)
         return utils.create_error_response('ERROR')
 
+    # 席数を超過する枠がある場合は予約せず、超過した枠を返却する
+    if conflicting_slots:
+        logger.info('席数を超過する枠があります: %s', conflicting_slots)
+        return utils.create_error_response(response_encoder.dumps(
+            {'message': 'Conflict', 'conflictingSlots': conflicting_slots}),
+            409)
+
+    try:
+        update_vacancy_flg(body['shopId'], body['reservationDate'], shop_info)
+    except Exception as e:
+        # 予約は登録済みのため、エラーとせずに返却する
+        # (空き状況フラグは、同じ日の次の予約時に最新の合計予約人数で更新される)
+        logger.exception('空き状況フラグの更新でエラーが発生しました: %s', e)
+
     return utils.create_success_response(
-        json.dumps({'reservationId': reservation_id}))
+        response_encoder.dumps({'reservationId': reservation_id}))
+
+
+lazy_loader.log_import_time(__name__)
@@ -1,8 +1,11 @@
 import logging
-import json
 import os
-from common import (common_const, utils)
+# 読み込み時間の計測開始点とするため、最初にimportする
+from common import lazy_loader
+from common import (common_const, response_encoder, utils)
 from validation.restaurant_param_check import RestaurantParamCheck
+from restaurant import (availability, slot_array)
+from restaurant.restaurant_shop_master import RestaurantShopMaster
 from restaurant.restaurant_shop_reservation import RestaurantShopReservation
 
 # ログ出力の設定
@@ -13,8 +16,11 @@ if LOGGER_LEVEL == 'DEBUG':
 else:
     logger.setLevel(logging.INFO)
 
-# テーブル操作クラスの初期化
-shop_reservation_table_controller = RestaurantShopReservation()
+# テーブル操作クラスの初期化(初回アクセス時に初期化する)
+# 読み込みのみのため、数値をDecimal型に変換しない低レベルクライアントで取得する
+shop_reservation_table_controller = lazy_loader.LazyObject(
+    lambda: RestaurantShopReservation(low_level=True))
+shop_master_table_controller = lazy_loader.LazyObject(RestaurantShopMaster)
 
 
 def get_reservation_time(shop_id, preferred_day):
@@ -37,15 +43,54 @@ def get_reservation_time(shop_id, preferred_day):
     -------
     指定日に予約がない場合、空のリストを返す
     """
-    # 指定日の予約情報を取得
+    # 指定日の予約情報を取得(予約がない場合は空のリスト)
     key = {'shop_id': int(shop_id), 'reserved_day': preferred_day}
-    day_reserved_info = shop_reservation_table_controller.get_item(**key)
+    day_reserved_info_list = \
+        shop_reservation_table_controller.get_reserved_info(**key)
 
-    # 指定日の予約がない場合空のリストを返す
-    if not day_reserved_info:
-        return []
+    return day_reserved_info_list
 
-    return day_reserved_info['reservedInfo']
+
+def get_available_start_times(shop_id, preferred_day, day_reserved_info_list,
+                              course_id, people_number):
+    """
+    指定日にコースを予約できる開始時刻を取得する
+
+    Parameters
+    ----------
+    shop_id : str
+        予約する店舗のID
+    preferred_day : str
+        予約する日付
+    day_reserved_info_list : list of dict
+        指定日の時間毎の予約情報
+    course_id : str
+        予約するコースのID
+    people_number : str
+        予約人数
+
+    Returns
+    -------
+    available_start_times : list of str or None
+        コースの時間中の全ての枠に予約人数分の空きがある、HH:MM形式の開始時刻のリスト
+        店舗に存在しないコースの場合はNone
+    """
+    shop_info = shop_master_table_controller.get_item(int(shop_id))
+    course_minutes = availability.get_course_minutes(
+        shop_info, int(course_id))
+    if course_minutes is None:
+        return None
+
+    # 取得済みの予約情報を現在の営業時間の配列に変換し、再度読み込まない
+    open_time = shop_info['shop']['openTime']
+    reserved_slots = slot_array.encode_reserved_info(
+        day_reserved_info_list, open_time,
+        slot_array.get_slot_count(open_time, shop_info['shop']['closeTime']))
+    shop_availability = availability.ShopAvailability.from_shop_info(
+        shop_info, {preferred_day: reserved_slots}, [preferred_day])
+
+    return shop_availability.get_feasible_start_times(
+        course_minutes, int(people_number))[preferred_day]
 
 
 def lambda_handler(event, context):
@@ -56,13 +101,22 @@ def lambda_handler(event, context):
     ----------
     event : dict
         フロントから送られたパラメータ等の情報
+        queryStringParametersには以下を指定する
+            shopId : 店舗ID
+            preferredDay : YYYY-MM-DD 形式の予約日
+            courseId : 予約するコースのID(任意)
+            reservationPeopleNumber : 予約人数(courseId指定時は必須)
     context : __main__.LambdaContext
         Lambdaランタイムや関数名等のメタ情報
 
     Returns
     -------
     response: dict
-        正常の場合、予約情報を返却する。
+        正常の場合、予約情報(時間毎の予約情報のリスト)を返却する。
+        courseIdとreservationPeopleNumberを指定した場合、
+        {'reservedInfo': 予約情報,
+         'availableStartTimes': HH:MM形式の予約できる開始時刻のリスト}
+        をまとめて返却する。
         エラーの場合、エラーコードとエラーメッセージを返却する。
     """
     logger.info(event)
@@ -82,10 +136,23 @@ def lambda_handler(event, context):
     try:
         day_reserved_list = get_reservation_time(
             req_param['shopId'], req_param['preferredDay'])
+        if 'courseId' in req_param:
+            available_start_times = get_available_start_times(
+                req_param['shopId'], req_param['preferredDay'],
+                day_reserved_list, req_param['courseId'],
+                req_param['reservationPeopleNumber'])
+            if available_start_times is None:
+                error_msg_disp = '存在チェックエラー:courseId'
+                logger.error(error_msg_disp)
+                return utils.create_error_response(error_msg_disp, status=400)  # noqa: E501
+            day_reserved_list = {'reservedInfo': day_reserved_list,
+                                 'availableStartTimes': available_start_times}
     except Exception as e:
         logger.exception('Occur Exception: %s', e)
         return utils.create_error_response('ERROR')
 
-    return utils.create_success_response(json.dumps(
-        day_reserved_list, default=utils.decimal_to_int,
-        ensure_ascii=False))
+    return utils.create_success_response(
+        response_encoder.dumps(day_reserved_list))
+
+
+lazy_loader.log_import_time(__name__)
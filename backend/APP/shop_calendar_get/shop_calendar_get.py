@@ -1,11 +1,16 @@
 import logging
-import json
+import calendar
 import datetime
 import os
 
-from common import (common_const, utils)
+# 読み込み時間の計測開始点とするため、最初にimportする
+from common import lazy_loader
+from common import (common_const, response_encoder, utils)
 from validation.restaurant_param_check import RestaurantParamCheck
-from restaurant.restaurant_shop_reservation import RestaurantShopReservation
+from restaurant import (availability, slot_array)
+from restaurant.restaurant_shop_master import RestaurantShopMaster
+from restaurant.restaurant_shop_reservation import (
+    RestaurantShopReservation, NO_RESERVATION_VACANCY_FLG)
 
 # ログ出力の設定
 LOGGER_LEVEL = os.environ.get("LOGGER_LEVEL")
@@ -15,8 +20,11 @@ if LOGGER_LEVEL == 'DEBUG':
 else:
     logger.setLevel(logging.INFO)
 
-# テーブル操作クラスの初期化
-shop_reservation_table_controller = RestaurantShopReservation()
+# テーブル操作クラスの初期化(初回アクセス時に初期化する)
+# 読み込みのみのため、数値をDecimal型に変換しない低レベルクライアントで取得する
+shop_reservation_table_controller = lazy_loader.LazyObject(
+    lambda: RestaurantShopReservation(low_level=True))
+shop_master_table_controller = lazy_loader.LazyObject(RestaurantShopMaster)
 
 
 def get_shop_calendar(shop_id, preferred_year_month):
@@ -38,26 +46,156 @@ def get_shop_calendar(shop_id, preferred_year_month):
         予約情報が存在する日の空き状況
 
     """
-    shop_calendar = shop_reservation_table_controller.query_index_shop_id_reserved_year_month(  # noqa:E501
-        int(shop_id), preferred_year_month
-    )
+    return get_shop_calendars(
+        shop_id, preferred_year_month, preferred_year_month)[0]
 
-    result_calendar = {
-        'reservedYearMonth': preferred_year_month, 'reservedDays': []
+
+def get_shop_calendars(shop_id, preferred_year_month_from,
+                       preferred_year_month_to):
+    """
+    複数月分の店舗の予約情報カレンダーを取得する。
+    月毎の集約アイテムから取得し、集約アイテムが無い月のみ予約情報を1回のqueryで取得する。
+
+    Parameters
+    ----------
+    shop_id : str
+        店舗ID
+    preferred_year_month_from : str
+        取得開始年月
+        YYYY-MM の形式
+    preferred_year_month_to : str
+        取得終了年月
+        YYYY-MM の形式
+
+    Returns
+    -------
+    result_calendars: list of dict
+        年月毎の予約情報が存在する日の空き状況(年月の昇順)
+
+    """
+    year_months = create_year_month_list(
+        preferred_year_month_from, preferred_year_month_to)
+    result_calendars = {
+        year_month: {'reservedYearMonth': year_month, 'reservedDays': []}
+        for year_month in year_months
     }
 
-    if not shop_calendar:
-        return result_calendar
+    month_summaries = shop_reservation_table_controller.get_month_summaries(
+        int(shop_id), year_months)
+    for year_month, vacancy_flgs in month_summaries.items():
+        # フロントに返却する名称に変更し、予約情報がある日のみ返却する
+        result_calendars[year_month]['reservedDays'] = [
+            {'day': index + 1, 'vacancyFlg': vacancy_flg}
+            for index, vacancy_flg in enumerate(vacancy_flgs)
+            if vacancy_flg != NO_RESERVATION_VACANCY_FLG]
+
+    missing_year_months = [year_month for year_month in year_months
+                           if year_month not in month_summaries]
+    if not missing_year_months:
+        return list(result_calendars.values())
+
+    # 予約日(YYYY-MM-DD)は文字列で比較されるため、末日は31日固定で問題ない
+    shop_calendar = shop_reservation_table_controller.query_day_range(
+        int(shop_id), missing_year_months[0] + '-01',
+        missing_year_months[-1] + '-31',
+        attributes=['reservedDay', 'vacancyFlg', 'totalReservedNumber'])
 
     for one_day_info in shop_calendar:
-        # 日付を数値のみの形式に加工
-        reservedDay = datetime.datetime.strptime(
-            one_day_info['reservedDay'], '%Y-%m-%d').day
-        # フロントに返却する名称に変更
-        result_calendar['reservedDays'].append(
-            {'day': reservedDay, 'vacancyFlg': one_day_info['vacancyFlg']})
+        reserved_day = one_day_info['reservedDay']
+        # 予約人数が0の日(予約に失敗した日等)は、予約情報が無い日とする
+        if reserved_day[:7] in month_summaries or \
+                not one_day_info.get('totalReservedNumber'):
+            continue
+        # フロントに返却する名称に変更し、日付は数値のみの形式に加工
+        result_calendars[reserved_day[:7]]['reservedDays'].append(
+            {'day': int(reserved_day[8:10]),
+             'vacancyFlg': one_day_info['vacancyFlg']})
+
+    return list(result_calendars.values())
+
 
-    return result_calendar
+def get_unavailable_days(shop_id, year_months, course_id, people_number):
+    """
+    期間内でコースを予約できない日を取得する。
+    日×30分枠の予約人数の行列から、コースの時間中の全ての枠に
+    予約人数分の空きがある開始時刻が1つも無い日を判定する。
+
+    Parameters
+    ----------
+    shop_id : str
+        店舗ID
+    year_months : list of str
+        YYYY-MM 形式の年月のリスト(昇順)
+    course_id : str
+        予約するコースのID
+    people_number : str
+        予約人数
+
+    Returns
+    -------
+    unavailable_days: dict or None
+        年月をキー、予約できない日(数値)のリストを値としたdict
+        店舗に存在しないコースの場合はNone
+
+    """
+    shop_info = shop_master_table_controller.get_item(int(shop_id))
+    course_minutes = availability.get_course_minutes(
+        shop_info, int(course_id))
+    if course_minutes is None:
+        return None
+
+    # 予約情報が無い日も行列に含め、予約人数0の日として判定する
+    days = [f'{year_month}-{day:02d}' for year_month in year_months
+            for day in range(1, calendar.monthrange(
+                int(year_month[:4]), int(year_month[5:]))[1] + 1)]
+    open_time = shop_info['shop']['openTime']
+    reserved_slots_by_day = \
+        shop_reservation_table_controller.query_reserved_slots_range(
+            int(shop_id), days[0], days[-1], open_time,
+            slot_array.get_slot_count(
+                open_time, shop_info['shop']['closeTime']))
+    shop_availability = availability.ShopAvailability.from_shop_info(
+        shop_info, reserved_slots_by_day, days)
+
+    unavailable_days = {year_month: [] for year_month in year_months}
+    for day in shop_availability.get_unavailable_days(
+            course_minutes, int(people_number)):
+        unavailable_days[day[:7]].append(int(day[8:10]))
+    return unavailable_days
+
+
+def create_year_month_list(year_month_from, year_month_to):
+    """
+    期間内の年月のリストを作成する。
+
+    Parameters
+    ----------
+    year_month_from : str
+        開始年月
+        YYYY-MM、YYYY/MM、YYYYMM の形式
+    year_month_to : str
+        終了年月
+        YYYY-MM、YYYY/MM、YYYYMM の形式
+
+    Returns
+    -------
+    year_months: list of str
+        YYYY-MM 形式の年月のリスト
+
+    """
+    # 日付のハイフンとスラッシュ区切りに対応
+    month_from = datetime.datetime.strptime(
+        year_month_from.replace('-', '').replace('/', ''), '%Y%m')
+    month_to = datetime.datetime.strptime(
+        year_month_to.replace('-', '').replace('/', ''), '%Y%m')
+
+    year_months = []
+    year, month = month_from.year, month_from.month
+    while (year, month) <= (month_to.year, month_to.month):
+        year_months.append(f'{year:04d}-{month:02d}')
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    return year_months
 
 
 def lambda_handler(event, context):
@@ -68,6 +206,12 @@ def lambda_handler(event, context):
     ----------
     event : dict
         フロントから送られたパラメータ等の情報
+        queryStringParametersには以下を指定する
+            shopId : 店舗ID
+            preferredYearMonth : YYYY-MM 形式の年月
+            preferredYearMonthTo : 期間指定時の終了年月(任意)
+            courseId : 予約するコースのID(任意)
+            reservationPeopleNumber : 予約人数(courseId指定時は必須)
     context : __main__.LambdaContext
         Lambdaランタイムや関数名等のメタ情報
 
@@ -75,6 +219,10 @@ def lambda_handler(event, context):
     -------
     response: dict
         正常の場合、指定年月の予約情報を返却する。
+        preferredYearMonthToを指定した場合、
+        {'calendars': 期間内の年月毎の予約情報のリスト}を返却する。
+        courseIdとreservationPeopleNumberを指定した場合、年月毎の予約情報に
+        コースを予約できない日(unavailableDays: 日(数値)のリスト)を含めて返却する。
         エラーの場合、エラーコードとエラーメッセージを返却する。
     """
     # パラメータログ
@@ -93,12 +241,35 @@ def lambda_handler(event, context):
         return utils.create_error_response(error_msg_disp, status=400)  # noqa: E501
 
     try:
-        shop_reserved_calendar = get_shop_calendar(
-            req_param['shopId'], req_param['preferredYearMonth'])
+        if 'preferredYearMonthTo' in req_param:
+            calendars = get_shop_calendars(
+                req_param['shopId'], req_param['preferredYearMonth'],
+                req_param['preferredYearMonthTo'])
+            shop_reserved_calendar = {'calendars': calendars}
+        else:
+            shop_reserved_calendar = get_shop_calendar(
+                req_param['shopId'], req_param['preferredYearMonth'])
+            calendars = [shop_reserved_calendar]
+
+        if 'courseId' in req_param:
+            unavailable_days = get_unavailable_days(
+                req_param['shopId'],
+                [shop_calendar['reservedYearMonth']
+                 for shop_calendar in calendars],
+                req_param['courseId'], req_param['reservationPeopleNumber'])
+            if unavailable_days is None:
+                error_msg_disp = '存在チェックエラー:courseId'
+                logger.error(error_msg_disp)
+                return utils.create_error_response(error_msg_disp, status=400)  # noqa: E501
+            for shop_calendar in calendars:
+                shop_calendar['unavailableDays'] = \
+                    unavailable_days[shop_calendar['reservedYearMonth']]
 
     except Exception as e:
         logger.exception('Occur Exception: %s', e)
         return utils.create_error_response('ERROR')
-    return utils.create_success_response(json.dumps(
-        shop_reserved_calendar, default=utils.decimal_to_int,
-        ensure_ascii=False))
+    return utils.create_success_response(
+        response_encoder.dumps(shop_reserved_calendar))
+
+
+lazy_loader.log_import_time(__name__)
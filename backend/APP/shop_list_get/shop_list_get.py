@@ -1,8 +1,10 @@
 import logging
-import json
+import hashlib
 import os
 
-from common import utils
+# 読み込み時間の計測開始点とするため、最初にimportする
+from common import lazy_loader
+from common import (response_encoder, utils)
 from restaurant.restaurant_shop_master import RestaurantShopMaster
 
 # ログ出力の設定
@@ -13,22 +15,95 @@ if LOGGER_LEVEL == 'DEBUG':
 else:
     logger.setLevel(logging.INFO)
 
-# テーブル操作クラスの初期化
-shop_master_table_controller = RestaurantShopMaster()
+# テーブル操作クラスの初期化(初回アクセス時に初期化する)
+shop_master_table_controller = lazy_loader.LazyObject(RestaurantShopMaster)
 
+# 店舗一覧のレスポンスのスナップショット
+# 取得元の店舗情報(キャッシュ)が同じ間は、加工・シリアライズ済みのbodyとETagを使い回す
+shop_list_snapshot = {'source': None, 'body': None, 'etag': None}
 
-def get_shop_list():
+
+def get_shop_list_snapshot():
     """
-    店舗一覧情報を返却する
+    シリアライズ済みの店舗一覧とETagを返却する
+    店舗情報が更新されるまでは、前回作成したものを使い回す
 
     Returns
     -------
-    area_shop_list: list of dict
-        地域毎の店舗情報のリスト
+    body: str
+        地域毎の店舗情報のリストのjson文字列
+    etag: str
+        bodyから算出したETag
     """
-
     shop_list = shop_master_table_controller.scan()
 
+    # 店舗情報のキャッシュが更新された場合のみ作り直す
+    if shop_list is not shop_list_snapshot['source']:
+        body = response_encoder.dumps(create_area_shop_list(shop_list))
+        shop_list_snapshot.update(
+            source=shop_list, body=body, etag=create_etag(body))
+
+    return shop_list_snapshot['body'], shop_list_snapshot['etag']
+
+
+def create_etag(body):
+    """
+    レスポンスbodyからETag(強いETag)を作成する
+
+    Parameters
+    ----------
+    body : str
+        レスポンスbody
+
+    Returns
+    -------
+    etag: str
+        ダブルクォートで囲んだbodyのハッシュ値
+    """
+    return '"' + hashlib.sha256(body.encode('utf-8')).hexdigest() + '"'
+
+
+def is_not_modified(event, etag):
+    """
+    リクエストのIf-None-MatchヘッダーとETagを比較し、
+    フロントが保持しているデータが最新か判定する
+
+    Parameters
+    ----------
+    event : dict
+        フロントから送られたパラメータ等の情報
+    etag : str
+        最新のレスポンスのETag
+
+    Returns
+    -------
+    not_modified: bool
+        フロントが最新のデータを保持している場合True
+    """
+    if_none_match = utils.get_request_header(event, 'If-None-Match')
+    if not if_none_match:
+        return False
+
+    # If-None-Matchは弱い比較を行うため、W/の接頭辞は無視する
+    request_etags = [request_etag.strip().replace('W/', '', 1)
+                     for request_etag in if_none_match.split(',')]
+    return '*' in request_etags or etag in request_etags
+
+
+def create_area_shop_list(shop_list):
+    """
+    店舗情報を地域毎にまとめる
+
+    Parameters
+    ----------
+    shop_list : list of dict
+        店舗情報のリスト
+
+    Returns
+    -------
+    area_shop_list: list of dict
+        地域毎の店舗情報のリスト
+    """
     # フロントに返却する形式にデータ加工
     area_shop_dict = {}
     for shop in shop_list:
@@ -89,11 +164,17 @@ def lambda_handler(event, context):
     # パラメータログ
     logger.info(event)
     try:
-        shop_list = get_shop_list()
+        body, etag = get_shop_list_snapshot()
     except Exception as e:
         logger.exception('Occur Exception: %s', e)
         return utils.create_error_response('ERROR')
 
-    return utils.create_success_response(json.dumps(
-        shop_list, default=utils.decimal_to_int,
-        ensure_ascii=False))
+    # ETagを返却し、フロントには毎回最新か確認させる
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if is_not_modified(event, etag):
+        return utils.create_response(304, '', headers)
+
+    return utils.create_success_response(body, headers)
+
+
+lazy_loader.log_import_time(__name__)
@@ -4,22 +4,152 @@ DynamoDB操作用基底モジュール
 """
 import boto3
 from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import (TypeDeserializer, TypeSerializer)
+from botocore.config import Config
+from botocore.exceptions import ClientError
 import logging
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import (datetime, timedelta)
 
+from aws.dynamodb import deserializer
+
 # ログ出力の設定
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# 並列scan時のセグメント数(並列度)
+PARALLEL_SCAN_TOTAL_SEGMENTS = int(os.environ.get('SCAN_TOTAL_SEGMENTS', 4))
+# 並列scan時、セグメント毎の取得結果の受け渡し待ち秒数
+PARALLEL_SCAN_QUEUE_TIMEOUT = 0.5
+# BatchGetItemの1リクエストあたりの最大キー数
+BATCH_GET_ITEM_MAX_KEYS = 100
+# BatchWriteItemの1リクエストあたりの最大アイテム数
+BATCH_WRITE_ITEM_MAX_ITEMS = 25
+# バッチ処理で未処理となったアイテムの最大再試行回数
+BATCH_RETRY_MAX_ATTEMPTS = 8
+# バッチ処理の再試行時の待機秒数の基準値と上限値
+BATCH_RETRY_BASE_DELAY = 0.05
+BATCH_RETRY_MAX_DELAY = 2
+
+# DynamoDBへの接続設定(環境変数で上書き可能)
+dynamodb_config = Config(
+    max_pool_connections=int(
+        os.environ.get('DYNAMODB_MAX_POOL_CONNECTIONS', 10)),
+    connect_timeout=float(os.environ.get('DYNAMODB_CONNECT_TIMEOUT', 1)),
+    read_timeout=float(os.environ.get('DYNAMODB_READ_TIMEOUT', 3)),
+    retries={
+        'mode': 'adaptive',
+        'max_attempts': int(os.environ.get('DYNAMODB_MAX_ATTEMPTS', 3)),
+    },
+)
+
+# スレッド毎に共有するDynamoDBのresource
+# boto3のsession、resourceはスレッドセーフではないため、スレッド単位で保持する
+_thread_local = threading.local()
+
+
+def configure(config):
+    """
+    DynamoDBへの接続設定を変更する
+    ※変更後に生成されるresourceから適用されるため、テーブル操作クラスの初期化前に呼び出すこと
+
+    Parameters
+    ----------
+    config : botocore.config.Config
+        接続設定
+        既定の設定とマージされ、指定した項目のみ上書きされる
+
+    """
+    global dynamodb_config
+    dynamodb_config = dynamodb_config.merge(config)
+
+
+def get_resource():
+    """
+    DynamoDBのresourceを取得する
+    ※同じスレッド内では初回に生成したresourceを使い回し、
+    コネクションプールを全てのテーブル操作クラスで共有する
+
+    Returns
+    -------
+    resource : boto3.resources.base.ServiceResource
+        DynamoDBのresource
+
+    """
+    resource = getattr(_thread_local, 'resource', None)
+    if resource is None:
+        resource = boto3.session.Session().resource(
+            'dynamodb', config=dynamodb_config)
+        _thread_local.resource = resource
+
+    return resource
+
+
+def get_client():
+    """
+    DynamoDBのクライアントを取得する
+    ※get_resourceで取得するresourceに紐づくクライアントのため、値はPythonの型のまま指定できる
+
+    Returns
+    -------
+    client : botocore.client.DynamoDB
+        DynamoDBのクライアント
+
+    """
+    return get_resource().meta.client
+
+
+def get_low_level_client():
+    """
+    DynamoDBの低レベルクライアントを取得する
+    ※値の型変換を行わないクライアントのため、値は{型: 値}の形式で指定・取得する
+    ※同じスレッド内では初回に生成したクライアントを使い回します
+
+    Returns
+    -------
+    client : botocore.client.DynamoDB
+        DynamoDBの低レベルクライアント
+
+    """
+    client = getattr(_thread_local, 'low_level_client', None)
+    if client is None:
+        client = boto3.session.Session().client(
+            'dynamodb', config=dynamodb_config)
+        _thread_local.low_level_client = client
+
+    return client
+
 
 class DynamoDB:
     """DynamoDB操作用基底クラス"""
-    __slots__ = ['_db', '_table_name']
+    __slots__ = ['_db', '_table_name', '_low_level']
 
-    def __init__(self, table_name):
-        """初期化メソッド"""
+    # 低レベルクライアントのキー指定用
+    _serializer = TypeSerializer()
+
+    def __init__(self, table_name, low_level=False):
+        """
+        初期化メソッド
+
+        Parameters
+        ----------
+        table_name : str
+            テーブル名
+        low_level : bool, optional
+            読み込み(get_item、batch_get_item、範囲指定query)を
+            低レベルクライアントで行う場合True, by default False
+            数値はDecimal型ではなくint、floatで取得される
+            書き込みは指定に関わらずresourceで行う
+
+        """
         self._table_name = table_name
-        self._db = boto3.resource('dynamodb')
+        self._db = get_resource()
+        self._low_level = low_level
 
     def _put_item(self, item):
         """
@@ -44,6 +174,40 @@ class DynamoDB:
 
         return response
 
+    def _put_item_optional(self, item, condition_expression=None,
+                           expression_attribute_names=None):
+        """
+        条件を指定してアイテムを登録する
+
+        Parameters
+        ----------
+        item : dict
+            登録するアイテム
+        condition_expression : str, optional
+            登録する条件, by default None
+        expression_attribute_names : dict, optional
+            expression内で使用する属性名, by default None
+
+        Returns
+        -------
+        response : dict
+            レスポンス情報
+
+        """
+        put_kwargs = {'Item': self._replace_data_for_dynamodb(item)}
+        if condition_expression:
+            put_kwargs['ConditionExpression'] = condition_expression
+        if expression_attribute_names:
+            put_kwargs['ExpressionAttributeNames'] = \
+                expression_attribute_names
+
+        try:
+            response = self._table.put_item(**put_kwargs)
+        except Exception as e:
+            raise e
+
+        return response
+
     def _update_item(self, key, expression, expression_value, return_value):
         """
         アイテムを更新する
@@ -78,7 +242,8 @@ class DynamoDB:
 
     def _update_item_optional(self, key, update_expression,
                               condition_expression, expression_attribute_names,
-                              expression_value, return_value):
+                              expression_value, return_value,
+                              return_values_on_condition_check_failure=None):
         """
         アイテムを更新する
         ※キー以外の更新条件がある場合に対応します
@@ -91,7 +256,7 @@ class DynamoDB:
         update_expression : str
             更新の式
         condition_expression : str
-            更新条件
+            更新条件(Noneの場合は条件なし)
         expression_attribute_names:dict
             プレースホルダー
             （予約語に対応するため）
@@ -99,6 +264,8 @@ class DynamoDB:
             各変数宣言
         return_value : str
             responseで取得する値
+        return_values_on_condition_check_failure : str, optional
+            条件エラー時に例外のレスポンスに含めるアイテム(ALL_OLD), by default None
 
         Returns
         -------
@@ -106,21 +273,106 @@ class DynamoDB:
             レスポンス情報
 
         """
+        update_kwargs = {
+            'Key': key,
+            'UpdateExpression': update_expression,
+            'ExpressionAttributeNames': expression_attribute_names,
+            'ExpressionAttributeValues': self._replace_data_for_dynamodb(
+                expression_value),
+            'ReturnValues': return_value,
+        }
+        # 更新条件が無い場合は指定しない
+        if condition_expression:
+            update_kwargs['ConditionExpression'] = condition_expression
+        if return_values_on_condition_check_failure:
+            update_kwargs['ReturnValuesOnConditionCheckFailure'] = \
+                return_values_on_condition_check_failure
+
         try:
-            response = self._table.update_item(
-                Key=key,
-                UpdateExpression=update_expression,
-                ConditionExpression=condition_expression,
-                ExpressionAttributeNames=expression_attribute_names,  # noqa 501
-                ExpressionAttributeValues=self._replace_data_for_dynamodb(
-                    expression_value),
-                ReturnValues=return_value,
-            )
+            response = self._table.update_item(**update_kwargs)
         except Exception as e:
             raise e
 
         return response
 
+    def _transact_put_item(self, transaction, item,
+                           condition_expression=None):
+        """
+        アイテムの登録をトランザクションに追加する
+        ※書き込みはトランザクションのコミット時に行われます
+
+        Parameters
+        ----------
+        transaction : TransactWriter
+            追加先のトランザクション
+        item : dict
+            登録するアイテム
+        condition_expression : str, optional
+            登録条件, by default None
+
+        Returns
+        -------
+        transact_index : int
+            トランザクション内の書き込みの番号
+
+        """
+        put = {
+            'TableName': self._table_name,
+            'Item': self._replace_data_for_dynamodb(item),
+        }
+        if condition_expression:
+            put['ConditionExpression'] = condition_expression
+
+        return transaction.add_item({'Put': put})
+
+    def _transact_update_item(self, transaction, key, expression,
+                              expression_value, condition_expression=None,
+                              expression_attribute_names=None,
+                              return_values_on_condition_check_failure=None):
+        """
+        アイテムの更新をトランザクションに追加する
+        ※書き込みはトランザクションのコミット時に行われます
+
+        Parameters
+        ----------
+        transaction : TransactWriter
+            追加先のトランザクション
+        key : dict
+            更新するアイテムのキー
+        expression : str
+            更新の式
+        expression_value : dict
+            更新する値
+        condition_expression : str, optional
+            更新条件, by default None
+        expression_attribute_names : dict, optional
+            プレースホルダー, by default None
+        return_values_on_condition_check_failure : str, optional
+            条件エラー時に取消理由に含めるアイテム(ALL_OLD), by default None
+
+        Returns
+        -------
+        transact_index : int
+            トランザクション内の書き込みの番号
+
+        """
+        update = {
+            'TableName': self._table_name,
+            'Key': key,
+            'UpdateExpression': expression,
+            'ExpressionAttributeValues': self._replace_data_for_dynamodb(
+                expression_value),
+        }
+        if condition_expression:
+            update['ConditionExpression'] = condition_expression
+        if expression_attribute_names:
+            update['ExpressionAttributeNames'] = expression_attribute_names
+        if return_values_on_condition_check_failure:
+            update['ReturnValuesOnConditionCheckFailure'] = \
+                return_values_on_condition_check_failure
+
+        return transaction.add_item({'Update': update})
+
     def _delete_item(self, key):
         """
         アイテムを削除する
@@ -143,7 +395,7 @@ class DynamoDB:
 
         return response
 
-    def _get_item(self, key):
+    def _get_item(self, key, attributes=None):
         """
         アイテムを取得する
 
@@ -151,6 +403,9 @@ class DynamoDB:
         ----------
         key : dict
             取得するアイテムのキー
+        attributes : list of str, optional
+            取得する属性名のリスト, by default None
+            指定しない場合は全ての属性
 
         Returns
         -------
@@ -158,13 +413,133 @@ class DynamoDB:
             レスポンス情報
 
         """
+        get_kwargs = self._create_projection_kwargs(attributes)
         try:
-            response = self._table.get_item(Key=key)
+            if self._low_level:
+                response = get_low_level_client().get_item(
+                    TableName=self._table_name,
+                    Key=self._serialize_key(key), **get_kwargs)
+                item = response.get('Item')
+                return deserializer.deserialize_item(item, attributes) \
+                    if item else {}
+            response = self._table.get_item(Key=key, **get_kwargs)
         except Exception as e:
             raise e
 
         return response.get('Item', {})
 
+    def _batch_get_items(self, keys, attributes=None):
+        """
+        BatchGetItemを使用して複数のアイテムを取得する
+        ※100件毎にリクエストを分割し、UnprocessedKeysは待機してから再取得します
+
+        Parameters
+        ----------
+        keys : list of dict
+            取得するアイテムのキーのリスト
+        attributes : list of str, optional
+            取得する属性名のリスト, by default None
+            指定しない場合は全ての属性
+
+        Returns
+        -------
+        items : list
+            取得したアイテムのリスト
+            キーの順序は保証されず、存在しないキーのアイテムは含まれません
+
+        """
+        # 同一キーを含むリクエストはエラーとなるため、重複を除外する
+        unique_keys = list({tuple(sorted(key.items())): key
+                            for key in keys}.values())
+
+        if self._low_level:
+            batch_get_item = get_low_level_client().batch_get_item
+            unique_keys = [self._serialize_key(key) for key in unique_keys]
+        else:
+            batch_get_item = self._db.batch_get_item
+
+        items = []
+        for index in range(0, len(unique_keys), BATCH_GET_ITEM_MAX_KEYS):
+            request_items = {self._table_name: {
+                'Keys': unique_keys[index:index + BATCH_GET_ITEM_MAX_KEYS],
+                **self._create_projection_kwargs(attributes)}}
+            attempt = 0
+            while request_items:
+                try:
+                    response = batch_get_item(RequestItems=request_items)
+                except Exception as e:
+                    raise e
+
+                response_items = response['Responses'].get(
+                    self._table_name, [])
+                if self._low_level:
+                    response_items = [
+                        deserializer.deserialize_item(item, attributes)
+                        for item in response_items]
+                items.extend(response_items)
+                request_items = response.get('UnprocessedKeys')
+                if request_items:
+                    attempt += 1
+                    self._wait_for_retry(attempt)
+
+        return items
+
+    def _batch_writer(self):
+        """
+        複数アイテムをまとめて登録・削除するためのBatchWriterを取得する
+
+        Returns
+        -------
+        batch_writer : BatchWriter
+            with文で使用し、終了時に未送信のアイテムを書き込む
+
+        """
+        return BatchWriter(self)
+
+    def _batch_write_items(self, write_requests):
+        """
+        BatchWriteItemを使用して複数のアイテムを登録・削除する
+        ※UnprocessedItemsは待機してから再送します
+
+        Parameters
+        ----------
+        write_requests : list of dict
+            PutRequest、DeleteRequestのリスト(最大25件)
+
+        """
+        request_items = {self._table_name: write_requests}
+        attempt = 0
+        while request_items:
+            try:
+                response = self._db.batch_write_item(
+                    RequestItems=request_items)
+            except Exception as e:
+                raise e
+
+            request_items = response.get('UnprocessedItems')
+            if request_items:
+                attempt += 1
+                self._wait_for_retry(attempt)
+
+    def _wait_for_retry(self, attempt):
+        """
+        バッチ処理の未処理アイテムを再試行する前に待機する
+        ※待機秒数は試行回数に応じて指数的に増やし、ランダムな揺らぎを加えます
+
+        Parameters
+        ----------
+        attempt : int
+            再試行の回数
+
+        """
+        if attempt > BATCH_RETRY_MAX_ATTEMPTS:
+            raise Exception(
+                f'未処理のアイテムが残っています。テーブル名:{self._table_name}')
+
+        delay = min(BATCH_RETRY_MAX_DELAY,
+                    BATCH_RETRY_BASE_DELAY * (2 ** attempt))
+        time.sleep(random.uniform(0, delay))
+
     def _query(self, key, value):
         """
         queryメソッドを使用してアイテムを取得する
@@ -180,14 +555,128 @@ class DynamoDB:
             対象アイテムのリスト
 
         """
-        try:
-            response = self._table.query(
-                KeyConditionExpression=Key(key).eq(value)
-            )
-        except Exception as e:
-            raise e
+        return list(self._query_iter(key, value))
 
-        return response['Items']
+    def _query_iter(self, key, value, page_size=None, max_items=None):
+        """
+        queryメソッドを使用してアイテムを1件ずつ取得する
+        ※LastEvaluatedKeyを辿り、全ページを順次取得します
+
+        Parameters
+        ----------
+        key : dict
+            取得するアイテムのキー
+        value : object
+            検索する値
+        page_size : int, optional
+            1リクエストあたりの取得件数, by default None
+        max_items : int, optional
+            取得する最大件数, by default None
+
+        Yields
+        ------
+        item : dict
+            対象アイテム
+
+        """
+        query_kwargs = {'KeyConditionExpression': Key(key).eq(value)}
+
+        yield from self._paginate(self._table.query, query_kwargs,
+                                  page_size, max_items)
+
+    def _query_range(self, key, value, range_key, range_from, range_to,
+                     attributes=None):
+        """
+        queryメソッドを使用してソートキーの範囲を指定してアイテムを取得する
+
+        Parameters
+        ----------
+        key : str
+            パーティションキー名
+        value : object
+            パーティションキーの値
+        range_key : str
+            ソートキー名
+        range_from : object
+            ソートキーの開始値(この値を含む)
+        range_to : object
+            ソートキーの終了値(この値を含む)
+        attributes : list of str, optional
+            取得する属性名のリスト, by default None
+            指定しない場合は全ての属性
+
+        Returns
+        -------
+        items : list
+            対象アイテムのリスト
+
+        """
+        return list(self._query_range_iter(key, value, range_key,
+                                           range_from, range_to,
+                                           attributes=attributes))
+
+    def _query_range_iter(self, key, value, range_key, range_from, range_to,
+                          page_size=None, max_items=None, attributes=None):
+        """
+        queryメソッドを使用してソートキーの範囲を指定してアイテムを1件ずつ取得する
+        ※LastEvaluatedKeyを辿り、全ページを順次取得します
+
+        Parameters
+        ----------
+        key : str
+            パーティションキー名
+        value : object
+            パーティションキーの値
+        range_key : str
+            ソートキー名
+        range_from : object
+            ソートキーの開始値(この値を含む)
+        range_to : object
+            ソートキーの終了値(この値を含む)
+        page_size : int, optional
+            1リクエストあたりの取得件数, by default None
+        max_items : int, optional
+            取得する最大件数, by default None
+        attributes : list of str, optional
+            取得する属性名のリスト, by default None
+            指定しない場合は全ての属性
+
+        Yields
+        ------
+        item : dict
+            対象アイテム
+
+        """
+        if self._low_level:
+            query_kwargs = {
+                'TableName': self._table_name,
+                'KeyConditionExpression':
+                    '#key = :key AND #range_key BETWEEN :from AND :to',
+                'ExpressionAttributeNames': {
+                    '#key': key, '#range_key': range_key},
+                'ExpressionAttributeValues': self._serialize_key({
+                    ':key': value, ':from': range_from, ':to': range_to}),
+            }
+            projection_kwargs = self._create_projection_kwargs(attributes)
+            if projection_kwargs:
+                query_kwargs['ProjectionExpression'] = \
+                    projection_kwargs['ProjectionExpression']
+                query_kwargs['ExpressionAttributeNames'].update(
+                    projection_kwargs['ExpressionAttributeNames'])
+
+            for item in self._paginate(get_low_level_client().query,
+                                       query_kwargs, page_size, max_items):
+                yield deserializer.deserialize_item(item, attributes)
+            return
+
+        query_kwargs = {
+            'KeyConditionExpression': Key(key).eq(value) & Key(
+                range_key).between(range_from, range_to),
+            **self._create_projection_kwargs(attributes),
+        }
+
+        yield from self._paginate(self._table.query, query_kwargs,
+                                  page_size, max_items)
 
     def _query_index(self, index, expression, expression_value):
         """
@@ -208,17 +697,48 @@ class DynamoDB:
             検索結果
 
         """
-        try:
-            response = self._table.query(
-                IndexName=index,
-                KeyConditionExpression=expression,
-                ExpressionAttributeValues=self._replace_data_for_dynamodb(
-                    expression_value),
-            )
-        except Exception as e:
-            raise e
+        return list(self._query_index_iter(index, expression,
+                                           expression_value))
 
-        return response['Items']
+    def _query_index_iter(self, index, expression, expression_value,
+                          page_size=None, max_items=None,
+                          filter_expression=None):
+        """
+        indexからアイテムを1件ずつ取得する
+        ※LastEvaluatedKeyを辿り、全ページを順次取得します
+
+        Parameters
+        ----------
+        index : str
+            index名
+        expression : str
+            検索対象の式
+        expression_value : dict
+            expression内で使用する変数名と値
+        page_size : int, optional
+            1リクエストあたりの取得件数, by default None
+        max_items : int, optional
+            取得する最大件数, by default None
+        filter_expression : boto3.dynamodb.conditions.Attr, optional
+            取得後に絞り込む条件, by default None
+
+        Yields
+        ------
+        item : dict
+            検索結果のアイテム
+
+        """
+        query_kwargs = {
+            'IndexName': index,
+            'KeyConditionExpression': expression,
+            'ExpressionAttributeValues': self._replace_data_for_dynamodb(
+                expression_value),
+        }
+        if filter_expression is not None:
+            query_kwargs['FilterExpression'] = filter_expression
+
+        yield from self._paginate(self._table.query, query_kwargs,
+                                  page_size, max_items)
 
     def _scan(self, key, value=None):
         """
@@ -237,17 +757,185 @@ class DynamoDB:
             対象アイテムのリスト
 
 
+        """
+        return list(self._scan_iter(key, value))
+
+    def _scan_iter(self, key, value=None, page_size=None, max_items=None):
+        """
+        scanメソッドを使用してデータを1件ずつ取得する
+        ※LastEvaluatedKeyを辿り、全ページを順次取得します
+
+        Parameters
+        ----------
+        key : str
+            キー名
+        value : object, optional
+            検索する値, by default None
+        page_size : int, optional
+            1リクエストあたりの取得件数, by default None
+        max_items : int, optional
+            取得する最大件数, by default None
+
+        Yields
+        ------
+        item : dict
+            対象アイテム
+
+        """
+        scan_kwargs = self._create_scan_kwargs(key, value)
+
+        yield from self._paginate(self._table.scan, scan_kwargs,
+                                  page_size, max_items)
+
+    def _parallel_scan_iter(self, key, value=None, total_segments=None,
+                            max_workers=None, page_size=None):
+        """
+        テーブルをセグメントに分割し、並列にscanしたデータを1件ずつ取得する
+        ※各セグメントの取得結果は取得できた順に返却するため、順序は保証されません
+
+        Parameters
+        ----------
+        key : str
+            キー名
+        value : object, optional
+            検索する値, by default None
+        total_segments : int, optional
+            テーブルの分割数, by default None
+            未指定の場合、環境変数SCAN_TOTAL_SEGMENTSの値(既定値:4)
+        max_workers : int, optional
+            同時に実行するスレッド数, by default None
+            未指定の場合、total_segmentsと同数
+        page_size : int, optional
+            1リクエストあたりの取得件数, by default None
+
+        Yields
+        ------
+        item : dict
+            対象アイテム
+
+        """
+        total_segments = total_segments or PARALLEL_SCAN_TOTAL_SEGMENTS
+        max_workers = max_workers or total_segments
+        # 取得済みページを溜め込み過ぎないよう、キューの長さに上限を設ける
+        page_queue = queue.Queue(maxsize=max_workers * 2)
+        stop_event = threading.Event()
+
+        def put_page(page):
+            # 呼び出し元が途中で取得を止めた場合は待機を打ち切る
+            while not stop_event.is_set():
+                try:
+                    page_queue.put(page, timeout=PARALLEL_SCAN_QUEUE_TIMEOUT)
+                    return
+                except queue.Full:
+                    continue
+
+        def scan_segment(segment):
+            try:
+                # boto3のresourceはスレッドセーフではないため、スレッド毎のものを使用する
+                table = get_resource().Table(self._table_name)
+                scan_kwargs = self._create_scan_kwargs(key, value)
+                scan_kwargs['Segment'] = segment
+                scan_kwargs['TotalSegments'] = total_segments
+                if page_size:
+                    scan_kwargs['Limit'] = page_size
+                while not stop_event.is_set():
+                    response = table.scan(**scan_kwargs)
+                    put_page(response['Items'])
+                    last_evaluated_key = response.get('LastEvaluatedKey')
+                    if not last_evaluated_key:
+                        break
+                    scan_kwargs['ExclusiveStartKey'] = last_evaluated_key
+            except Exception as e:
+                put_page(e)
+            finally:
+                put_page(None)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for segment in range(total_segments):
+                executor.submit(scan_segment, segment)
+
+            try:
+                finished_segments = 0
+                while finished_segments < total_segments:
+                    page = page_queue.get()
+                    if page is None:
+                        finished_segments += 1
+                    elif isinstance(page, Exception):
+                        raise page
+                    else:
+                        yield from page
+            finally:
+                stop_event.set()
+
+    def _create_scan_kwargs(self, key, value=None):
+        """
+        scanメソッドに渡すパラメータを作成する
+
+        Parameters
+        ----------
+        key : str
+            キー名
+        value : object, optional
+            検索する値, by default None
+
+        Returns
+        -------
+        scan_kwargs : dict
+            scanメソッドに渡すパラメータ
+
         """
         scan_kwargs = {}
         if value:
             scan_kwargs['FilterExpression'] = Key(key).eq(value)
 
-        try:
-            response = self._table.scan(**scan_kwargs)
-        except Exception as e:
-            raise e
+        return scan_kwargs
+
+    def _paginate(self, operation, request_kwargs, page_size=None,
+                  max_items=None):
+        """
+        LastEvaluatedKeyが無くなるまでリクエストを繰り返し、アイテムを1件ずつ返却する
+        ※次のページは前のページのアイテムを全て返却した後に取得します
 
-        return response['Items']
+        Parameters
+        ----------
+        operation : function
+            query、scan等のテーブル操作メソッド
+        request_kwargs : dict
+            operationに渡すパラメータ
+        page_size : int, optional
+            1リクエストあたりの取得件数(Limit), by default None
+        max_items : int, optional
+            取得する最大件数, by default None
+
+        Yields
+        ------
+        item : dict
+            取得したアイテム
+
+        """
+        request_kwargs = dict(request_kwargs)
+        item_count = 0
+        while True:
+            if page_size:
+                # 最大件数に達する分以上は読み込まない
+                request_kwargs['Limit'] = (
+                    min(page_size, max_items - item_count)
+                    if max_items else page_size)
+            try:
+                response = operation(**request_kwargs)
+            except Exception as e:
+                raise e
+
+            for item in response['Items']:
+                yield item
+                item_count += 1
+                if max_items and item_count >= max_items:
+                    return
+
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                return
+            request_kwargs['ExclusiveStartKey'] = last_evaluated_key
 
     def _get_table_size(self):
         """
@@ -259,12 +947,232 @@ class DynamoDB:
             テーブルのアイテム数
 
         """
+        scan_kwargs = {'Select': 'COUNT'}
+        count = 0
+        while True:
+            try:
+                response = self._table.scan(**scan_kwargs)
+            except Exception as e:
+                raise e
+
+            count += response.get('Count', 0)
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                return count
+            scan_kwargs['ExclusiveStartKey'] = last_evaluated_key
+
+    def _create_projection_kwargs(self, attributes=None):
+        """
+        取得する属性を指定するパラメータを作成する
+        ※予約語に対応するため、属性名はプレースホルダーで指定します
+
+        Parameters
+        ----------
+        attributes : list of str, optional
+            取得する属性名のリスト, by default None
+
+        Returns
+        -------
+        projection_kwargs : dict
+            ProjectionExpression、ExpressionAttributeNames
+            属性名を指定しない場合は空のdict
+
+        """
+        if not attributes:
+            return {}
+
+        expression_attribute_names = {
+            f'#attribute{index}': attribute
+            for index, attribute in enumerate(attributes)}
+        return {
+            'ProjectionExpression': ', '.join(expression_attribute_names),
+            'ExpressionAttributeNames': expression_attribute_names,
+        }
+
+    def _serialize_key(self, key):
+        """
+        キー等の値を低レベルクライアントで指定する形式に変換する
+
+        Parameters
+        ----------
+        key : dict
+            属性名(またはプレースホルダー)をキーとした値
+
+        Returns
+        -------
+        serialized_key : dict
+            値を{型: 値}の形式に変換したdict
+
+        """
+        return {name: self._serializer.serialize(value)
+                for name, value in key.items()}
+
+    def _replace_data_for_dynamodb(self, value: dict):
+        return value
+
+
+class BatchWriter:
+    """BatchWriteItem用の書き込みバッファクラス"""
+    __slots__ = ['_dynamodb', '_write_requests']
+
+    def __init__(self, dynamodb):
+        """
+        初期化メソッド
+
+        Parameters
+        ----------
+        dynamodb : DynamoDB
+            書き込み先テーブルの操作クラス
+
+        """
+        self._dynamodb = dynamodb
+        self._write_requests = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # 例外発生時は書き込み途中のアイテムを送信しない
+        if exc_type is None:
+            self.flush()
+
+    def put_item(self, item):
+        """
+        登録するアイテムをバッファに追加する
+        ※25件溜まった時点でまとめて書き込みます
+
+        Parameters
+        ----------
+        item : dict
+            登録するアイテム
+
+        """
+        self._write_requests.append({'PutRequest': {
+            'Item': self._dynamodb._replace_data_for_dynamodb(item)}})
+        if len(self._write_requests) >= BATCH_WRITE_ITEM_MAX_ITEMS:
+            self.flush()
+
+    def delete_item(self, key):
+        """
+        削除するアイテムのキーをバッファに追加する
+        ※25件溜まった時点でまとめて書き込みます
+
+        Parameters
+        ----------
+        key : dict
+            削除するアイテムのキー
+
+        """
+        self._write_requests.append({'DeleteRequest': {'Key': key}})
+        if len(self._write_requests) >= BATCH_WRITE_ITEM_MAX_ITEMS:
+            self.flush()
+
+    def flush(self):
+        """バッファに溜まったアイテムを書き込む"""
+        while self._write_requests:
+            write_requests = \
+                self._write_requests[:BATCH_WRITE_ITEM_MAX_ITEMS]
+            self._dynamodb._batch_write_items(write_requests)
+            self._write_requests = \
+                self._write_requests[BATCH_WRITE_ITEM_MAX_ITEMS:]
+
+
+class TransactWriter:
+    """TransactWriteItems用のトランザクションクラス"""
+    __slots__ = ['_transact_items']
+
+    # 取消理由のアイテムの型変換用
+    _type_deserializer = TypeDeserializer()
+
+    def __init__(self):
+        """初期化メソッド"""
+        self._transact_items = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # 例外発生時はコミットせず、全ての書き込みを破棄する
+        if exc_type is None:
+            self.commit()
+
+    def add_item(self, transact_item):
+        """
+        トランザクションに書き込み処理を追加する
+        テーブル操作クラスの_transact_put_item等から使用。
+
+        Parameters
+        ----------
+        transact_item : dict
+            Put、Update等の書き込み処理
+            resourceに紐づくクライアントを使用するため、値はPythonの型のまま指定する
+
+        Returns
+        -------
+        transact_index : int
+            トランザクション内の書き込みの番号
+            コミット失敗時にget_cancellation_reasonで失敗理由を取得する際に使用する
+
+        """
+        self._transact_items.append(transact_item)
+        return len(self._transact_items) - 1
+
+    def commit(self):
+        """
+        追加された書き込み処理を1つのトランザクションとして実行する
+        ※いずれかの書き込みが失敗した場合、全ての書き込みが取り消されます
+
+        Returns
+        -------
+        response : dict
+            レスポンス情報
+
+        """
+        if not self._transact_items:
+            return None
+
         try:
-            response = self._table.scan(Select='COUNT')
+            response = get_client().transact_write_items(
+                TransactItems=self._transact_items)
         except Exception as e:
             raise e
 
-        return response.get('Count', 0)
+        self._transact_items = []
+        return response
 
-    def _replace_data_for_dynamodb(self, value: dict):
-        return value
+    @staticmethod
+    def get_cancellation_reason(error, transact_index):
+        """
+        トランザクションが取り消された際の、指定した書き込みの失敗理由を取得する
+
+        Parameters
+        ----------
+        error : Exception
+            commit時に発生した例外
+        transact_index : int
+            add_itemで取得したトランザクション内の書き込みの番号
+
+        Returns
+        -------
+        reason : dict
+            Code(ConditionalCheckFailed等)、Message等の失敗理由
+            ReturnValuesOnConditionCheckFailureを指定した場合、
+            Itemに更新前のアイテムを含む(Pythonの型に変換済み)
+            トランザクションの取り消し以外の例外、または失敗理由が無い場合はNone
+
+        """
+        if not isinstance(error, ClientError):
+            return None
+        reasons = error.response.get('CancellationReasons', [])
+        if transact_index >= len(reasons) or \
+                reasons[transact_index].get('Code', 'None') == 'None':
+            return None
+
+        reason = dict(reasons[transact_index])
+        # 取消理由のアイテムはresourceによる型変換の対象外のため、ここで変換する
+        if 'Item' in reason:
+            reason['Item'] = {
+                attribute_name:
+                    TransactWriter._type_deserializer.deserialize(value)
+                for attribute_name, value in reason['Item'].items()}
+        return reason
@@ -0,0 +1,87 @@
+"""
+DynamoDBの低レベルクライアント用デシリアライザーモジュール
+boto3のTypeDeserializerと異なり、数値をDecimal型ではなくint、floatに変換します
+
+"""
+
+# 型毎の変換処理(S、N以外)
+_DESERIALIZERS = {
+    'BOOL': lambda data: data,
+    'NULL': lambda data: None,
+    'B': lambda data: data,
+    'M': lambda data: {name: deserialize(value)
+                       for name, value in data.items()},
+    'L': lambda data: [deserialize(value) for value in data],
+    'SS': set,
+    'NS': lambda data: {_deserialize_number(value) for value in data},
+    'BS': set,
+}
+
+
+def deserialize_item(item, attributes=None):
+    """
+    低レベルクライアントで取得したアイテムをPythonの型に変換する
+
+    Parameters
+    ----------
+    item : dict
+        属性名をキー、{型: 値}の形式の値を値としたアイテム
+    attributes : list of str, optional
+        変換する属性名のリスト, by default None
+        指定した場合、それ以外の属性は変換せずに除外する
+
+    Returns
+    -------
+    item : dict
+        変換後のアイテム
+
+    """
+    if attributes is None:
+        return {name: deserialize(value) for name, value in item.items()}
+    return {name: deserialize(item[name])
+            for name in attributes if name in item}
+
+
+def deserialize(value):
+    """
+    {型: 値}の形式の値をPythonの型に変換する
+
+    Parameters
+    ----------
+    value : dict
+        低レベルクライアントの値(例:{'N': '1'})
+
+    Returns
+    -------
+    value : object
+        変換後の値
+        数値は整数の場合int、小数の場合float
+
+    """
+    (type_code, data), = value.items()
+    if type_code == 'S':
+        return data
+    if type_code == 'N':
+        return _deserialize_number(data)
+    return _DESERIALIZERS[type_code](data)
+
+
+def _deserialize_number(data):
+    """
+    数値の文字列をint、floatに変換する
+
+    Parameters
+    ----------
+    data : str
+        数値の文字列
+
+    Returns
+    -------
+    number : int or float
+        整数の場合int、小数の場合float
+
+    """
+    try:
+        return int(data)
+    except ValueError:
+        return float(data)
@@ -2,11 +2,30 @@
 ChannelAccessTokenテーブル操作用モジュール
 
 """
+import logging
 import os
 from datetime import datetime
 from dateutil.tz import gettz
 
 from aws.dynamodb.base import DynamoDB
+from common.ttl_cache import TTLCache
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# 短期チャネルアクセストークンのキャッシュ設定
+# 期限日(limitDate)までは同じトークンを使用するため、Lambdaのコンテナが再利用される間は保持する
+# 期限日までの秒数が長い場合も、この秒数でテーブルから再取得する
+CHANNEL_ACCESS_TOKEN_CACHE_TTL = int(
+    os.environ.get('CHANNEL_ACCESS_TOKEN_CACHE_TTL', 3600))
+CHANNEL_ACCESS_TOKEN_CACHE_MAX_SIZE = int(
+    os.environ.get('CHANNEL_ACCESS_TOKEN_CACHE_MAX_SIZE', 64))
+# 期限日の何秒前にキャッシュを破棄するか
+CHANNEL_ACCESS_TOKEN_EXPIRY_MARGIN = 60
+LIMIT_DATE_FORMAT = '%Y-%m-%d %H:%M:%S%z'
+
+channel_access_token_cache = TTLCache(CHANNEL_ACCESS_TOKEN_CACHE_MAX_SIZE,
+                                      CHANNEL_ACCESS_TOKEN_CACHE_TTL)
 
 
 class ChannelAccessToken(DynamoDB):
@@ -42,6 +61,30 @@ class ChannelAccessToken(DynamoDB):
             raise e
         return item
 
+    def get_items(self, channel_ids):
+        """
+        複数のchannelIdからアイテムを一括取得する
+
+        Parameters
+        ----------
+        channel_ids : list of str
+            チャネルIDのリスト
+
+        Returns
+        -------
+        items : list
+            チャネルの情報のリスト
+            存在しないチャネルIDの情報は含まれません
+
+        """
+        keys = [{'channelId': channel_id} for channel_id in channel_ids]
+
+        try:
+            items = self._batch_get_items(keys)
+        except Exception as e:
+            raise e
+        return items
+
     def update_item(self, channel_id, channel_access_token, limit_date):
         """
         短期チャネルアクセストークンと期限日を更新する
@@ -77,6 +120,7 @@ class ChannelAccessToken(DynamoDB):
                                          expression_value, return_value)
         except Exception as e:
             raise e
+        channel_access_token_cache.invalidate(channel_id)
         return response
 
     def scan(self, channel_id=''):
@@ -102,3 +146,133 @@ class ChannelAccessToken(DynamoDB):
         except Exception as e:
             raise e
         return items
+
+    def parallel_scan_iter(self, channel_id='', total_segments=None):
+        """
+        並列scanを使用してデータを1件ずつ取得する
+
+        Parameters
+        ----------
+        channel_id : str
+            LINE公式アカウント（Messageing API or MINIアプリ）のチャネルID
+        total_segments : int, optional
+            テーブルの分割数(並列度), by default None
+
+        Yields
+        ------
+        item : dict
+            取得したアイテム
+
+        """
+        key = 'channelId'
+
+        yield from self._parallel_scan_iter(key, channel_id,
+                                            total_segments=total_segments)
+
+
+class ChannelAccessTokenProvider:
+    """
+    短期チャネルアクセストークンの取得用クラス
+    チャネル毎にテーブルを1度だけ読み込み、期限日までキャッシュから返却する
+    """
+    __slots__ = ['_table_controller']
+
+    def __init__(self, table_controller=None):
+        """
+        初期化メソッド
+
+        Parameters
+        ----------
+        table_controller : ChannelAccessToken, optional
+            ChannelAccessTokenテーブルの操作クラス, by default None
+            指定しない場合は新規に作成する
+
+        """
+        self._table_controller = table_controller or ChannelAccessToken()
+
+    def get_token(self, channel_id):
+        """
+        チャネルの短期チャネルアクセストークンを取得する
+
+        Parameters
+        ----------
+        channel_id : str
+            チャネルID
+
+        Returns
+        -------
+        channel_access_token : str or None
+            短期チャネルアクセストークン
+            テーブルに存在しない、またはトークン未取得のチャネルはNone
+
+        """
+        if channel_access_token := channel_access_token_cache.get(
+                channel_id):
+            return channel_access_token
+
+        item = self._table_controller.get_item(channel_id)
+        if item.get('channelAccessToken') is None:
+            logger.warning('チャネルアクセストークンが存在しません channelId:%s',
+                           channel_id)
+            return None
+        self._set_cache(item)
+        return item['channelAccessToken']
+
+    def get_tokens(self, channel_ids):
+        """
+        複数チャネルの短期チャネルアクセストークンを取得する
+        ※キャッシュに無いチャネルのみ、テーブルから一括取得します
+
+        Parameters
+        ----------
+        channel_ids : list of str
+            チャネルIDのリスト
+
+        Returns
+        -------
+        channel_access_tokens : dict
+            チャネルIDをキー、短期チャネルアクセストークンを値としたdict
+            テーブルに存在しない、またはトークン未取得のチャネルは含まれません
+
+        """
+        channel_access_tokens = {}
+        missing_channel_ids = []
+        for channel_id in set(channel_ids):
+            if channel_access_token := channel_access_token_cache.get(
+                    channel_id):
+                channel_access_tokens[channel_id] = channel_access_token
+            else:
+                missing_channel_ids.append(channel_id)
+
+        if missing_channel_ids:
+            for item in self._table_controller.get_items(
+                    missing_channel_ids):
+                if not item.get('channelAccessToken'):
+                    continue
+                self._set_cache(item)
+                channel_access_tokens[item['channelId']] = \
+                    item['channelAccessToken']
+
+        return channel_access_tokens
+
+    def _set_cache(self, item):
+        """
+        トークンを期限日までキャッシュする(最大でCHANNEL_ACCESS_TOKEN_CACHE_TTL秒)
+        ※期限日を過ぎたトークンはキャッシュしません
+
+        Parameters
+        ----------
+        item : dict
+            チャネルの情報
+
+        """
+        if not item.get('limitDate') or not item.get('channelAccessToken'):
+            return
+
+        limit_date = datetime.strptime(item['limitDate'], LIMIT_DATE_FORMAT)
+        ttl = (limit_date - datetime.now(gettz('Asia/Tokyo'))
+               ).total_seconds() - CHANNEL_ACCESS_TOKEN_EXPIRY_MARGIN
+        if ttl > 0:
+            channel_access_token_cache.set(
+                item['channelId'], item['channelAccessToken'],
+                min(ttl, CHANNEL_ACCESS_TOKEN_CACHE_TTL))
@@ -6,16 +6,12 @@ import os
 from common import const
 from datetime import timedelta
 
-from linebot.models import (
-    TemplateSendMessage, CarouselTemplate, CarouselColumn, MessageAction,
-    QuickReplyButton, CameraAction, CameraRollAction, LocationAction
-)
-
 const.API_PROFILE_URL = 'https://api.line.me/v2/profile'
 const.API_NOTIFICATIONTOKEN_URL = 'https://api.line.me/message/v3/notifier/token'  # noqa: E501
 const.API_ACCESSTOKEN_URL = 'https://api.line.me/v2/oauth/accessToken'
 const.API_SENDSERVICEMESSAGE_URL = 'https://api.line.me/message/v3/notifier/send?target=service'  # noqa 501
 const.API_USER_ID_URL = 'https://api.line.me/oauth2/v2.1/verify'
+const.API_JWKS_URL = 'https://api.line.me/oauth2/v2.1/certs'
 
 const.MSG_ERROR_NOPARAM = 'パラメータ未設定エラー'
 const.DATA_LIMIT_TIME = 60 * 60 * 12
@@ -193,53 +189,6 @@ const.FLEX = {
     }
 }
 
-const.CAROUSEL = TemplateSendMessage(
-    alt_text='Carousel template',
-    template=CarouselTemplate(
-        columns=[
-            CarouselColumn(
-                thumbnail_image_url='https://media.istockphoto.com/photos/neon-sale-glowing-text-sign-sale-banner-design-3d-render-glow-sale-picture-id854550186',  # noqa:E501
-                title='最大80%OFF',
-                text='期間限定SALE',
-                actions=[
-                    MessageAction(
-                        label='Go to SALE',
-                        text='Choose SALE'
-                    )
-                ]
-            ),
-            CarouselColumn(
-                thumbnail_image_url='https://media.istockphoto.com/photos/womens-clothes-set-isolatedfemale-clothing-collage-picture-id1067767654',  # noqa:E501
-                title='今月のおススメ商品',
-                text='これがあれば困らない！',
-                actions=[
-                    MessageAction(
-                        label='Recommended',
-                        text='Choose Recommended'
-                    )
-                ]
-            ),
-            CarouselColumn(
-                thumbnail_image_url='https://media.istockphoto.com/photos/clothes-hanging-on-rail-in-white-wardrobe-picture-id518597694',  # noqa:E501
-                title='スッキリ収納特集',
-                text='大切なお洋服をスッキリ簡単に収納します',
-                actions=[
-                    MessageAction(
-                        label='To receive clothes',
-                        text='Choose receive clothes'
-                    )
-                ]
-            )
-        ]
-    )
-)
-
-const.QUICK_REPLY_ITEMS = [
-    QuickReplyButton(action=LocationAction(label='位置情報')),
-    QuickReplyButton(action=CameraAction(label='カメラ起動')),
-    QuickReplyButton(action=CameraRollAction(label='カメラロール起動')),
-]
-
 const.MENU_LIST = {'message': os.getenv('RICH_MENU_MESSAGE', None),
                    'carousel': os.getenv('RICH_MENU_CAROUSEL', None),
                    'flex': os.getenv('RICH_MENU_FLEX', None)
@@ -0,0 +1,87 @@
+"""
+フレックスメッセージのテンプレート用モジュール
+メッセージのレイアウトを初回作成時に1度だけJSON文字列へ変換しておき、
+送信時は可変項目の値のみを埋め込んで、シリアライズ済みのJSON文字列を作成します
+"""
+import json
+import re
+
+# 可変項目の値の前後に付与する目印(JSON文字列内では\u0000にエスケープされる)
+PLACEHOLDER_MARKER = '\x00'
+# シリアライズ後のJSON文字列から可変項目を探す正規表現
+PLACEHOLDER_PATTERN = re.compile(r'"\\u0000(\w+)\\u0000"')
+
+
+def placeholder(name):
+    """
+    テンプレートのレイアウトに埋め込む可変項目を作成する
+    ※可変項目は、テキスト等の値全体を置き換える位置にのみ指定できます
+
+    Parameters
+    ----------
+    name : str
+        可変項目名(英数字とアンダースコア)
+
+    Returns
+    -------
+    placeholder : str
+        レイアウトの値として指定する可変項目の目印
+
+    """
+    return PLACEHOLDER_MARKER + name + PLACEHOLDER_MARKER
+
+
+class FlexTemplate:
+    """可変項目の値のみを埋め込むフレックスメッセージのテンプレートクラス"""
+    __slots__ = ['_fragments', '_fields']
+
+    def __init__(self, layout):
+        """
+        初期化メソッド
+        レイアウトをJSON文字列に変換し、可変項目の位置で分割して保持する
+
+        Parameters
+        ----------
+        layout : dict
+            placeholderで可変項目を指定したメッセージのレイアウト
+
+        """
+        serialized = json.dumps(layout, ensure_ascii=False,
+                                separators=(',', ':'))
+        # 分割結果は[固定部分, 項目名, 固定部分, 項目名, ..., 固定部分]の順
+        parts = PLACEHOLDER_PATTERN.split(serialized)
+        self._fragments = parts[0::2]
+        self._fields = parts[1::2]
+
+    @property
+    def fields(self):
+        """テンプレートの可変項目名のリスト(出現順)"""
+        return list(self._fields)
+
+    def render(self, values):
+        """
+        可変項目に値を埋め込み、JSON文字列を作成する
+
+        Parameters
+        ----------
+        values : dict
+            可変項目名をキーとした埋め込む値
+            値はJSONに変換できる型(str、int等)
+
+        Returns
+        -------
+        message : str
+            シリアライズ済みのメッセージのJSON文字列
+
+        Raises
+        ------
+        KeyError
+            可変項目の値が指定されていない場合
+
+        """
+        fragments = self._fragments
+        parts = [fragments[0]]
+        for index, field in enumerate(self._fields, 1):
+            parts.append(json.dumps(values[field], ensure_ascii=False))
+            parts.append(fragments[index])
+        return ''.join(parts)
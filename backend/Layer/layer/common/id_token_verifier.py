@@ -0,0 +1,207 @@
+"""
+IDトークン検証用モジュール
+LINEの公開鍵(JWKS)をコンテナ内でキャッシュし、IDトークンの署名とクレームをローカルで検証します
+ローカルで検証できない場合は、LINEのverifyエンドポイントで検証します
+※jwt(PyJWT)、requests(line_transport)は検証時にimportします
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from common import line
+from common.ttl_cache import TTLCache
+
+logger = logging.getLogger()
+
+# IDトークンの発行元
+LINE_ISSUER = 'https://access.line.me'
+# ローカルで検証するIDトークンの署名アルゴリズム
+# ※HS256(チャネルシークレットで署名)のトークンはverifyエンドポイントで検証する
+LOCAL_VERIFY_ALGORITHMS = ['ES256']
+# 有効期限等の検証時に許容する時刻のずれ(秒)
+CLOCK_SKEW_LEEWAY = 5
+# IDトークンとユーザー情報のキャッシュ
+# ※IDトークンの有効期限を超えて保持しない
+ID_TOKEN_CACHE_TTL = int(os.getenv('ID_TOKEN_CACHE_TTL', 300))
+ID_TOKEN_CACHE_MAX_SIZE = int(os.getenv('ID_TOKEN_CACHE_MAX_SIZE', 1024))
+# 公開鍵の有効期間(秒)
+JWKS_CACHE_TTL = 60 * 60 * 24
+# 未知の鍵ID(kid)による公開鍵の再取得の最小間隔(秒)
+JWKS_REFRESH_INTERVAL = 60
+# 公開鍵の取得とverifyエンドポイントでの検証を合わせた期限(秒)
+# ※予約登録のLambdaのタイムアウト(3秒)より短くする
+ID_TOKEN_VERIFY_DEADLINE = float(os.getenv('ID_TOKEN_VERIFY_DEADLINE', 2))
+# verifyエンドポイントでの検証に最低限割り当てる秒数
+MIN_VERIFY_TIMEOUT = 0.5
+# IDトークンの有効期限切れ時のレスポンス(verifyエンドポイントと同じ形式)
+EXPIRED_RESPONSE = {'error': 'invalid_request',
+                    'error_description': 'IdToken expired.'}
+
+
+class IdTokenVerifier:
+    """IDトークン検証用クラス"""
+    __slots__ = ['_channel_id', '_token_cache', '_signing_keys',
+                 '_signing_keys_expires_at', '_signing_keys_fetched_at',
+                 '_lock']
+
+    def __init__(self, channel_id):
+        """
+        初期化メソッド
+
+        Parameters
+        ----------
+        channel_id : str
+            IDトークンを発行したLIFFアプリのチャネルID
+
+        """
+        self._channel_id = channel_id
+        self._token_cache = TTLCache(ID_TOKEN_CACHE_MAX_SIZE,
+                                     ID_TOKEN_CACHE_TTL)
+        self._signing_keys = {}
+        self._signing_keys_expires_at = 0
+        self._signing_keys_fetched_at = None
+        self._lock = threading.Lock()
+
+    def get_profile(self, id_token):
+        """
+        IDトークンを検証し、ユーザー情報を取得する
+        ※line.get_profileと同じ形式で返却します
+
+        Parameters
+        ----------
+        id_token : str
+            IDトークン
+
+        Returns
+        -------
+        profile : dict
+            IDトークンのクレーム(subがユーザーID)
+            有効期限切れの場合、error、error_descriptionを含むdict
+
+        """
+        profile = self._token_cache.get(id_token)
+        if profile is not None:
+            return profile
+
+        started_at = time.monotonic()
+        try:
+            profile = self._verify_locally(id_token)
+        except Exception as e:
+            logger.warning('IDトークンをローカルで検証できないため、'
+                           'verifyエンドポイントで検証します: %s', e)
+            profile = None
+
+        if profile is None:
+            # 公開鍵の取得に掛かった時間を差し引き、期限内に収まるように検証する
+            remaining = max(
+                ID_TOKEN_VERIFY_DEADLINE - (time.monotonic() - started_at),
+                MIN_VERIFY_TIMEOUT)
+            profile = line.get_profile(id_token, self._channel_id,
+                                       timeout=(remaining / 2, remaining / 2))
+
+        if 'sub' in profile and 'exp' in profile:
+            ttl = min(ID_TOKEN_CACHE_TTL, int(profile['exp']) - time.time())
+            if ttl > 0:
+                self._token_cache.set(id_token, profile, ttl)
+        return profile
+
+    def _verify_locally(self, id_token):
+        """
+        IDトークンの署名とクレームを公開鍵で検証する
+
+        Parameters
+        ----------
+        id_token : str
+            IDトークン
+
+        Returns
+        -------
+        profile : dict
+            IDトークンのクレーム
+            有効期限切れの場合EXPIRED_RESPONSE
+            ローカルで検証できない署名アルゴリズムの場合None
+
+        Raises
+        ------
+        jwt.InvalidTokenError
+            IDトークンが不正な場合
+        KeyError
+            鍵IDに対応する公開鍵が無い場合
+
+        """
+        import jwt
+
+        header = jwt.get_unverified_header(id_token)
+        if header.get('alg') not in LOCAL_VERIFY_ALGORITHMS:
+            return None
+
+        signing_key = self._get_signing_key(header.get('kid'))
+        try:
+            return jwt.decode(
+                id_token, signing_key, algorithms=LOCAL_VERIFY_ALGORITHMS,
+                audience=self._channel_id, issuer=LINE_ISSUER,
+                leeway=CLOCK_SKEW_LEEWAY,
+                options={'require': ['exp', 'iat', 'sub']})
+        except jwt.ExpiredSignatureError:
+            return dict(EXPIRED_RESPONSE)
+
+    def _get_signing_key(self, key_id):
+        """
+        鍵IDに対応する公開鍵を取得する
+        ※キャッシュに無い場合は、最小間隔を空けてJWKSを再取得します
+
+        Parameters
+        ----------
+        key_id : str
+            IDトークンのヘッダーの鍵ID(kid)
+
+        Returns
+        -------
+        signing_key : object
+            署名検証用の公開鍵
+
+        Raises
+        ------
+        KeyError
+            鍵IDに対応する公開鍵が無い場合
+
+        """
+        with self._lock:
+            now = time.monotonic()
+            needs_refresh = now >= self._signing_keys_expires_at or \
+                key_id not in self._signing_keys
+            # 取得に失敗した場合も、最小間隔を空けるまでは再取得しない
+            if needs_refresh and (
+                    self._signing_keys_fetched_at is None or
+                    now - self._signing_keys_fetched_at >=
+                    JWKS_REFRESH_INTERVAL):
+                self._signing_keys_fetched_at = now
+                self._signing_keys = self._fetch_signing_keys()
+                self._signing_keys_expires_at = now + JWKS_CACHE_TTL
+            return self._signing_keys[key_id]
+
+    def _fetch_signing_keys(self):
+        """
+        LINEの公開鍵(JWKS)を取得する
+
+        Returns
+        -------
+        signing_keys : dict
+            鍵IDをキー、署名検証用の公開鍵を値としたdict
+
+        """
+        import jwt
+        from common import line_transport
+
+        response = line_transport.get('jwks')
+        response.raise_for_status()
+        signing_keys = {}
+        for jwk in json.loads(response.text)['keys']:
+            try:
+                signing_keys[jwk['kid']] = jwt.PyJWK(jwk).key
+            except jwt.PyJWKError as e:
+                logger.warning('使用できない公開鍵のため除外します kid:%s %s',
+                               jwk.get('kid'), e)
+        return signing_keys
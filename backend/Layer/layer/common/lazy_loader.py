@@ -0,0 +1,68 @@
+"""
+遅延初期化用モジュール
+Lambdaのコールドスタート時間を短縮するため、使用されるまで初期化を遅らせる
+※ハンドラーでは他の共通モジュールより先にimportすること(読み込み時間の計測開始点となるため)
+"""
+import logging
+import time
+
+# ログ出力の設定
+logger = logging.getLogger()
+
+# 読み込み時間の計測開始時刻(このモジュールの初回import時)
+IMPORT_START_TIME = time.perf_counter()
+
+
+class LazyObject:
+    """
+    初回アクセス時にオブジェクトを生成するプロキシクラス
+    テーブル操作クラス等、生成にコストのかかるオブジェクトに使用する
+    """
+    __slots__ = ['_factory', '_instance']
+
+    def __init__(self, factory):
+        """
+        初期化メソッド
+
+        Parameters
+        ----------
+        factory : callable
+            オブジェクトを生成する関数やクラス
+
+        """
+        self._factory = factory
+        self._instance = None
+
+    def __getattr__(self, name):
+        """
+        初回アクセス時にオブジェクトを生成し、属性を返却する
+
+        Parameters
+        ----------
+        name : str
+            属性名
+
+        Returns
+        -------
+        attribute : object
+            生成したオブジェクトの属性
+
+        """
+        if self._instance is None:
+            self._instance = self._factory()
+        return getattr(self._instance, name)
+
+
+def log_import_time(module_name):
+    """
+    計測開始からの経過時間を、モジュールの読み込み時間としてログ出力する
+    ハンドラーのモジュール末尾で呼び出す。
+
+    Parameters
+    ----------
+    module_name : str
+        ハンドラーのモジュール名
+
+    """
+    import_time = (time.perf_counter() - IMPORT_START_TIME) * 1000
+    logger.info('import time: %s %.1fms', module_name, import_time)
@@ -1,43 +1,92 @@
 import logging
 import json
-import requests
-import json
-from linebot import LineBotApi
-from linebot.models import FlexSendMessage
-from linebot.exceptions import (
-    LineBotApiError, InvalidSignatureError)
-from requests.models import Response
 
-from common import common_const
+# NOTE: linebot、requests(line_transport)はLINEのAPIを呼び出す関数内でimportする
+# (LINEのAPIを使用しないLambdaのコールドスタート時間を短縮するため)
 
 # ログ出力の設定
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# 呼び出し回数の制限超過時のステータスコード
+TOO_MANY_REQUESTS = 429
+# リトライキーのリクエストが既に受け付け済みの場合のステータスコード
+CONFLICT = 409
+# プッシュメッセージ送信APIのパス(Messaging APIのURLからの相対パス)
+PUSH_MESSAGE_PATH = 'message/push'
+
+
+class LineRateLimitError(Exception):
+    """LINEのAPIの呼び出し回数の制限を超過した場合の例外クラス"""
+
+    def __init__(self, retry_after=None):
+        """
+        初期化メソッド
+
+        Parameters
+        ----------
+        retry_after : float, optional
+            レスポンスのRetry-Afterの秒数, by default None
 
-def send_push_message(channel_access_token, flex_obj, user_id):
+        """
+        super().__init__(f'LINE API rate limit exceeded: {retry_after}')
+        self.retry_after = retry_after
+
+
+def send_push_message(channel_access_token, flex_obj, user_id,
+                      retry_key=None, channel_id=None):
     """
     プッシュメッセージ送信処理
     Parameters
     channel_access_token:str
         短期チャネルアクセストークン
-    flex_obj:dict
+    flex_obj:dict or str
         メッセージ情報
+        シリアライズ済みのJSON文字列の場合、SDKのモデルに変換せずそのまま送信する
     user_id:str
         送信先のユーザーI
+    retry_key:str, optional
+        リトライキー(UUID形式)
+        同じリトライキーで受け付け済みのメッセージは、LINE側で二重に送信されない
+    channel_id:str, optional
+        チャネルID(LineBotApiのキャッシュのキー)
     Returns
     -------
     response:dict
         レスポンス情報
     """
+    from linebot.models import FlexSendMessage
+    from linebot.exceptions import (
+        LineBotApiError, InvalidSignatureError)
+    from common import line_transport
+
     try:
-        line_bot_api = LineBotApi(
-            channel_access_token)
-        # flexdictを生成する
-        flex_obj = FlexSendMessage.new_from_json_dict(flex_obj)
-        user_id = user_id
-        response = line_bot_api.push_message(user_id, flex_obj)
+        if isinstance(flex_obj, str):
+            # テンプレートで作成したJSON文字列をリクエストボディに埋め込み、
+            # SDKを介さずに共有セッションで送信する
+            data = '{"to":' + json.dumps(user_id) + \
+                ',"messages":[' + flex_obj + ']}'
+            response = post_serialized_message(
+                channel_access_token, PUSH_MESSAGE_PATH, data, retry_key)
+        else:
+            # コネクションを再利用するため、共有セッションのLineBotApiを使用する
+            line_bot_api = line_transport.get_line_bot_api(
+                channel_access_token, channel_id)
+            # flexdictを生成する
+            flex_obj = FlexSendMessage.new_from_json_dict(flex_obj)
+            user_id = user_id
+            response = line_bot_api.push_message(
+                user_id, flex_obj, retry_key=retry_key)
     except LineBotApiError as e:
+        # 制限超過の場合は再送できるよう、待機秒数を付与して通知する
+        if e.status_code == TOO_MANY_REQUESTS:
+            raise LineRateLimitError(get_retry_after(e.headers))
+        # 前回の実行で送信済みのメッセージは、送信成功として扱う
+        if retry_key and e.status_code == CONFLICT and \
+                e.accepted_request_id:
+            logger.info('リトライキーのメッセージは送信済みです。リトライキー：%s',
+                        retry_key)
+            return None
         logger.error(
             'Got exception from LINE Messaging API: %s\n' % e.message)
         for m in e.error.details:
@@ -49,8 +98,89 @@ def send_push_message(channel_access_token, flex_obj, user_id):
 
     return response
 
-    
-def get_profile(id_token, channel_id):
+
+def post_serialized_message(channel_access_token, path, data,
+                            retry_key=None):
+    """
+    シリアライズ済みのJSON文字列をMessaging APIに送信する
+    ※エラーの場合はSDKと同じくLineBotApiErrorを送出します
+
+    Parameters
+    ----------
+    channel_access_token : str
+        短期チャネルアクセストークン
+    path : str
+        Messaging APIのURLからの相対パス(例:message/push)
+    data : str
+        リクエストボディのJSON文字列
+    retry_key : str, optional
+        X-Line-Retry-Keyヘッダーに指定するリトライキー, by default None
+
+    Returns
+    -------
+    response : requests.Response
+        レスポンス
+
+    Raises
+    ------
+    linebot.exceptions.LineBotApiError
+        ステータスコードが2xx以外の場合
+
+    """
+    from linebot.exceptions import LineBotApiError
+    from linebot.models.error import Error
+    from common import line_transport
+
+    headers = {
+        'Authorization': 'Bearer ' + channel_access_token,
+        'Content-Type': 'application/json; charset=utf-8',
+    }
+    if retry_key:
+        headers['X-Line-Retry-Key'] = retry_key
+    response = line_transport.post(
+        'messaging', headers=headers, data=data.encode('utf-8'), path=path)
+    if 200 <= response.status_code < 300:
+        return response
+
+    try:
+        error = Error.new_from_json_dict(response.json())
+    except ValueError:
+        error = Error(message=response.text)
+    raise LineBotApiError(
+        status_code=response.status_code,
+        headers=dict(response.headers.items()),
+        request_id=response.headers.get('X-Line-Request-Id'),
+        accepted_request_id=response.headers.get(
+            'X-Line-Accepted-Request-Id'),
+        error=error)
+
+
+def get_retry_after(headers):
+    """
+    レスポンスヘッダーのRetry-Afterから待機秒数を取得する
+
+    Parameters
+    ----------
+    headers : dict
+        レスポンスヘッダー
+
+    Returns
+    -------
+    retry_after : float
+        待機秒数
+        Retry-Afterが無い、または秒数でない場合はNone
+    """
+    for header_name, value in (headers or {}).items():
+        if header_name.lower() != 'retry-after':
+            continue
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            return None
+    return None
+
+
+def get_profile(id_token, channel_id, timeout=None):
     """
     LINEユーザー情報取得処理
     Parameters
@@ -59,20 +189,22 @@ def get_profile(id_token, channel_id):
         IDトークン
     channel_id:dict
         使用アプリのLIFFチャネルID
+    timeout:tuple, optional
+        タイムアウト(接続, 読み込み)秒
+        指定しない場合はverifyエンドポイントの設定値
     Returns
     -------
     res_body:dict
         レスポンス情報
     """
+    from common import line_transport
+
     headers = {'Content-Type': 'application/x-www-form-urlencoded'}
     body = {
         'id_token': id_token,
         'client_id': channel_id
     }
-    response = requests.post(
-        common_const.const.API_USER_ID_URL,
-        headers=headers,
-        data=body
-    )
+    response = line_transport.post('verify', headers=headers, data=body,
+                                   timeout=timeout)
     res_body = json.loads(response.text)
     return res_body
\ No newline at end of file
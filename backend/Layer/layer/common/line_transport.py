@@ -0,0 +1,284 @@
+"""
+LINEのAPI呼び出し用HTTP通信モジュール
+Lambdaのコンテナ内で1つのセッションを共有し、コネクション(TLS接続)を再利用します
+※linebot、requestsを読み込むため、LINEのAPIを呼び出す関数内でimportしてください
+"""
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from linebot import LineBotApi
+from linebot.http_client import RequestsHttpClient, RequestsHttpResponse
+
+from common import common_const
+from common.ttl_cache import TTLCache
+
+# 1ホストあたりに保持するコネクション数(同時送信数以上を指定する)
+LINE_HTTP_POOL_MAXSIZE = int(os.getenv('LINE_HTTP_POOL_MAXSIZE', 10))
+# リトライ間隔の係数(秒)
+LINE_HTTP_BACKOFF_FACTOR = 0.2
+# リトライするステータスコード
+RETRY_STATUS_CODES = [500, 502, 503, 504]
+# Messaging APIのURL
+API_MESSAGING_URL = 'https://api.line.me/v2/bot/'
+
+# エンドポイント毎のタイムアウト(接続, 読み込み)秒とリトライ設定
+# ※retry_on_statusがFalseのエンドポイントは、リクエストが送信されていない接続エラーのみリトライする
+# (プッシュメッセージの二重送信を防ぐため)
+# ※verify、jwksは予約登録(タイムアウト3秒)の処理中に呼び出すため、リトライせず短い期限とする
+ENDPOINT_POLICIES = {
+    'verify': {
+        'url': common_const.const.API_USER_ID_URL,
+        'timeout': (0.5, 1), 'retries': 0, 'retry_on_status': True,
+    },
+    'jwks': {
+        'url': common_const.const.API_JWKS_URL,
+        'timeout': (0.3, 0.5), 'retries': 0, 'retry_on_status': True,
+    },
+    'access_token': {
+        'url': common_const.const.API_ACCESSTOKEN_URL,
+        'timeout': (3, 10), 'retries': 3, 'retry_on_status': True,
+    },
+    'messaging': {
+        'url': API_MESSAGING_URL,
+        'timeout': (3, 10), 'retries': 2, 'retry_on_status': False,
+    },
+}
+
+# LineBotApiのキャッシュ(チャネル毎)
+# トークンの更新毎にエントリが増えないよう、チャネルIDをキーとし、
+# 作成時のトークンと組で保持する
+LINE_BOT_API_CACHE_TTL = 3600
+LINE_BOT_API_CACHE_MAX_SIZE = 32
+line_bot_api_cache = TTLCache(LINE_BOT_API_CACHE_MAX_SIZE,
+                              LINE_BOT_API_CACHE_TTL)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    LINEのAPI呼び出し用の共有セッションを取得する
+    ※初回呼び出し時に作成し、以降はコンテナ内で使い回します
+
+    Returns
+    -------
+    session : requests.Session
+        エンドポイント毎のリトライ設定とコネクションプールを持つセッション
+
+    """
+    global _session
+    if _session is not None:
+        return _session
+
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            for policy in ENDPOINT_POLICIES.values():
+                session.mount(policy['url'], _create_adapter(policy))
+            _session = session
+    return _session
+
+
+def _create_adapter(policy):
+    """
+    エンドポイントのリトライ設定を持つアダプターを作成する
+
+    Parameters
+    ----------
+    policy : dict
+        ENDPOINT_POLICIESのエンドポイント毎の設定
+
+    Returns
+    -------
+    adapter : requests.adapters.HTTPAdapter
+        コネクションプールとリトライ設定を持つアダプター
+
+    """
+    retries = policy['retries']
+    if policy['retry_on_status']:
+        retry = Retry(total=retries, connect=retries, read=retries,
+                      status=retries, status_forcelist=RETRY_STATUS_CODES,
+                      allowed_methods=frozenset(['GET', 'POST']),
+                      backoff_factor=LINE_HTTP_BACKOFF_FACTOR,
+                      raise_on_status=False)
+    else:
+        retry = Retry(total=retries, connect=retries, read=0, status=0,
+                      backoff_factor=LINE_HTTP_BACKOFF_FACTOR,
+                      raise_on_status=False)
+
+    return HTTPAdapter(pool_maxsize=LINE_HTTP_POOL_MAXSIZE,
+                       max_retries=retry)
+
+
+def post(endpoint, headers=None, data=None, path='', timeout=None):
+    """
+    共有セッションでエンドポイントにPOSTする
+
+    Parameters
+    ----------
+    endpoint : str
+        ENDPOINT_POLICIESのキー(verify、access_token、messaging)
+    headers : dict, optional
+        リクエストヘッダー, by default None
+    data : dict or bytes, optional
+        リクエストボディ, by default None
+    path : str, optional
+        エンドポイントのURLに続けるパス(例:message/push), by default ''
+    timeout : float or tuple, optional
+        タイムアウト(接続, 読み込み)秒, by default None
+        指定しない場合はエンドポイントの設定値
+
+    Returns
+    -------
+    response : requests.Response
+        レスポンス
+
+    """
+    policy = ENDPOINT_POLICIES[endpoint]
+    return get_session().post(policy['url'] + path, headers=headers,
+                              data=data, timeout=timeout or policy['timeout'])
+
+
+def get(endpoint, headers=None, params=None):
+    """
+    共有セッションでエンドポイントにGETする
+
+    Parameters
+    ----------
+    endpoint : str
+        ENDPOINT_POLICIESのキー(jwks)
+    headers : dict, optional
+        リクエストヘッダー, by default None
+    params : dict, optional
+        クエリパラメータ, by default None
+
+    Returns
+    -------
+    response : requests.Response
+        レスポンス
+
+    """
+    policy = ENDPOINT_POLICIES[endpoint]
+    return get_session().get(policy['url'], headers=headers, params=params,
+                             timeout=policy['timeout'])
+
+
+def get_line_bot_api(channel_access_token, channel_id=None):
+    """
+    共有セッションを使用するLineBotApiを取得する
+    ※チャネル毎にキャッシュし、トークンが変わった場合は作り直して置き換えます
+
+    Parameters
+    ----------
+    channel_access_token : str
+        短期チャネルアクセストークン
+    channel_id : str, optional
+        チャネルID, by default None
+        未指定の場合、チャネルアクセストークン毎にキャッシュする
+
+    Returns
+    -------
+    line_bot_api : linebot.LineBotApi
+        LineBotApi
+
+    """
+    cache_key = channel_id or channel_access_token
+    cached = line_bot_api_cache.get(cache_key)
+    if cached is not None and cached[0] == channel_access_token:
+        return cached[1]
+
+    line_bot_api = LineBotApi(
+        channel_access_token,
+        timeout=ENDPOINT_POLICIES['messaging']['timeout'],
+        http_client=SessionHttpClient)
+    line_bot_api_cache.set(cache_key, (channel_access_token, line_bot_api))
+    return line_bot_api
+
+
+class SessionHttpClient(RequestsHttpClient):
+    """共有セッションを使用するLineBotApi用のHttpClient"""
+
+    def get(self, url, headers=None, params=None, stream=False,
+            timeout=None):
+        """
+        GETリクエストを送信する
+
+        Parameters
+        ----------
+        url : str
+            リクエストURL
+        headers : dict, optional
+            リクエストヘッダー, by default None
+        params : dict, optional
+            クエリパラメータ, by default None
+        stream : bool, optional
+            レスポンスをストリームで取得する場合True, by default False
+        timeout : float or tuple, optional
+            タイムアウト(秒), by default None
+
+        Returns
+        -------
+        response : linebot.http_client.RequestsHttpResponse
+            レスポンス
+
+        """
+        response = get_session().get(
+            url, headers=headers, params=params, stream=stream,
+            timeout=timeout or self.timeout)
+        return RequestsHttpResponse(response)
+
+    def post(self, url, headers=None, data=None, timeout=None):
+        """
+        POSTリクエストを送信する
+
+        Parameters
+        ----------
+        url : str
+            リクエストURL
+        headers : dict, optional
+            リクエストヘッダー, by default None
+        data : dict or bytes, optional
+            リクエストボディ, by default None
+        timeout : float or tuple, optional
+            タイムアウト(秒), by default None
+
+        Returns
+        -------
+        response : linebot.http_client.RequestsHttpResponse
+            レスポンス
+
+        """
+        response = get_session().post(
+            url, headers=headers, data=data,
+            timeout=timeout or self.timeout)
+        return RequestsHttpResponse(response)
+
+    def delete(self, url, headers=None, data=None, timeout=None):
+        """
+        DELETEリクエストを送信する
+
+        Parameters
+        ----------
+        url : str
+            リクエストURL
+        headers : dict, optional
+            リクエストヘッダー, by default None
+        data : dict or bytes, optional
+            リクエストボディ, by default None
+        timeout : float or tuple, optional
+            タイムアウト(秒), by default None
+
+        Returns
+        -------
+        response : linebot.http_client.RequestsHttpResponse
+            レスポンス
+
+        """
+        response = get_session().delete(
+            url, headers=headers, data=data,
+            timeout=timeout or self.timeout)
+        return RequestsHttpResponse(response)
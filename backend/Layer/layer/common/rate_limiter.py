@@ -0,0 +1,134 @@
+"""
+APIの呼び出し回数制限用モジュール
+トークンバケット方式で、キー(チャネル)毎に1秒あたりの呼び出し回数を制限します
+"""
+import json
+import os
+import random
+import threading
+import time
+
+# 1秒あたりの呼び出し回数の上限(チャネル毎の設定が無い場合)
+LINE_PUSH_RATE_LIMIT = float(os.environ.get('LINE_PUSH_RATE_LIMIT', 100))
+# チャネル毎の1秒あたりの呼び出し回数の上限
+# 例:{"1234567890": 500}
+LINE_PUSH_RATE_LIMITS = json.loads(
+    os.environ.get('LINE_PUSH_RATE_LIMITS') or '{}')
+# 待機時間の指定が無い場合のバックオフの基準秒数と上限秒数
+BACKOFF_BASE_DELAY = 0.5
+BACKOFF_MAX_DELAY = 30
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(key):
+    """
+    キー(チャネル)毎のレートリミッターを取得する
+    ※コンテナ内で共有し、全スレッドの呼び出しをまとめて制限します
+
+    Parameters
+    ----------
+    key : str
+        レートリミッターのキー(チャネルID)
+
+    Returns
+    -------
+    rate_limiter : TokenBucket
+        キーのレートリミッター
+
+    """
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            rate = float(LINE_PUSH_RATE_LIMITS.get(key, LINE_PUSH_RATE_LIMIT))
+            _rate_limiters[key] = TokenBucket(rate, max(rate, 1))
+        return _rate_limiters[key]
+
+
+def get_backoff_delay(attempt, retry_after=None):
+    """
+    制限超過時に待機する秒数を取得する
+    ※Retry-Afterの指定が無い場合、試行回数に応じてジッター付きで指数的に増加させます
+
+    Parameters
+    ----------
+    attempt : int
+        制限超過となった回数(1始まり)
+    retry_after : float, optional
+        レスポンスのRetry-Afterの秒数, by default None
+
+    Returns
+    -------
+    delay : float
+        待機する秒数
+
+    """
+    if retry_after is not None:
+        return retry_after
+    delay = min(BACKOFF_BASE_DELAY * (2 ** (attempt - 1)), BACKOFF_MAX_DELAY)
+    return random.uniform(delay / 2, delay)
+
+
+class TokenBucket:
+    """トークンバケット方式のレートリミッタークラス"""
+    __slots__ = ['_rate', '_capacity', '_tokens', '_updated_at',
+                 '_paused_until', '_lock']
+
+    def __init__(self, rate, capacity):
+        """
+        初期化メソッド
+
+        Parameters
+        ----------
+        rate : float
+            1秒あたりに補充するトークン数(1秒あたりの呼び出し回数の上限)
+        capacity : float
+            バケットに貯められるトークン数(瞬間的に呼び出せる回数)
+
+        """
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        トークンを1つ取得する
+        ※トークンが無い場合、または一時停止中の場合は取得できるまで待機します
+
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait_seconds = self._paused_until - now
+                else:
+                    self._tokens = min(
+                        self._capacity,
+                        self._tokens + (now - self._updated_at) * self._rate)
+                    self._updated_at = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait_seconds = (1 - self._tokens) / self._rate
+            time.sleep(wait_seconds)
+
+    def pause(self, seconds):
+        """
+        指定秒数の間、トークンの取得を停止する
+        ※制限超過(429)のレスポンスを受けた場合に使用します
+
+        Parameters
+        ----------
+        seconds : float
+            停止する秒数
+
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until,
+                                     time.monotonic() + seconds)
+            # 停止中はトークンを補充しない
+            self._tokens = 0
+            self._updated_at = self._paused_until
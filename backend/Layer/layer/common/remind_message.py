@@ -7,12 +7,18 @@ from dateutil.tz import gettz
 import uuid
 import decimal
 import os
+from botocore.exceptions import ClientError
 
-from common import common_const
 from aws.dynamodb.base import DynamoDB
 
 ONE_WEEK = timedelta(days=7)
 JST_UTC_TIMEDELTA = timedelta(hours=9)
+# remindDateのindex
+REMIND_DATE_INDEX = 'remindDate-index'
+# 未送信のメッセージのみを含むindex
+# ※pendingRemindDateは登録時に設定し、送信済みにした時に削除するため、
+# 送信済みのメッセージはindexに含まれません(スパースインデックス)
+PENDING_REMIND_DATE_INDEX = 'pendingRemindDate-index'
 
 
 class RemindMessage(DynamoDB):
@@ -45,30 +51,99 @@ class RemindMessage(DynamoDB):
         response : dict
             レスポンス情報
         """
+        item = self._create_push_message_item(
+            user_id, channel_id, remind_date, flex_message=flex_message)
+
+        try:
+            response = self._put_item(item)
+        except Exception as e:
+            raise e
+        return response
+
+    def put_push_messages(self, push_messages, transaction=None):
+        """
+        複数のプッシュメッセージをまとめて登録する
+        ※BatchWriteItemを使用し、25件毎に書き込みます
+
+        Parameters
+        ----------
+        push_messages : list of dict
+            登録するプッシュメッセージのリスト
+            各要素はput_push_messageの引数名をキーとしたdict
+            (user_id, channel_id, flex_message, remind_date)
+            flex_messageの代わりにtemplate_id、template_paramsを指定した場合、
+            テンプレートIDとパラメータのみを登録し、送信時にメッセージを作成する
+        transaction : TransactWriter, optional
+            書き込みを追加するトランザクション, by default None
+            指定した場合、書き込みはトランザクションのコミット時に行われる
+
+        """
+        try:
+            if transaction:
+                for push_message in push_messages:
+                    self._transact_put_item(
+                        transaction,
+                        self._create_push_message_item(**push_message))
+                return
+
+            with self._batch_writer() as batch_writer:
+                for push_message in push_messages:
+                    batch_writer.put_item(
+                        self._create_push_message_item(**push_message))
+        except Exception as e:
+            raise e
+
+    def _create_push_message_item(self, user_id, channel_id, remind_date,
+                                  flex_message=None, template_id=None,
+                                  template_params=None):
+        """
+        プッシュメッセージの登録用アイテムを作成する。
+        クラス内のみで使用。
+
+        Parameters
+        ----------
+        user_id : str
+            ユーザーID
+        channel_id : str
+            メッセージ送信するチャネルのID
+        remind_date : str
+            リマインド日
+        flex_message : str, optional
+            フレックスメッセージのjson形式文字列, by default None
+        template_id : str, optional
+            フレックスメッセージのテンプレートID, by default None
+            指定した場合、flex_messageの代わりにテンプレートIDとパラメータを登録する
+        template_params : dict, optional
+            テンプレートに埋め込むパラメータ, by default None
+
+        Returns
+        -------
+        item : dict
+            登録用アイテム
+        """
         message_id = str(uuid.uuid4())
         message_info = {
             'messageType': "push",
             'userId': user_id,
             'channelId': channel_id,
-            'messageBody': flex_message
         }
+        if template_id:
+            message_info['templateId'] = template_id
+            message_info['templateParams'] = template_params
+        else:
+            message_info['messageBody'] = flex_message
         item = {
             'id': message_id,
             'messageInfo': message_info,
             'remindDate': remind_date,
+            'pendingRemindDate': remind_date,
             'expirationDate': self._get_timestamp_after_one_week(remind_date),
             'createdTime': datetime.now(
                 gettz('Asia/Tokyo')).strftime("%Y/%m/%d %H:%M:%S"),
             'updatedTime': datetime.now(
                 gettz('Asia/Tokyo')).strftime("%Y/%m/%d %H:%M:%S")
         }
-
-        try:
-            response = self._put_item(item)
-        except Exception as e:
-            raise e
-        return response
-
+        return item
 
     def get_item(self, id):
         """
@@ -108,7 +183,7 @@ class RemindMessage(DynamoDB):
             リマインド日から取得したアイテム
 
         """
-        index = 'remindDate-index'
+        index = REMIND_DATE_INDEX
         expression = 'remindDate = :remindDate'
         expression_value = {
             ':remindDate': remind_date,
@@ -120,6 +195,77 @@ class RemindMessage(DynamoDB):
             raise e
         return items
 
+    def query_index_pending_remind_date_iter(self, remind_date,
+                                             page_size=None):
+        """
+        pendingRemindDateのindexから未送信のアイテムを1件ずつ取得する
+        ※全件をメモリに保持せず、ページ単位で順次取得します
+        ※送信済みのメッセージはindexに含まれないため、読み込みません
+
+        Parameters
+        ----------
+        remind_date : str
+            リマインド日
+        page_size : int, optional
+            1リクエストあたりの取得件数, by default None
+
+        Yields
+        ------
+        item : dict
+            リマインド日から取得した未送信のアイテム
+
+        """
+        index = PENDING_REMIND_DATE_INDEX
+        expression = 'pendingRemindDate = :remindDate'
+        expression_value = {
+            ':remindDate': remind_date,
+        }
+
+        yield from self._query_index_iter(
+            index, expression, expression_value, page_size=page_size)
+
+    def mark_sent(self, id):
+        """
+        メッセージを送信済みにする
+        ※未送信の場合のみ送信日時(sentAt)を登録し、
+        未送信のindexのキー(pendingRemindDate)を削除します
+
+        Parameters
+        ----------
+        id : str
+            メッセージのid
+
+        Returns
+        -------
+        marked : bool
+            送信済みにした場合True
+            既に送信済みだった場合False
+
+        """
+        key = {'id': id}
+        update_expression = 'SET #sent_at = :sent_at, ' \
+            'updatedTime = :sent_at REMOVE pendingRemindDate'
+        condition_expression = 'attribute_exists(id) AND ' \
+            'attribute_not_exists(#sent_at)'
+        expression_attribute_names = {'#sent_at': 'sentAt'}
+        expression_value = {
+            ':sent_at': datetime.now(
+                gettz('Asia/Tokyo')).strftime("%Y/%m/%d %H:%M:%S"),
+        }
+        return_value = "NONE"
+
+        try:
+            self._update_item_optional(key, update_expression,
+                                       condition_expression,
+                                       expression_attribute_names,
+                                       expression_value, return_value)
+        except ClientError as e:
+            if e.response['Error']['Code'] == \
+                    'ConditionalCheckFailedException':
+                return False
+            raise e
+        return True
+
     def _get_timestamp_after_one_week(self, date):
         """
         一週間後の日付のタイムスタンプを取得する。
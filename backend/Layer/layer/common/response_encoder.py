@@ -0,0 +1,135 @@
+"""
+APIレスポンスのJSON変換用モジュール
+DynamoDBから取得したDecimal型等の値を、JSONの数値・配列に変換しながらシリアライズします
+※orjsonがインストールされている場合は、orjsonでシリアライズします
+※orjsonが無い環境でも同じJSON文字列(ETag)となるよう、区切り文字の空白を出力しません
+"""
+from decimal import Decimal
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 使用するJSONライブラリ名(ログ、ベンチマーク用)
+JSON_BACKEND = 'orjson' if orjson else 'json'
+
+# 呼び出し毎にエンコーダーを作成しないよう、コンテナ内で使い回す
+_json_encoder = None
+
+
+def dumps(obj):
+    """
+    DynamoDBの値を含むオブジェクトをJSON文字列に変換する
+    ※日本語等はエスケープせずに、区切り文字の空白を除いて出力します
+
+    Parameters
+    ----------
+    obj : object
+        変換するオブジェクト
+        Decimal型、set型を含んでいてもよい
+
+    Returns
+    -------
+    body : str
+        JSON文字列
+
+    """
+    if orjson:
+        return orjson.dumps(obj, default=_convert,
+                            option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return _get_json_encoder().encode(obj)
+
+
+def to_native(value):
+    """
+    DynamoDBの値をJSONを介さずにPythonの標準の型に変換する
+    ※dict、listを1度だけ辿り、Decimal型をint(小数部がある場合はfloat)、
+    set型をlistに変換します
+
+    Parameters
+    ----------
+    value : object
+        DynamoDBから取得したアイテム、またはその値
+
+    Returns
+    -------
+    native_value : object
+        変換後の値
+
+    """
+    value_type = type(value)
+    if value_type is dict:
+        return {key: to_native(item) for key, item in value.items()}
+    if value_type is list or value_type is set or value_type is frozenset:
+        return [to_native(item) for item in value]
+    if value_type is Decimal:
+        return _decimal_to_number(value)
+    return value
+
+
+def _get_json_encoder():
+    """
+    標準ライブラリのJSONエンコーダーを取得する
+
+    Returns
+    -------
+    json_encoder : json.JSONEncoder
+        Decimal型、set型に対応したエンコーダー
+
+    """
+    global _json_encoder
+    if _json_encoder is None:
+        _json_encoder = json.JSONEncoder(ensure_ascii=False,
+                                         separators=(',', ':'),
+                                         default=_convert)
+    return _json_encoder
+
+
+def _convert(obj):
+    """
+    JSONに変換できない値を変換する
+    ※JSONライブラリから、変換できない値の場合のみ呼び出されます
+
+    Parameters
+    ----------
+    obj : object
+        JSONに変換できない値
+
+    Returns
+    -------
+    value : int, float or list
+        変換後の値
+
+    Raises
+    ------
+    TypeError
+        Decimal型、set型以外の場合
+
+    """
+    if obj.__class__ is Decimal:
+        return _decimal_to_number(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(
+        f'Object of type {obj.__class__.__name__} is not JSON serializable')
+
+
+def _decimal_to_number(value):
+    """
+    Decimal型を数値に変換する
+
+    Parameters
+    ----------
+    value : decimal.Decimal
+        DynamoDBの数値
+
+    Returns
+    -------
+    number : int or float
+        整数の場合int、小数部がある場合float
+
+    """
+    number = int(value)
+    return number if number == value else float(value)
@@ -0,0 +1,98 @@
+"""
+有効期限付きキャッシュ用モジュール
+Lambdaのコンテナが再利用される間、DynamoDB等から取得したデータを保持する
+"""
+from collections import OrderedDict
+import threading
+import time
+
+
+class TTLCache:
+    """有効期限と件数上限付きのキャッシュクラス"""
+    __slots__ = ['_max_size', '_ttl', '_items', '_lock']
+
+    def __init__(self, max_size, ttl):
+        """
+        初期化メソッド
+
+        Parameters
+        ----------
+        max_size : int
+            保持する最大件数
+            超過した場合、最も長く参照されていないデータから削除する
+        ttl : int, float
+            データの有効期限(秒)
+
+        """
+        self._max_size = max_size
+        self._ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        キャッシュからデータを取得する
+
+        Parameters
+        ----------
+        key : object
+            データのキー
+
+        Returns
+        -------
+        value : object
+            キャッシュしたデータ
+            未登録または有効期限切れの場合None
+
+        """
+        with self._lock:
+            cached = self._items.get(key)
+            if cached is None:
+                return None
+
+            value, expires_at = cached
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                return None
+
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        キャッシュにデータを登録する
+
+        Parameters
+        ----------
+        key : object
+            データのキー
+        value : object
+            登録するデータ(Noneは登録不可)
+        ttl : int, float, optional
+            このデータの有効期限(秒), by default None
+            未指定の場合、初期化時に指定した有効期限
+
+        """
+        expires_at = time.monotonic() + (self._ttl if ttl is None else ttl)
+        with self._lock:
+            self._items[key] = (value, expires_at)
+            self._items.move_to_end(key)
+            while len(self._items) > self._max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """
+        キャッシュしたデータを削除する
+
+        Parameters
+        ----------
+        key : object, optional
+            削除するデータのキー, by default None
+            未指定の場合、全てのデータを削除する
+
+        """
+        with self._lock:
+            if key is None:
+                self._items.clear()
+            else:
+                self._items.pop(key, None)
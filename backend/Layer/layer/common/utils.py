@@ -1,7 +1,6 @@
 """
 共通関数
 """
-from decimal import Decimal
 from datetime import (datetime, timedelta)
 import decimal
 import os
@@ -9,7 +8,7 @@ import os
 from common import common_const
 
 
-def create_response(status_code, body):
+def create_response(status_code, body, headers=None):
     """
     フロントに返却するデータを作成する
 
@@ -19,14 +18,19 @@ def create_response(status_code, body):
         フロントに返却するステータスコード
     body:dict,str
         フロントに返却するbodyに格納するデータ
+    headers:dict, optional
+        追加で返却するレスポンスヘッダー
     Returns
     -------
     response : dict
         フロントに返却するデータ
     """
+    response_headers = {"Access-Control-Allow-Origin": "*"}
+    if headers:
+        response_headers.update(headers)
     response = {
         'statusCode': status_code,
-        'headers': {"Access-Control-Allow-Origin": "*"},
+        'headers': response_headers,
         'body': body
     }
     return response
@@ -50,7 +54,7 @@ def create_error_response(body, status=500):
     return create_response(status, body)
 
 
-def create_success_response(body):
+def create_success_response(body, headers=None):
     """
     正常終了時にフロントに返却するデータを作成する
 
@@ -58,50 +62,55 @@ def create_success_response(body):
     ----------
     body : dict,str
         フロントに返却するbodyに格納するデータ
+    headers:dict, optional
+        追加で返却するレスポンスヘッダー
     Returns
     -------
     create_response:dict
         フロントに返却するデータ
     """
-    return create_response(200, body)
+    return create_response(200, body, headers)
 
 
-def separate_comma(num):
+def get_request_header(event, header_name):
     """
-    数値を3桁毎のカンマ区切りにする
+    リクエストヘッダーの値を取得する
+    ヘッダー名の大文字・小文字は区別しない
 
     Parameters
     ----------
-    num : int
-        カンマ区切りにする数値
-
+    event : dict
+        フロントから送られたパラメータ等の情報
+    header_name : str
+        ヘッダー名
     Returns
     -------
-    result : str
-        カンマ区切りにした文字列
+    value : str
+        ヘッダーの値
+        ヘッダーが無い場合None
     """
-    return '{:,}'.format(num)
+    headers = event.get('headers') or {}
+    for name, value in headers.items():
+        if name.lower() == header_name.lower():
+            return value
+    return None
 
 
-def decimal_to_int(obj):
+def separate_comma(num):
     """
-    Decimal型をint型に変換する。
-    json形式に変換する際にDecimal型でエラーが出るため作成。
-    主にDynamoDBの数値データに対して使用する。
+    数値を3桁毎のカンマ区切りにする
 
     Parameters
     ----------
-    obj : obj
-        Decimal型の可能性があるオブジェクト
+    num : int
+        カンマ区切りにする数値
 
     Returns
     -------
-    int, other
-        Decimal型の場合int型で返す。
-        その他の型の場合そのまま返す。
+    result : str
+        カンマ区切りにした文字列
     """
-    if isinstance(obj, Decimal):
-        return int(obj)
+    return '{:,}'.format(num)
 
 
 def float_to_int(obj):
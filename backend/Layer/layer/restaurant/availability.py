@@ -0,0 +1,203 @@
+"""
+店舗の空き状況計算用モジュール
+日×30分枠の予約人数の行列に対して、残席数・予約可能な開始時刻を
+まとめて算出します
+※行列は最大でも31日×48枠のため、外部ライブラリを使わずリストで計算します
+
+"""
+from restaurant import slot_array
+
+
+def get_course_minutes(shop_info, course_id):
+    """
+    店舗情報から、コースの時間(分)を取得する
+
+    Parameters
+    ----------
+    shop_info : dict
+        shop_idを指定した取得した店舗の情報
+    course_id : int
+        コースのID
+
+    Returns
+    -------
+    course_minutes : int or None
+        コースの時間(分)
+        店舗に存在しないコースの場合はNone
+
+    """
+    for course in shop_info.get('course', []):
+        if int(course['courseId']) == course_id:
+            return int(course['courseMinutes'])
+    return None
+
+
+class ShopAvailability:
+    """店舗の日×30分枠の空き状況計算用クラス"""
+    __slots__ = ['_open_time', '_seats_number', '_days', '_reserved',
+                 '_slot_count']
+
+    def __init__(self, open_time, close_time, seats_number,
+                 reserved_slots_by_day, days):
+        """
+        初期化メソッド
+
+        Parameters
+        ----------
+        open_time : str
+            HH:MM形式の営業開始時刻
+        close_time : str
+            HH:MM形式の営業終了時刻
+        seats_number : int
+            席数(1枠あたりの予約可能人数)
+        reserved_slots_by_day : dict
+            予約日をキー、枠毎の予約人数の配列を値としたdict
+            配列は営業開始時刻を先頭とした営業時間内の枠数の長さ
+        days : list of str
+            行列の行とする日付のリスト
+            予約情報が無い日は予約人数0の行とする
+
+        """
+        slot_count = slot_array.get_slot_count(open_time, close_time)
+        self._open_time = open_time
+        self._seats_number = int(seats_number)
+        self._days = list(days)
+        self._reserved = []
+        for day in self._days:
+            reserved_slots = [int(reserved_number) for reserved_number
+                              in (reserved_slots_by_day.get(day) or [])]
+            reserved_slots = reserved_slots[:slot_count]
+            self._reserved.append(
+                reserved_slots + [0] * (slot_count - len(reserved_slots)))
+        self._slot_count = slot_count
+
+    @classmethod
+    def from_shop_info(cls, shop_info, reserved_slots_by_day, days):
+        """
+        店舗情報から初期化する
+
+        Parameters
+        ----------
+        shop_info : dict
+            shop_idを指定した取得した店舗の情報
+        reserved_slots_by_day : dict
+            予約日をキー、枠毎の予約人数の配列を値としたdict
+        days : list of str
+            行列の行とする日付のリスト
+
+        Returns
+        -------
+        shop_availability : ShopAvailability
+            店舗の空き状況
+
+        """
+        return cls(shop_info['shop']['openTime'],
+                   shop_info['shop']['closeTime'],
+                   shop_info['shop']['seatsNumber'],
+                   reserved_slots_by_day, days)
+
+    def get_remaining_seats(self):
+        """
+        日×枠の残席数を取得する
+
+        Returns
+        -------
+        remaining_seats : list of list of int
+            日×枠の残席数の行列(超過予約の枠は0)
+
+        """
+        return [[max(self._seats_number - reserved_number, 0)
+                 for reserved_number in reserved_slots]
+                for reserved_slots in self._reserved]
+
+    def get_feasible_start_matrix(self, course_minutes, people_number):
+        """
+        日×開始枠毎に、コースの時間中の全ての枠に予約人数分の空きがあるか判定する
+
+        Parameters
+        ----------
+        course_minutes : int
+            コースの時間(分)
+            30分単位に切り上げて判定する
+        people_number : int
+            予約人数
+
+        Returns
+        -------
+        feasible_start_matrix : list of list of bool
+            日×開始枠の予約可否の行列
+            コースの終了が営業終了時刻を超える開始枠はFalse
+
+        """
+        slot_count = self._slot_count
+        course_slot_count = max(
+            -(-int(course_minutes) // slot_array.SLOT_MINUTES), 1)
+        feasible_start_matrix = []
+        for remaining_slots in self.get_remaining_seats():
+            feasible_starts = [False] * slot_count
+            # 空きが足りない枠からの距離を数え、コースの枠数以上連続して
+            # 空きがある場合、その区間の先頭の枠を予約可能とする
+            vacant_run = 0
+            for slot_index, remaining_number in enumerate(remaining_slots):
+                vacant_run = vacant_run + 1 \
+                    if remaining_number >= people_number else 0
+                if vacant_run >= course_slot_count:
+                    feasible_starts[
+                        slot_index - course_slot_count + 1] = True
+            feasible_start_matrix.append(feasible_starts)
+        return feasible_start_matrix
+
+    def get_feasible_start_times(self, course_minutes, people_number):
+        """
+        日毎の予約可能な開始時刻を取得する
+
+        Parameters
+        ----------
+        course_minutes : int
+            コースの時間(分)
+        people_number : int
+            予約人数
+
+        Returns
+        -------
+        feasible_start_times : dict
+            予約日をキー、HH:MM形式の予約可能な開始時刻のリストを値としたdict
+            予約可能な開始時刻が無い日は空のリスト
+
+        """
+        feasible_start_matrix = self.get_feasible_start_matrix(
+            course_minutes, people_number)
+        open_minutes = slot_array.time_to_minutes(self._open_time)
+        start_times = [
+            slot_array.minutes_to_time(
+                open_minutes + slot_index * slot_array.SLOT_MINUTES)
+            for slot_index in range(self._slot_count)]
+
+        return {
+            day: [start_time for start_time, feasible
+                  in zip(start_times, feasible_starts) if feasible]
+            for day, feasible_starts in zip(self._days, feasible_start_matrix)
+        }
+
+    def get_unavailable_days(self, course_minutes, people_number):
+        """
+        予約可能な開始時刻が1つも無い日を取得する
+
+        Parameters
+        ----------
+        course_minutes : int
+            コースの時間(分)
+        people_number : int
+            予約人数
+
+        Returns
+        -------
+        unavailable_days : list of str
+            YYYY-MM-DD 形式の予約できない日付のリスト
+
+        """
+        feasible_start_matrix = self.get_feasible_start_matrix(
+            course_minutes, people_number)
+        return [day for day, feasible_starts
+                in zip(self._days, feasible_start_matrix)
+                if not any(feasible_starts)]
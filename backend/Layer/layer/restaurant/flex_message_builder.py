@@ -1,37 +1,126 @@
+"""
+フレックスメッセージ作成用モジュール
+リマインド通知は、テンプレートIDとパラメータのみをメッセージテーブルに登録し、
+送信時にこのモジュールでフレックスメッセージを作成します
+※レイアウトはコンテナ内で1度だけテンプレートに変換し、送信時は可変項目のみを埋め込みます
+
+"""
 import logging
 
+from common.flex_template import (FlexTemplate, placeholder)
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# リマインド通知のテンプレートID
+REMIND_TEMPLATE_ID = 'restaurantRemind'
+
 
-def create_restaurant_remind(**kwargs):
+def create_remind_template_params(shop_name, reservation_date, course_name,
+                                  number_of_people, remind_date_difference):
     """
-    Messaging APIに渡すリマインド通知用メッセージの取得
+    リマインド通知のテンプレートパラメータを作成する
+    ※メッセージテーブルに登録するため、キーはテーブルの属性名と同じ形式とします
 
     Parameters
     ----------
-    shop_name
+    shop_name : str
         店名
-    reservation_date
-        予約日
-    course_name
+    reservation_date : str
+        予約日時
+    course_name : str
         コース名
-    remind_status
-        リマインドの種類（前日/当日）
-    number_of_people
+    number_of_people : str
         予約人数
+    remind_date_difference : int
+        リマインドを送信する日付と当日の差分
+
+    Returns
+    -------
+    template_params : dict
+        テンプレートパラメータ
+    """
+    return {
+        'shopName': shop_name,
+        'reservationDate': reservation_date,
+        'courseName': course_name,
+        'numberOfPeople': number_of_people,
+        'remindDateDifference': remind_date_difference,
+    }
+
+
+def render_template(template_id, template_params):
+    """
+    テンプレートIDとパラメータからフレックスメッセージを作成する
+
+    Parameters
+    ----------
+    template_id : str
+        テンプレートID
+    template_params : dict
+        テンプレートパラメータ
+
+    Returns
+    -------
+    flex_message : str
+        シリアライズ済みのフレックスメッセージのJSON文字列
+        line.send_push_messageにそのまま渡すことができる
+
+    Raises
+    ------
+    ValueError
+        テンプレートIDが存在しない場合
+    """
+    try:
+        render = TEMPLATE_RENDERERS[template_id]
+    except KeyError:
+        raise ValueError('Unknown template id: ' + str(template_id))
+    return render(template_params)
+
+
+def _render_restaurant_remind(template_params):
+    """
+    リマインド通知のテンプレートパラメータからフレックスメッセージを作成する
+
+    Parameters
+    ----------
+    template_params : dict
+        create_remind_template_paramsで作成したテンプレートパラメータ
+
     Returns
     -------
-    result : dict
-        Flexmessageの元になる辞書型データ
+    flex_message : str
+        シリアライズ済みのフレックスメッセージのJSON文字列
+    """
+    return _render_remind_json(
+        template_params['shopName'], template_params['reservationDate'],
+        template_params['courseName'], template_params['numberOfPeople'],
+        int(template_params['remindDateDifference']))
+
+
+def _render_remind_json(shop_name, reservation_date, course_name,
+                        number_of_people, remind_date_difference):
     """
-    logger.info(kwargs)
-    shop_name = kwargs['shop_name']
-    reservation_date = kwargs['reservation_date']
-    course_name = kwargs['course_name']
-    number_of_people = kwargs['number_of_people']
-    remind_date_difference = kwargs['remind_date_difference']
+    リマインド通知のテンプレートに値を埋め込み、JSON文字列を作成する
+
+    Parameters
+    ----------
+    shop_name : str
+        店名
+    reservation_date : str
+        予約日時
+    course_name : str
+        コース名
+    number_of_people : str
+        予約人数
+    remind_date_difference : int
+        リマインドを送信する日付と当日の差分
 
+    Returns
+    -------
+    flex_message : str
+        シリアライズ済みのフレックスメッセージのJSON文字列
+    """
     # 予約日当日とそれ以外のメッセージで文言を変える
     if remind_date_difference < 0:
         remind_header_msg = 'ご予約日の' + \
@@ -41,9 +130,29 @@ def create_restaurant_remind(**kwargs):
         remind_header_msg = 'ご予約日の当日となりました'
         remind_last_msg = "本日は、お会いできることを心よりお待ちしています。\nどうぞお気をつけてお越しください。\n\n※このメッセージは、Use Case 予約（レストラン）デモアプリが送信したリマインド通知です。"  # noqa: E501
 
-    flex_msg = {
+    return REMIND_TEMPLATE.render({
+        'remind_header_msg': remind_header_msg,
+        'remind_last_msg': remind_last_msg,
+        'shop_name': shop_name,
+        'reservation_date': reservation_date,
+        'course_name': course_name,
+        'number_of_people': number_of_people,
+    })
+
+
+def _create_restaurant_remind_layout():
+    """
+    リマインド通知用メッセージのレイアウトを作成する
+    ※テンプレートの作成時に1度だけ使用します
+
+    Returns
+    -------
+    layout : dict
+        可変項目をplaceholderで指定したFlexmessageのレイアウト
+    """
+    layout = {
         "type": "flex",
-        "altText": remind_header_msg,
+        "altText": placeholder('remind_header_msg'),
         "contents": {
             "type": "bubble",
             "header": {
@@ -60,7 +169,7 @@ def create_restaurant_remind(**kwargs):
                     },
                     {
                         "type": "text",
-                        "text": remind_header_msg,
+                        "text": placeholder('remind_header_msg'),
                         "size": "lg",
                         "weight": "bold"
                     }
@@ -105,7 +214,7 @@ def create_restaurant_remind(**kwargs):
                                     },
                                     {
                                         "type": "text",
-                                        "text": shop_name,
+                                        "text": placeholder('shop_name'),
                                         "flex": 2,
                                         "size": "sm",
                                         "align": "start",
@@ -128,7 +237,8 @@ def create_restaurant_remind(**kwargs):
                                     },
                                     {
                                         "type": "text",
-                                        "text": reservation_date,
+                                        "text": placeholder(
+                                            'reservation_date'),
                                         "flex": 2,
                                         "size": "sm",
                                         "align": "start",
@@ -151,7 +261,7 @@ def create_restaurant_remind(**kwargs):
                                     },
                                     {
                                         "type": "text",
-                                        "text": course_name,
+                                        "text": placeholder('course_name'),
                                         "flex": 2,
                                         "size": "sm",
                                         "align": "start",
@@ -174,7 +284,8 @@ def create_restaurant_remind(**kwargs):
                                     },
                                     {
                                         "type": "text",
-                                        "text": number_of_people,
+                                        "text": placeholder(
+                                            'number_of_people'),
                                         "flex": 2,
                                         "size": "sm",
                                         "align": "start",
@@ -190,7 +301,7 @@ def create_restaurant_remind(**kwargs):
                                 "contents": [
                                     {
                                         "type": "text",
-                                        "text": remind_last_msg,
+                                        "text": placeholder('remind_last_msg'),
                                         "size": "sm",
                                         "color": "#4A4141",
                                         "wrap": True
@@ -204,4 +315,13 @@ def create_restaurant_remind(**kwargs):
         }
     }
 
-    return flex_msg
+    return layout
+
+
+# リマインド通知のテンプレート(コンテナ内で1度だけ作成する)
+REMIND_TEMPLATE = FlexTemplate(_create_restaurant_remind_layout())
+
+# テンプレートID毎のフレックスメッセージ作成関数
+TEMPLATE_RENDERERS = {
+    REMIND_TEMPLATE_ID: _render_restaurant_remind,
+}
@@ -24,7 +24,7 @@ class RestaurantReservationInfo(DynamoDB):
     def put_item(self, shop_id, shop_name, user_id, user_name,
                  course_id, course_name, reservation_people_number,
                  reservation_date, reservation_starttime,
-                 reservation_endtime, amount):
+                 reservation_endtime, amount, transaction=None):
         """
         データ登録
 
@@ -52,6 +52,9 @@ class RestaurantReservationInfo(DynamoDB):
             予約終了時刻
         amount : int
             コースの値段
+        transaction : TransactWriter, optional
+            書き込みを追加するトランザクション, by default None
+            指定した場合、書き込みはトランザクションのコミット時に行われる
 
         Returns
         -------
@@ -81,7 +84,10 @@ class RestaurantReservationInfo(DynamoDB):
         }
 
         try:
-            self._put_item(item)
+            if transaction:
+                self._transact_put_item(transaction, item)
+            else:
+                self._put_item(item)
         except Exception as e:
             raise e
         return reservation_id
@@ -4,6 +4,21 @@ RestaurantShopMaster操作用モジュール
 """
 import os
 from aws.dynamodb.base import DynamoDB
+from common.ttl_cache import TTLCache
+
+# 店舗情報のキャッシュ設定
+# 店舗情報はほぼ更新されないため、Lambdaのコンテナが再利用される間は保持する
+SHOP_MASTER_CACHE_TTL = int(os.environ.get('SHOP_MASTER_CACHE_TTL', 300))
+# 存在しない店舗IDの結果を保持する秒数
+SHOP_MASTER_NEGATIVE_CACHE_TTL = int(
+    os.environ.get('SHOP_MASTER_NEGATIVE_CACHE_TTL', 30))
+SHOP_MASTER_CACHE_MAX_SIZE = int(
+    os.environ.get('SHOP_MASTER_CACHE_MAX_SIZE', 256))
+# 全店舗の一覧を保持するキャッシュのキー
+SCAN_CACHE_KEY = 'scan'
+
+shop_master_cache = TTLCache(SHOP_MASTER_CACHE_MAX_SIZE,
+                             SHOP_MASTER_CACHE_TTL)
 
 
 class RestaurantShopMaster(DynamoDB):
@@ -16,9 +31,30 @@ class RestaurantShopMaster(DynamoDB):
         super().__init__(table_name)
         self._table = self._db.Table(table_name)
 
+    def put_items(self, items):
+        """
+        複数店舗のデータを一括登録
+        ※dynamodb_data配下の店舗情報などの一括投入に使用します
+
+        Parameters
+        ----------
+        items : list of dict
+            店舗情報のリスト
+
+        """
+        try:
+            with self._batch_writer() as batch_writer:
+                for item in items:
+                    batch_writer.put_item(item)
+        except Exception as e:
+            raise e
+        finally:
+            self.invalidate_cache()
+
     def get_item(self, shop_id):
         """
         データ取得
+        ※キャッシュに有効なデータがある場合、DynamoDBから取得しません
 
         Parameters
         ----------
@@ -29,14 +65,20 @@ class RestaurantShopMaster(DynamoDB):
         -------
         item : dict
             店舗情報
+            キャッシュと共有しているため、変更しないこと
 
         """
-        key = {'shopId': shop_id}
+        cache_key = self._get_cache_key(shop_id)
+        if (item := shop_master_cache.get(cache_key)) is not None:
+            return item
+
+        key = {'shopId': cache_key}
 
         try:
             item = self._get_item(key)
         except Exception as e:
             raise e
+        self._set_cache(cache_key, item)
         return item
 
     def scan(self, shop_id=None):
@@ -52,12 +94,77 @@ class RestaurantShopMaster(DynamoDB):
         -------
         items : list
             店舗情報のリスト
+            キャッシュと共有しているため、変更しないこと
 
         """
+        cache_key = (SCAN_CACHE_KEY, None if shop_id is None
+                     else self._get_cache_key(shop_id))
+        if (items := shop_master_cache.get(cache_key)) is not None:
+            return items
+
         key = 'shop_id'
 
         try:
             items = self._scan(key, shop_id)
         except Exception as e:
             raise e
+        shop_master_cache.set(cache_key, items)
         return items
+
+    def invalidate_cache(self, shop_id=None):
+        """
+        店舗情報のキャッシュを破棄する
+        店舗情報を更新した場合に呼び出す。
+
+        Parameters
+        ----------
+        shop_id : int, optional
+            店舗ID, by default None
+            未指定の場合、全てのキャッシュを破棄する
+
+        """
+        if shop_id is None:
+            shop_master_cache.invalidate()
+            return
+
+        cache_key = self._get_cache_key(shop_id)
+        shop_master_cache.invalidate(cache_key)
+        # 店舗一覧にも該当店舗の情報が含まれるため破棄する
+        shop_master_cache.invalidate((SCAN_CACHE_KEY, None))
+        shop_master_cache.invalidate((SCAN_CACHE_KEY, cache_key))
+
+    def _get_cache_key(self, shop_id):
+        """
+        店舗IDをキャッシュのキーに変換する。
+        クラス内のみで使用。
+        ※'1'と1等、型の異なる同じ店舗IDを同じキーとして扱います
+
+        Parameters
+        ----------
+        shop_id : int or str
+            店舗ID
+
+        Returns
+        -------
+        cache_key : int
+            キャッシュのキー(数値の店舗ID)
+
+        """
+        return int(shop_id)
+
+    def _set_cache(self, shop_id, item):
+        """
+        店舗情報をキャッシュに登録する。
+        クラス内のみで使用。
+
+        Parameters
+        ----------
+        shop_id : int
+            _get_cache_key で変換した店舗ID
+        item : dict
+            店舗情報
+            存在しない店舗IDの場合は空のdictを、短い有効期限で登録する
+
+        """
+        ttl = None if item else SHOP_MASTER_NEGATIVE_CACHE_TTL
+        shop_master_cache.set(shop_id, item, ttl)
@@ -3,25 +3,51 @@ RestaurantShopReservation操作用モジュール
 
 """
 import os
-from datetime import datetime
+from datetime import (datetime, timedelta)
+from decimal import Decimal
 from dateutil.tz import gettz
+from botocore.exceptions import ClientError
 
 from aws.dynamodb.base import DynamoDB
 from common import utils
+from restaurant import slot_array
+
+# 店舗・月毎の空き状況を集約したアイテムのソートキーの接頭辞(例:MONTH#2021-05)
+# ※予約日(YYYY-MM-DD)より後ろに並ぶため、予約日の範囲指定queryには含まれません
+MONTH_SUMMARY_PREFIX = 'MONTH#'
+# 月の最大日数(集約アイテムの空き状況フラグの配列長)
+MAX_DAYS_IN_MONTH = 31
+# 空き状況フラグ
+VACANCY_FLG_MAP = {'AVAILABLE_NOTHING': 0,
+                   'AVAILABLE_MUCH': 1, 'AVAILABLE_FEW': 2}
+# 集約アイテムで予約情報が無い日を表す空き状況フラグ
+NO_RESERVATION_VACANCY_FLG = -1
+# 30分毎の予約情報の作成に使用する属性(予約人数の配列、配列の開始時刻、旧形式の予約情報)
+RESERVED_INFO_ATTRIBUTES = ['reservedSlots', 'slotOpenTime', 'reservedInfo']
 
 
 class RestaurantShopReservation(DynamoDB):
     """RestaurantShopReservation操作用クラス"""
     __slots__ = ['_table']
 
-    def __init__(self):
-        """初期化メソッド"""
+    def __init__(self, low_level=False):
+        """
+        初期化メソッド
+
+        Parameters
+        ----------
+        low_level : bool, optional
+            読み込みを低レベルクライアントで行う場合True, by default False
+            数値はDecimal型ではなくint、floatで取得される
+
+        """
         table_name = os.environ.get("SHOP_RESERVATION_TABLE")
-        super().__init__(table_name)
+        super().__init__(table_name, low_level)
         self._table = self._db.Table(table_name)
 
     def put_item(self, shop_id, reserved_day, reserved_year_month,
-                 reserved_info, total_reserved_number, vacancy_flg):
+                 reserved_info, total_reserved_number, vacancy_flg,
+                 transaction=None):
         """
         データ登録
 
@@ -39,11 +65,15 @@ class RestaurantShopReservation(DynamoDB):
             指定日の合計予約人数
         vacancy_flg : int
             空き状況フラグ -> 0:空き無し, 1:空きあり, 2:空き少し
+        transaction : TransactWriter, optional
+            書き込みを追加するトランザクション, by default None
+            指定した場合、書き込みはトランザクションのコミット時に行われる
 
         Returns
         -------
-        response : dict
+        response : dict or int
             レスポンス情報
+            トランザクションを指定した場合は、トランザクション内の書き込みの番号
 
         """
         item = {
@@ -61,13 +91,16 @@ class RestaurantShopReservation(DynamoDB):
         }
 
         try:
-            response = self._put_item(item)
+            if transaction:
+                response = self._transact_put_item(transaction, item)
+            else:
+                response = self._put_item(item)
         except Exception as e:
             raise e
         return response
 
     def update_item(self, shop_id, reserved_day, reserved_info,
-                    total_reserved_number, vacancy_flg):
+                    total_reserved_number, vacancy_flg, transaction=None):
         """
         データ更新
 
@@ -83,11 +116,15 @@ class RestaurantShopReservation(DynamoDB):
             指定日の合計予約人数
         vacancy_flg : int
             空き状況フラグ -> 0:空き無し, 1:空きあり, 2:空き少し
+        transaction : TransactWriter, optional
+            書き込みを追加するトランザクション, by default None
+            指定した場合、書き込みはトランザクションのコミット時に行われる
 
         Returns
         -------
-        response : dict
+        response : dict or int
             レスポンス情報
+            トランザクションを指定した場合は、トランザクション内の書き込みの番号
 
         """
         key = {'shopId': shop_id, 'reservedDay': reserved_day}
@@ -105,13 +142,582 @@ class RestaurantShopReservation(DynamoDB):
         return_value = "UPDATED_NEW"
 
         try:
-            response = self._update_item(key, expression,
-                                         expression_value, return_value)
+            if transaction:
+                response = self._transact_update_item(
+                    transaction, key, expression, expression_value)
+            else:
+                response = self._update_item(key, expression,
+                                             expression_value, return_value)
         except Exception as e:
             raise e
         return response
 
-    def get_item(self, shop_id, reserved_day):
+    def init_reserved_slots(self, shop_id, reserved_day, reserved_year_month,
+                            slot_open_time, slot_count, initial_vacancy_flg,
+                            item=None, reserved_slots=None,
+                            total_reserved_number=0, transaction=None):
+        """
+        30分毎の予約人数の配列(reservedSlots)を、現在の営業時間に合わせて作成する
+        ※指定日のデータが無い場合は新規作成します
+        ※旧形式のデータは予約人数を配列に移行し、reservedInfoを削除します
+        ※営業時間の変更前に作成された配列は、現在の営業時間の配列に作り直します
+        ※更新前のアイテムから変更されていた場合は何もしません
+        ※加算する予約人数を指定した場合、作成する配列に含めて1回の更新で加算します
+
+        Parameters
+        ----------
+        shop_id : int
+            店舗ID
+        reserved_day : str
+            予約日
+        reserved_year_month : str
+            予約年月
+        slot_open_time : str
+            配列の先頭の枠の開始時刻(営業開始時刻)
+        slot_count : int
+            配列の長さ(営業時間内の枠数)
+        initial_vacancy_flg : int
+            指定日のデータを新規作成する場合の空き状況フラグ
+        item : dict, optional
+            特定日の予約情報(更新前のアイテム), by default None
+            指定しない場合は、指定日のデータが無いものとして作成する
+        reserved_slots : dict, optional
+            30分毎の予約開始時刻(HH:MM)をキー、加算する予約人数を値としたdict,
+            by default None
+            席数の超過はget_conflicting_slotsで事前に判定してください
+        total_reserved_number : int, optional
+            加算する合計予約人数, by default 0
+        transaction : TransactWriter, optional
+            書き込みを追加するトランザクション, by default None
+            指定した場合、書き込みはトランザクションのコミット時に行われる
+            条件エラー時は、取消理由に更新前のアイテムが含まれる
+
+        Returns
+        -------
+        created : bool or int
+            配列を作成した場合True
+            既に作成済み、または更新前のアイテムから変更されていた場合False
+            トランザクションを指定した場合は、トランザクション内の書き込みの番号
+
+        """
+        item = item or {}
+        key = {'shopId': shop_id, 'reservedDay': reserved_day}
+        now = datetime.now(gettz('Asia/Tokyo')).strftime("%Y/%m/%d %H:%M:%S")
+        new_reserved_slots = self.get_reserved_slots(
+            item, slot_open_time, slot_count)
+        for start_time, reserved_number in (reserved_slots or {}).items():
+            new_reserved_slots[slot_array.get_slot_index(
+                slot_open_time, start_time)] += reserved_number
+        update_expression = (
+            'SET #slots=:reserved_slots, slotOpenTime=:slot_open_time, '
+            'reservedYearMonth=:reserved_year_month, '
+            'vacancyFlg=if_not_exists(vacancyFlg, :initial_vacancy_flg), '
+            'expirationDate=if_not_exists(expirationDate, :expiration_date), '
+            'createdTime=if_not_exists(createdTime, :now), '
+            'updatedTime=:now')
+        expression_attribute_names = {
+            '#slots': 'reservedSlots', '#total': 'totalReservedNumber'}
+        expression_value = {
+            ':reserved_slots': new_reserved_slots,
+            ':slot_open_time': slot_open_time,
+            ':reserved_year_month': reserved_year_month,
+            ':total_reserved_number': total_reserved_number,
+            ':initial_vacancy_flg': initial_vacancy_flg,
+            ':expiration_date': utils.get_ttl_time(
+                datetime.strptime(reserved_day, '%Y-%m-%d')),
+            ':now': now,
+        }
+        if 'reservedSlots' in item:
+            # 作り直す間に予約されていないことを、合計予約人数が同じことで判定する
+            # (予約の度に合計予約人数は増加するため)
+            conditions = ['slotOpenTime = :old_slot_open_time',
+                          'size(#slots) = :old_slot_count',
+                          '#total = :old_total']
+            expression_value[':old_slot_open_time'] = item['slotOpenTime']
+            expression_value[':old_slot_count'] = len(item['reservedSlots'])
+            expression_value[':old_total'] = item['totalReservedNumber']
+        else:
+            conditions = ['attribute_not_exists(#slots)']
+        # 配列に移行した旧形式の属性は、二重に計上しないよう削除する
+        if 'reservedInfo' in item:
+            update_expression += ' REMOVE reservedInfo'
+        # 合計予約人数が無い場合は0として加算される
+        update_expression += ' ADD #total :total_reserved_number'
+        condition_expression = ' AND '.join(conditions)
+        return_value = "NONE"
+
+        if transaction:
+            return self._transact_update_item(
+                transaction, key, update_expression, expression_value,
+                condition_expression=condition_expression,
+                expression_attribute_names=expression_attribute_names,
+                return_values_on_condition_check_failure='ALL_OLD')
+
+        try:
+            self._update_item_optional(key, update_expression,
+                                       condition_expression,
+                                       expression_attribute_names,
+                                       expression_value, return_value)
+        except ClientError as e:
+            if e.response['Error']['Code'] == \
+                    'ConditionalCheckFailedException':
+                return False
+            raise e
+        return True
+
+    def get_reserved_slots(self, item, slot_open_time, slot_count):
+        """
+        特定日の予約情報のアイテムから、現在の営業時間の予約人数の配列を取得する
+        ※旧形式のデータや、営業時間の変更前に作成された配列も変換します
+        (変更後の営業時間外の枠の予約人数は含みません)
+
+        Parameters
+        ----------
+        item : dict
+            特定日の予約情報
+        slot_open_time : str
+            配列の先頭の枠の開始時刻(営業開始時刻)
+        slot_count : int
+            配列の長さ(営業時間内の枠数)
+
+        Returns
+        -------
+        reserved_slots : list of int
+            枠毎の予約人数の配列
+
+        """
+        if self.has_slot_layout(item, slot_open_time, slot_count):
+            return list(item['reservedSlots'])
+        return slot_array.encode_reserved_info(
+            self.convert_reserved_info(item), slot_open_time, slot_count)
+
+    def has_slot_layout(self, item, slot_open_time, slot_count):
+        """
+        特定日の予約情報のアイテムが、現在の営業時間の配列のみを持つかを判定する
+
+        Parameters
+        ----------
+        item : dict
+            特定日の予約情報
+        slot_open_time : str
+            配列の先頭の枠の開始時刻(営業開始時刻)
+        slot_count : int
+            配列の長さ(営業時間内の枠数)
+
+        Returns
+        -------
+        has_slot_layout : bool
+            配列の営業開始時刻と長さが同じで、旧形式のreservedInfoが無い場合True
+
+        """
+        return 'reservedSlots' in item and \
+            item.get('slotOpenTime') == slot_open_time and \
+            len(item['reservedSlots']) == slot_count and \
+            'reservedInfo' not in item
+
+    def add_reserved_number(self, shop_id, reserved_day, slot_open_time,
+                            slot_count, reserved_slots, total_reserved_number,
+                            capacity=None, transaction=None):
+        """
+        予約人数の加算
+        ※読み込みを行わず、1回の更新で30分毎の予約人数と合計予約人数を加算します
+        ※予約人数の配列(reservedSlots)が無い、営業時間の変更前の配列、
+        旧形式のreservedInfoが残っている場合は条件エラーとなるため、
+        init_reserved_slotsで作成してから再実行してください
+
+        Parameters
+        ----------
+        shop_id : int
+            店舗ID
+        reserved_day : str
+            予約日
+        slot_open_time : str
+            配列の先頭の枠の開始時刻(営業開始時刻)
+            配列作成時と異なる場合は条件エラーとなる
+        slot_count : int
+            配列の長さ(営業時間内の枠数)
+            配列作成時と異なる場合は条件エラーとなる
+        reserved_slots : dict
+            30分毎の予約開始時刻(HH:MM)をキー、加算する予約人数を値としたdict
+        total_reserved_number : int
+            加算する合計予約人数
+        capacity : int, optional
+            1枠あたりの予約可能人数(席数), by default None
+            指定した場合、加算後にいずれかの枠が超過する時は条件エラーとなる
+            (超過の判定は更新と同時に行われるため、同時に予約があっても超過しない)
+        transaction : TransactWriter, optional
+            書き込みを追加するトランザクション, by default None
+            指定した場合、書き込みはトランザクションのコミット時に行われる
+            条件エラー時は、取消理由に更新前のアイテムが含まれる
+
+        Returns
+        -------
+        response : dict or int
+            レスポンス情報
+            トランザクションを指定した場合は、トランザクション内の書き込みの番号
+
+        """
+        key = {'shopId': shop_id, 'reservedDay': reserved_day}
+        now = datetime.now(gettz('Asia/Tokyo')).strftime("%Y/%m/%d %H:%M:%S")
+        expression_attribute_names = {'#slots': 'reservedSlots'}
+        expression_value = {
+            ':total_reserved_number': total_reserved_number,
+            ':slot_open_time': slot_open_time,
+            ':slot_count': slot_count,
+            ':now': now,
+        }
+        set_expressions = []
+        conditions = [
+            'slotOpenTime = :slot_open_time', 'size(#slots) = :slot_count',
+            'attribute_not_exists(reservedInfo)']
+        for start_time, reserved_number in reserved_slots.items():
+            slot_index = slot_array.get_slot_index(
+                slot_open_time, start_time)
+            slot_path = f'#slots[{slot_index}]'
+            expression_value[f':slot{slot_index}'] = reserved_number
+            set_expressions.append(
+                f'{slot_path}={slot_path} + :slot{slot_index}')
+            if capacity is not None:
+                # 加算前の人数が(席数 - 加算する人数)以下の場合のみ更新する
+                expression_value[f':limit{slot_index}'] = \
+                    capacity - reserved_number
+                conditions.append(f'{slot_path} <= :limit{slot_index}')
+        set_expressions.append('updatedTime=:now')
+        expression = (
+            'SET ' + ', '.join(set_expressions) + ' '
+            'ADD totalReservedNumber :total_reserved_number')
+        condition_expression = ' AND '.join(conditions)
+        return_value = "UPDATED_NEW"
+
+        try:
+            if transaction:
+                response = self._transact_update_item(
+                    transaction, key, expression, expression_value,
+                    condition_expression=condition_expression,
+                    expression_attribute_names=expression_attribute_names,
+                    return_values_on_condition_check_failure='ALL_OLD')
+            else:
+                response = self._update_item_optional(
+                    key, expression, condition_expression,
+                    expression_attribute_names, expression_value,
+                    return_value)
+        except Exception as e:
+            raise e
+        return response
+
+    def get_conflicting_slots(self, item, slot_open_time, slot_count,
+                              reserved_slots, capacity):
+        """
+        予約人数を加算すると席数を超過する枠を取得する
+        ※add_reserved_numberの条件エラー時に、取消理由の更新前のアイテムから判定します
+        ※旧形式のデータや営業時間の変更前の配列は、現在の営業時間の配列に変換して判定します
+
+        Parameters
+        ----------
+        item : dict
+            特定日の予約情報(更新前のアイテム)
+        slot_open_time : str
+            配列の先頭の枠の開始時刻(営業開始時刻)
+        slot_count : int
+            配列の長さ(営業時間内の枠数)
+        reserved_slots : dict
+            30分毎の予約開始時刻(HH:MM)をキー、加算する予約人数を値としたdict
+        capacity : int
+            1枠あたりの予約可能人数(席数)
+
+        Returns
+        -------
+        conflicting_slots : list of dict
+            開始時刻順に並べた、超過する枠の時間と残席数
+            超過する枠が無い場合は空のリスト
+
+        """
+        current_slots = self.get_reserved_slots(
+            item, slot_open_time, slot_count)
+
+        conflicting_slots = []
+        for start_time in sorted(reserved_slots):
+            slot_index = slot_array.get_slot_index(slot_open_time, start_time)
+            current_number = current_slots[slot_index]
+            if current_number + reserved_slots[start_time] <= capacity:
+                continue
+            conflicting_slots.append({
+                'reservedStartTime': start_time,
+                'reservedEndTime': slot_array.minutes_to_time(
+                    slot_array.time_to_minutes(start_time) +
+                    slot_array.SLOT_MINUTES),
+                'remainingNumber': max(capacity - int(current_number), 0),
+            })
+        return conflicting_slots
+
+    def update_vacancy_flg(self, shop_id, reserved_day, vacancy_flg,
+                           min_total_reserved_number=None,
+                           max_total_reserved_number=None):
+        """
+        合計予約人数が指定の範囲内の場合のみ、空き状況フラグを更新する
+        ※範囲の判定は更新と同時に行われるため、事前の読み込みは不要です
+
+        Parameters
+        ----------
+        shop_id : int
+            店舗ID
+        reserved_day : str
+            予約日
+        vacancy_flg : int
+            空き状況フラグ -> 0:空き無し, 1:空きあり, 2:空き少し
+        min_total_reserved_number : int, float, optional
+            合計予約人数の下限(この値を含む), by default None
+        max_total_reserved_number : int, float, optional
+            合計予約人数の上限(この値を含まない), by default None
+
+        Returns
+        -------
+        updated : bool
+            更新した場合True、合計予約人数が範囲外の場合False
+
+        """
+        key = {'shopId': shop_id, 'reservedDay': reserved_day}
+        update_expression = 'set vacancyFlg=:vacancy_flg'
+        conditions = ['attribute_exists(#total)']
+        expression_attribute_names = {'#total': 'totalReservedNumber'}
+        expression_value = {':vacancy_flg': vacancy_flg}
+        if min_total_reserved_number is not None:
+            conditions.append('#total >= :min_total')
+            expression_value[':min_total'] = Decimal(
+                str(min_total_reserved_number))
+        if max_total_reserved_number is not None:
+            conditions.append('#total < :max_total')
+            expression_value[':max_total'] = Decimal(
+                str(max_total_reserved_number))
+        return_value = "NONE"
+
+        try:
+            self._update_item_optional(key, update_expression,
+                                       ' AND '.join(conditions),
+                                       expression_attribute_names,
+                                       expression_value, return_value)
+        except ClientError as e:
+            if e.response['Error']['Code'] == \
+                    'ConditionalCheckFailedException':
+                return False
+            raise e
+        return True
+
+    def update_month_vacancy_flg(self, shop_id, reserved_day, vacancy_flg,
+                                 overwritable_vacancy_flgs=None,
+                                 max_reservable_number=None):
+        """
+        月毎の集約アイテムの、指定日の空き状況フラグを更新する
+        ※集約アイテムが無い場合は、その月の予約情報に指定日のフラグを反映して作成します
+        ※同時に作成された場合は、作成された集約アイテムに対して再度更新します
+        ※更新前のフラグにより更新しない場合は、集約アイテムを作成せずに終了します
+
+        Parameters
+        ----------
+        shop_id : int
+            店舗ID
+        reserved_day : str
+            予約日
+        vacancy_flg : int
+            空き状況フラグ -> 0:空き無し, 1:空きあり, 2:空き少し
+        overwritable_vacancy_flgs : list of int, optional
+            上書きを許可する更新前の空き状況フラグ, by default None
+            指定した場合、更新前のフラグが含まれない時は更新しない
+            (同時に予約があった場合に、古い空き状況で上書きしないために使用する)
+        max_reservable_number : int, optional
+            フラグの算出に使用した1日の予約可能人数, by default None
+            集約アイテムに記録した人数と異なる場合(席数、営業時間の変更時)は、
+            更新前のフラグに関わらず更新する
+
+        Returns
+        -------
+        updated : bool
+            更新した場合True、更新前のフラグにより更新しなかった場合False
+
+        """
+        reserved_year_month = reserved_day[:7]
+        key = {
+            'shopId': shop_id,
+            'reservedDay': self._get_month_summary_sort_key(
+                reserved_year_month),
+        }
+        day_index = int(reserved_day[8:10]) - 1
+        update_expression = \
+            f'set #flgs[{day_index}]=:vacancy_flg, updatedTime=:now'
+        conditions = ['attribute_exists(#flgs)']
+        expression_attribute_names = {'#flgs': 'vacancyFlgs'}
+        expression_value = {
+            ':vacancy_flg': vacancy_flg,
+            ':now': datetime.now(gettz('Asia/Tokyo')).strftime(
+                "%Y/%m/%d %H:%M:%S"),
+        }
+        if max_reservable_number is not None:
+            update_expression += ', #max=:max_reservable_number'
+            expression_attribute_names['#max'] = 'maxReservableNumber'
+            expression_value[':max_reservable_number'] = \
+                max_reservable_number
+        if overwritable_vacancy_flgs is not None:
+            value_names = []
+            for index, overwritable_vacancy_flg in enumerate(
+                    overwritable_vacancy_flgs):
+                expression_value[f':overwritable{index}'] = \
+                    overwritable_vacancy_flg
+                value_names.append(f':overwritable{index}')
+            overwritable_condition = \
+                f'#flgs[{day_index}] IN ({", ".join(value_names)})'
+            # 予約可能人数が変わった場合は、フラグが逆向きに遷移するため上書きを許可する
+            if max_reservable_number is not None:
+                overwritable_condition = (
+                    f'({overwritable_condition} OR '
+                    'attribute_not_exists(#max) OR '
+                    '#max <> :max_reservable_number)')
+            conditions.append(overwritable_condition)
+        return_value = "NONE"
+
+        for _ in range(2):
+            try:
+                self._update_item_optional(
+                    key, update_expression, ' AND '.join(conditions),
+                    expression_attribute_names, expression_value,
+                    return_value,
+                    return_values_on_condition_check_failure='ALL_OLD')
+                return True
+            except ClientError as e:
+                if e.response['Error']['Code'] != \
+                        'ConditionalCheckFailedException':
+                    raise e
+                # 更新前のアイテムが返却された場合は集約アイテムが存在するため、
+                # 更新前のフラグによる条件で更新されなかった(作成のための読み込みは行わない)
+                if e.response.get('Item'):
+                    return False
+            if self._put_month_summary(shop_id, reserved_year_month,
+                                       reserved_day, vacancy_flg,
+                                       overwritable_vacancy_flgs,
+                                       max_reservable_number):
+                return True
+        return False
+
+    def get_month_summaries(self, shop_id, reserved_year_months):
+        """
+        月毎の集約アイテムから、日毎の空き状況フラグを取得する
+
+        Parameters
+        ----------
+        shop_id : int
+            店舗ID
+        reserved_year_months : list of str
+            予約年月(YYYY-MM)のリスト
+
+        Returns
+        -------
+        month_summaries : dict
+            予約年月をキー、日毎の空き状況フラグのリストを値としたdict
+            リストは1日から順に並び、予約情報が無い日は-1
+            集約アイテムが無い年月はキーに含まれません
+
+        """
+        keys = [{'shopId': shop_id,
+                 'reservedDay': self._get_month_summary_sort_key(
+                     reserved_year_month)}
+                for reserved_year_month in reserved_year_months]
+
+        try:
+            items = self._batch_get_items(
+                keys, attributes=['reservedDay', 'vacancyFlgs'])
+        except Exception as e:
+            raise e
+        return {item['reservedDay'][len(MONTH_SUMMARY_PREFIX):]:
+                item['vacancyFlgs'] for item in items}
+
+    def _put_month_summary(self, shop_id, reserved_year_month, reserved_day,
+                           vacancy_flg, overwritable_vacancy_flgs=None,
+                           max_reservable_number=None):
+        """
+        月毎の集約アイテムを、その月の予約情報に指定日のフラグを反映して作成する
+        ※既に集約アイテムが存在する場合は作成しません
+
+        Parameters
+        ----------
+        shop_id : int
+            店舗ID
+        reserved_year_month : str
+            予約年月(YYYY-MM)
+        reserved_day : str
+            空き状況フラグを反映する予約日
+        vacancy_flg : int
+            空き状況フラグ -> 0:空き無し, 1:空きあり, 2:空き少し
+        overwritable_vacancy_flgs : list of int, optional
+            上書きを許可する予約情報のフラグ, by default None
+        max_reservable_number : int, optional
+            フラグの算出に使用した1日の予約可能人数, by default None
+
+        Returns
+        -------
+        created : bool
+            作成した場合True、既に存在した場合False
+
+        """
+        vacancy_flgs = [NO_RESERVATION_VACANCY_FLG] * MAX_DAYS_IN_MONTH
+        for one_day_info in self.query_day_range(
+                shop_id, reserved_year_month + '-01',
+                reserved_year_month + '-31',
+                attributes=['reservedDay', 'vacancyFlg',
+                            'totalReservedNumber']):
+            # 予約人数が0の日(予約に失敗した日等)は、予約情報が無い日とする
+            if not one_day_info.get('totalReservedNumber'):
+                continue
+            vacancy_flgs[int(one_day_info['reservedDay'][8:10]) - 1] = \
+                one_day_info['vacancyFlg']
+        # 予約情報の読み込み後に同時に予約があった場合は、新しいフラグを残す
+        day_index = int(reserved_day[8:10]) - 1
+        if overwritable_vacancy_flgs is None or \
+                vacancy_flgs[day_index] in overwritable_vacancy_flgs:
+            vacancy_flgs[day_index] = vacancy_flg
+
+        # 月末日を基準にデータ削除時間を設定する
+        next_month = datetime.strptime(reserved_year_month, '%Y-%m') + \
+            timedelta(days=MAX_DAYS_IN_MONTH + 1)
+        now = datetime.now(gettz('Asia/Tokyo')).strftime("%Y/%m/%d %H:%M:%S")
+        item = {
+            'shopId': shop_id,
+            'reservedDay': self._get_month_summary_sort_key(
+                reserved_year_month),
+            'vacancyFlgs': vacancy_flgs,
+            'expirationDate': utils.get_ttl_time(
+                next_month.replace(day=1) - timedelta(days=1)),
+            'createdTime': now,
+            'updatedTime': now,
+        }
+        if max_reservable_number is not None:
+            item['maxReservableNumber'] = max_reservable_number
+
+        try:
+            self._put_item_optional(item, 'attribute_not_exists(reservedDay)')
+        except ClientError as e:
+            if e.response['Error']['Code'] == \
+                    'ConditionalCheckFailedException':
+                return False
+            raise e
+        return True
+
+    def _get_month_summary_sort_key(self, reserved_year_month):
+        """
+        月毎の集約アイテムのソートキーを取得する
+
+        Parameters
+        ----------
+        reserved_year_month : str
+            予約年月(YYYY-MM)
+
+        Returns
+        -------
+        sort_key : str
+            集約アイテムのreservedDayの値(例:MONTH#2021-05)
+
+        """
+        return MONTH_SUMMARY_PREFIX + reserved_year_month
+
+    def get_item(self, shop_id, reserved_day, attributes=None):
         """
         データ取得
 
@@ -121,6 +727,9 @@ class RestaurantShopReservation(DynamoDB):
             店舗ID
         reserved_day : str
             予約日
+        attributes : list of str, optional
+            取得する属性名のリスト, by default None
+            指定しない場合は全ての属性
 
         Returns
         -------
@@ -131,11 +740,144 @@ class RestaurantShopReservation(DynamoDB):
         key = {'shopId': shop_id, 'reservedDay': reserved_day}
 
         try:
-            item = self._get_item(key)
+            item = self._get_item(key, attributes)
         except Exception as e:
             raise e
         return item
 
+    def get_reserved_info(self, shop_id, reserved_day):
+        """
+        30分毎の予約情報を取得
+
+        Parameters
+        ----------
+        shop_id : int
+            店舗ID
+        reserved_day : str
+            予約日
+
+        Returns
+        -------
+        reserved_info : list of dict
+            開始時刻順に並べた30分毎の人数、時間等の予約情報
+            指定日に予約がない場合、空のリスト
+
+        """
+        # 予約情報の作成に使用する属性のみ取得する
+        item = self.get_item(shop_id, reserved_day,
+                             attributes=RESERVED_INFO_ATTRIBUTES)
+
+        return self.convert_reserved_info(item)
+
+    def convert_reserved_info(self, item):
+        """
+        特定日の予約情報のアイテムから、30分毎の予約情報のリストを作成する
+        ※予約人数の配列(reservedSlots)形式に加え、旧形式のreservedInfo形式にも対応し、
+        同じ時間帯の予約人数は合算します
+
+        Parameters
+        ----------
+        item : dict
+            特定日の予約情報
+
+        Returns
+        -------
+        reserved_info : list of dict
+            開始時刻順に並べた30分毎の人数、時間等の予約情報
+
+        """
+        reserved_info = []
+        if 'reservedSlots' in item:
+            reserved_info = slot_array.decode_reserved_slots(
+                item['reservedSlots'], item['slotOpenTime'])
+
+        legacy_reserved_info = item.get('reservedInfo', [])
+        # 移行済みのデータは配列の変換結果をそのまま返却する
+        if not legacy_reserved_info:
+            return reserved_info
+
+        start_time_index = {}
+        for reserved_time_info in reserved_info + legacy_reserved_info:
+            start_time = reserved_time_info['reservedStartTime']
+            if start_time in start_time_index:
+                start_time_index[start_time]['reservedNumber'] += \
+                    reserved_time_info['reservedNumber']
+            else:
+                start_time_index[start_time] = dict(reserved_time_info)
+
+        return [start_time_index[start_time]
+                for start_time in sorted(start_time_index)]
+
+    def query_day_range(self, shop_id, reserved_day_from, reserved_day_to,
+                        attributes=None):
+        """
+        ベーステーブルのソートキー(reservedDay)の範囲指定で予約情報を取得する
+        ※月を跨ぐ期間も1回のqueryで取得できます
+
+        Parameters
+        ----------
+        shop_id : int
+            店舗ID
+        reserved_day_from : str
+            取得開始日(この日を含む)
+            YYYY-MM-DD の形式
+        reserved_day_to : str
+            取得終了日(この日を含む)
+            YYYY-MM-DD の形式
+        attributes : list of str, optional
+            取得する属性名のリスト, by default None
+            指定しない場合は全ての属性
+
+        Returns
+        -------
+        items : list
+            期間内の予約情報のリスト(予約日の昇順)
+
+        """
+        try:
+            items = self._query_range('shopId', shop_id, 'reservedDay',
+                                      reserved_day_from, reserved_day_to,
+                                      attributes=attributes)
+        except Exception as e:
+            raise e
+        return items
+
+    def query_reserved_slots_range(self, shop_id, reserved_day_from,
+                                   reserved_day_to, slot_open_time,
+                                   slot_count):
+        """
+        期間内の予約情報を、現在の営業時間の予約人数の配列として取得する
+        ※旧形式のデータや、営業時間の変更前に作成された配列も変換します
+
+        Parameters
+        ----------
+        shop_id : int
+            店舗ID
+        reserved_day_from : str
+            取得開始日(この日を含む)
+            YYYY-MM-DD の形式
+        reserved_day_to : str
+            取得終了日(この日を含む)
+            YYYY-MM-DD の形式
+        slot_open_time : str
+            配列の先頭の枠の開始時刻(営業開始時刻)
+        slot_count : int
+            配列の長さ(営業時間内の枠数)
+
+        Returns
+        -------
+        reserved_slots_by_day : dict
+            予約日をキー、枠毎の予約人数の配列を値としたdict
+
+        """
+        items = self.query_day_range(
+            shop_id, reserved_day_from, reserved_day_to,
+            attributes=['reservedDay'] + RESERVED_INFO_ATTRIBUTES)
+
+        return {item['reservedDay']: self.get_reserved_slots(
+                    item, slot_open_time, slot_count)
+                for item in items}
+
     def query_index_shop_id_reserved_year_month(self, shop_id, reserved_year_month):  # noqa: E501
         """
         queryメソッドを使用してshopId-reservedYearMonth-indexのインデックスからデータ取得
@@ -0,0 +1,154 @@
+"""
+30分毎の予約人数の配列(reservedSlots)操作用モジュール
+予約人数を、営業開始時刻からの30分枠の番号をindexとした数値の配列で保持します
+例:営業開始10:00の場合 -> [10:00-10:30の人数, 10:30-11:00の人数, ...]
+
+"""
+# 1枠の分数
+SLOT_MINUTES = 30
+
+
+def time_to_minutes(hour_minute):
+    """
+    HH:MM形式の時刻を0時からの分数に変換する
+
+    Parameters
+    ----------
+    hour_minute : str
+        HH:MM形式の時刻
+
+    Returns
+    -------
+    minutes : int
+        0時からの分数
+
+    """
+    hour, minute = hour_minute.split(':')
+    return int(hour) * 60 + int(minute)
+
+
+def minutes_to_time(minutes):
+    """
+    0時からの分数をHH:MM形式の時刻に変換する
+
+    Parameters
+    ----------
+    minutes : int
+        0時からの分数
+
+    Returns
+    -------
+    hour_minute : str
+        HH:MM形式の時刻
+
+    """
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+def get_slot_count(open_time, close_time):
+    """
+    営業時間内の枠数を取得する
+
+    Parameters
+    ----------
+    open_time : str
+        HH:MM形式の営業開始時刻
+    close_time : str
+        HH:MM形式の営業終了時刻
+
+    Returns
+    -------
+    slot_count : int
+        営業時間内の30分枠の数
+
+    """
+    return (time_to_minutes(close_time) -
+            time_to_minutes(open_time)) // SLOT_MINUTES
+
+
+def get_slot_index(open_time, start_time):
+    """
+    枠の開始時刻から、配列のindexを取得する
+
+    Parameters
+    ----------
+    open_time : str
+        HH:MM形式の営業開始時刻(配列の先頭の枠の開始時刻)
+    start_time : str
+        HH:MM形式の枠の開始時刻
+
+    Returns
+    -------
+    slot_index : int
+        配列のindex
+
+    """
+    minutes = time_to_minutes(start_time) - time_to_minutes(open_time)
+    if minutes < 0 or minutes % SLOT_MINUTES:
+        raise ValueError(
+            f'予約時刻が30分枠の開始時刻ではありません:{start_time}(営業開始{open_time})')  # noqa: E501
+    return minutes // SLOT_MINUTES
+
+
+def encode_reserved_info(reserved_info, open_time, slot_count):
+    """
+    30分毎の予約情報のリスト(reservedInfo形式)を、予約人数の配列に変換する
+    ※同じ枠の予約情報は合算し、配列の範囲外(営業時間外)の予約情報は含みません
+
+    Parameters
+    ----------
+    reserved_info : list of dict
+        reservedStartTime、reservedNumberを持つ30分毎の予約情報
+    open_time : str
+        HH:MM形式の営業開始時刻
+    slot_count : int
+        配列の長さ(営業時間内の枠数)
+
+    Returns
+    -------
+    reserved_slots : list of int
+        枠毎の予約人数の配列
+
+    """
+    open_minutes = time_to_minutes(open_time)
+    reserved_slots = [0] * slot_count
+    for reserved_time_info in reserved_info:
+        slot_index = (time_to_minutes(
+            reserved_time_info['reservedStartTime']) -
+            open_minutes) // SLOT_MINUTES
+        if 0 <= slot_index < slot_count:
+            reserved_slots[slot_index] += \
+                reserved_time_info['reservedNumber']
+    return reserved_slots
+
+
+def decode_reserved_slots(reserved_slots, open_time):
+    """
+    予約人数の配列を、30分毎の予約情報のリスト(reservedInfo形式)に変換する
+    ※予約人数が0の枠は含みません
+
+    Parameters
+    ----------
+    reserved_slots : list of int
+        枠毎の予約人数の配列
+    open_time : str
+        HH:MM形式の営業開始時刻
+
+    Returns
+    -------
+    reserved_info : list of dict
+        開始時刻順に並べた30分毎の人数、時間等の予約情報
+
+    """
+    open_minutes = time_to_minutes(open_time)
+    return [
+        {
+            'reservedStartTime': minutes_to_time(
+                open_minutes + slot_index * SLOT_MINUTES),
+            'reservedEndTime': minutes_to_time(
+                open_minutes + (slot_index + 1) * SLOT_MINUTES),
+            'reservedNumber': reserved_number,
+        }
+        for slot_index, reserved_number in enumerate(reserved_slots)
+        if reserved_number
+    ]
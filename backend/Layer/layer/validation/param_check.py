@@ -110,6 +110,42 @@ class ParamCheck():
         except ValueError:
             return f'年月形式エラー : {column_name}({columns})'
 
+    def check_month_range(self, columns_from, columns_to, column_name,
+                          max_months):
+        """
+        年月の期間をチェックする。
+        ※年月の形式チェック済みの項目を対象とします
+
+        Parameters
+        ----------
+        columns_from : obj
+            期間の開始年月
+        columns_to : obj
+            期間の終了年月
+        column_name: str
+            項目名
+        max_months : int
+            期間の最大月数
+
+        Returns
+        -------
+        str
+            エラー内容
+        """
+        # 日付のハイフンとスラッシュ区切りに対応
+        month_from = datetime.datetime.strptime(
+            columns_from.replace('-', '').replace('/', ''), "%Y%m")
+        month_to = datetime.datetime.strptime(
+            columns_to.replace('-', '').replace('/', ''), "%Y%m")
+        months = ((month_to.year - month_from.year) * 12
+                  + month_to.month - month_from.month + 1)
+
+        if months < 1:
+            return f'期間エラー（開始年月より前）:{column_name}({columns_to})'
+
+        if months > max_months:
+            return f'期間エラー（最大月数[{max_months}]超過）:{column_name}({columns_to})'  # noqa: E501
+
     def check_year_month_day(self, columns, column_name):
         """
         年月日の形式をチェックする。
@@ -157,3 +193,48 @@ class ParamCheck():
             datetime.datetime.strptime(columns_replaced, time_format)
         except ValueError:
             return f'時間形式エラー : {column_name}({columns})'
+
+    def check_time_slot(self, columns_from, columns_to, column_name,
+                        open_time, close_time, slot_minutes):
+        """
+        時間帯が営業時間内で、枠の単位に沿っているかをチェックする。
+        ※時間の形式チェック済みの項目を対象とします
+
+        Parameters
+        ----------
+        columns_from : obj
+            時間帯の開始時間
+        columns_to : obj
+            時間帯の終了時間
+        column_name: str
+            項目名
+        open_time : str
+            営業開始時間
+        close_time : str
+            営業終了時間
+        slot_minutes : int
+            枠の分数
+
+        Returns
+        -------
+        str
+            エラー内容
+        """
+        def to_minutes(time_str):
+            time = datetime.datetime.strptime(
+                time_str.replace(':', ''), '%H%M')
+            return time.hour * 60 + time.minute
+
+        minutes_from = to_minutes(columns_from)
+        minutes_to = to_minutes(columns_to)
+        open_minutes = to_minutes(open_time)
+
+        if minutes_from >= minutes_to:
+            return f'時間範囲エラー（開始時間以前）:{column_name}({columns_to})'
+
+        if minutes_from < open_minutes or minutes_to > to_minutes(close_time):
+            return f'時間範囲エラー（営業時間[{open_time}-{close_time}]外）:{column_name}({columns_from}-{columns_to})'  # noqa: E501
+
+        if (minutes_from - open_minutes) % slot_minutes or \
+                (minutes_to - open_minutes) % slot_minutes:
+            return f'時間範囲エラー（[{slot_minutes}]分単位以外）:{column_name}({columns_from}-{columns_to})'  # noqa: E501
@@ -1,10 +1,15 @@
 from validation.param_check import ParamCheck
+from restaurant import slot_array
+
+# カレンダーを一度に取得できる最大月数
+CALENDAR_MAX_MONTHS = 12
 
 
 class RestaurantParamCheck(ParamCheck):
     def __init__(self, params):
         self.shop_id = params['shopId'] if 'shopId' in params else None
         self.preferred_year_month = params['preferredYearMonth'] if 'preferredYearMonth' in params else None  # noqa:E501
+        self.preferred_year_month_to = params['preferredYearMonthTo'] if 'preferredYearMonthTo' in params else None  # noqa:E501
         self.preferred_day = params['preferredDay'] if 'preferredDay' in params else None  # noqa:E501
         self.access_token = params['accessToken'] if 'accessToken' in params else None  # noqa: E501
         self.course_id = params['courseId'] if 'courseId' in params else None
@@ -21,12 +26,16 @@ class RestaurantParamCheck(ParamCheck):
     def check_api_shop_calendar(self):
         self.check_shop_id()
         self.check_preferred_year_month()
+        if self.preferred_year_month_to is not None:
+            self.check_preferred_year_month_to()
+        self.check_course_condition()
 
         return self.error_msg
 
     def check_api_reservation_time(self):
         self.check_shop_id()
         self.check_preferred_day()
+        self.check_course_condition()
 
         return self.error_msg
 
@@ -48,6 +57,15 @@ class RestaurantParamCheck(ParamCheck):
 
         return self.error_msg
 
+    def check_api_reservation_put_shop_hours(self, open_time, close_time):
+        """
+        予約時間帯を店舗の営業時間でチェックする。
+        ※店舗情報の取得後に、check_api_reservation_putでエラーが無い場合に実施します
+        """
+        self.check_reservation_time_slot(open_time, close_time)
+
+        return self.error_msg
+
     def check_shop_id(self):
         if error := self.check_required(self.shop_id, 'shopId'):
             self.error_msg.append(error)
@@ -66,6 +84,22 @@ class RestaurantParamCheck(ParamCheck):
                                           'preferredYearMonth'):
             self.error_msg.append(error)
 
+    def check_preferred_year_month_to(self):
+        if error := self.check_year_month(self.preferred_year_month_to,
+                                          'preferredYearMonthTo'):
+            self.error_msg.append(error)
+            return
+
+        # 開始年月の形式エラー時は期間のチェックを行わない
+        if self.error_msg:
+            return
+
+        if error := self.check_month_range(self.preferred_year_month,
+                                           self.preferred_year_month_to,
+                                           'preferredYearMonthTo',
+                                           CALENDAR_MAX_MONTHS):
+            self.error_msg.append(error)
+
     def check_preferred_day(self):
         if error := self.check_required(self.preferred_day, 'preferredDay'):
             self.error_msg.append(error)
@@ -75,6 +109,17 @@ class RestaurantParamCheck(ParamCheck):
                                               'preferredDay'):
             self.error_msg.append(error)
 
+    def check_course_condition(self):
+        """
+        予約可能な日時の判定に使用するコースと予約人数をチェックする。
+        ※どちらも指定しない場合はチェックしません
+        """
+        if self.course_id is None and self.reservation_people_number is None:
+            return
+
+        self.check_course_id()
+        self.check_reservation_people_number()
+
     def check_access_token(self):
         if error := self.check_required(self.access_token, 'accessToken'):
             self.error_msg.append(error)
@@ -142,6 +187,14 @@ class RestaurantParamCheck(ParamCheck):
             self.error_msg.append(error)
             return
 
+    def check_reservation_time_slot(self, open_time, close_time):
+        if error := self.check_time_slot(self.reservation_starttime,
+                                         self.reservation_endtime,
+                                         'reservationEndtime',
+                                         open_time, close_time,
+                                         slot_array.SLOT_MINUTES):
+            self.error_msg.append(error)
+
     def check_reservation_people_number(self):
         if error := self.check_required(self.reservation_people_number, 'reservationPeopleNumber'):  # noqa 501
             self.error_msg.append(error)
@@ -2,13 +2,18 @@ import logging
 import datetime
 from dateutil.tz import gettz
 import os
-import boto3
-import json
+import itertools
+import uuid
+from concurrent.futures import (ThreadPoolExecutor, as_completed)
 
-from common import (line, utils)
+# 読み込み時間の計測開始点とするため、最初にimportする
+from common import lazy_loader
+from common import (line, rate_limiter, response_encoder, utils)
 # DynamoDB操作クラスのインポート
 from common.remind_message import RemindMessage
-from common.channel_access_token import ChannelAccessToken
+from common.channel_access_token import (
+    ChannelAccessToken, ChannelAccessTokenProvider)
+from restaurant import flex_message_builder
 
 
 # ログ出力の設定
@@ -19,46 +24,260 @@ if LOGGER_LEVEL == 'DEBUG':
 else:
     logger.setLevel(logging.INFO)
 
-# テーブルの宣言
-remind_message_table_controller = RemindMessage()
-channel_access_token_table_controller = ChannelAccessToken()
+# テーブルの宣言(初回アクセス時に初期化する)
+remind_message_table_controller = lazy_loader.LazyObject(RemindMessage)
+channel_access_token_table_controller = lazy_loader.LazyObject(ChannelAccessToken)  # noqa: E501
+# チャネル毎のトークンを1度だけ読み込み、コンテナ内で期限日まで使い回す
+channel_access_token_provider = ChannelAccessTokenProvider(
+    channel_access_token_table_controller)
 
+# チャネル情報を一括取得する単位のメッセージ件数
+MESSAGE_CHUNK_SIZE = 100
+# プッシュメッセージを同時に送信するスレッド数
+PUSH_MAX_WORKERS = int(os.getenv('PUSH_MAX_WORKERS', 10))
+# 呼び出し回数の制限超過時に、1件のメッセージを送信する最大回数
+PUSH_MAX_ATTEMPTS = int(os.getenv('PUSH_MAX_ATTEMPTS', 5))
+# メッセージIDからリトライキーを作成する際の名前空間
+RETRY_KEY_NAMESPACE = uuid.NAMESPACE_OID
 
-def send_message_from_dynamodb():
+
+def send_message_from_dynamodb(max_workers=None):
     """
     テーブルに登録されたデータを取得し、プッシュメッセージ送信を行う。
+    送信はスレッドプールで並行して行う。
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        同時に送信するスレッド数, by default None
+        指定しない場合は環境変数PUSH_MAX_WORKERSの値
+
+    Returns
+    -------
+    results : list of dict
+        メッセージ毎の送信結果
     """
 
     # 本日送信のメッセージをDynamoテーブルから取得する
     today = datetime.datetime.strftime(
         (datetime.datetime.now(gettz('Asia/Tokyo')).date()), '%Y-%m-%d')
 
-    today_messages = remind_message_table_controller.query_index_remind_date(
-        today)
-
-    # NOTE: [queryの検索]データが0件→Items有り [get_itemの検索]データが0件→ItemsというKey自体無し
-    if not today_messages:
-        return
+    # 1MBを超える件数でも取りこぼさないよう、ページ単位で順次取得する
+    # 未送信のメッセージのみを含むindexから取得するため、送信に失敗した
+    # メッセージは次回の実行で再度送信され、送信済みのメッセージは読み込まない
+    today_messages = \
+        remind_message_table_controller.query_index_pending_remind_date_iter(
+            today)
 
     # MEMO: Lambdaの実行時間が長くなる場合、SQSに一度保存した後に他Lambdaでポーリングさせることを考える。
     # MEMO: 上の場合 (EventBridge→Lambda→SQS→Lambda)
-    for message_item in today_messages:
-        # Decimal型をintに変換
-        message_info = json.loads(json.dumps(
-            message_item['messageInfo'],
-            default=utils.decimal_to_int))
-        try:
-            channel_info = channel_access_token_table_controller.get_item(
-                message_info['channelId'])
-            line.send_push_message(channel_info['channelAccessToken'],
-                                   message_info['messageBody'],
-                                   message_info['userId'])
-        except Exception as e:
-            logger.exception(
-                'プッシュメッセージ送信でエラーが発生しました。該当メッセージを確認してください。メッセージID：%s',
-                message_item['id'])
-            logger.exception('エラー内容: %s', e)
-            continue
+    results = []
+    with ThreadPoolExecutor(
+            max_workers=max_workers or PUSH_MAX_WORKERS) as executor:
+        while message_items := list(
+                itertools.islice(today_messages, MESSAGE_CHUNK_SIZE)):
+            # Decimal型をintに変換
+            message_infos = [
+                response_encoder.to_native(message_item['messageInfo'])
+                for message_item in message_items]
+
+            # 送信先チャネルのトークンをまとめて取得する(取得済みのチャネルは読み込まない)
+            channel_access_tokens = channel_access_token_provider.get_tokens(
+                message_info['channelId'] for message_info in message_infos)
+            for channel_id in {message_info['channelId']
+                               for message_info in message_infos
+                               } - channel_access_tokens.keys():
+                logger.warning('チャネルアクセストークンが存在しないため、'
+                               '該当チャネルの送信をスキップします channelId:%s',
+                               channel_id)
+
+            # 同時送信数を抑えるため、チャンク内の送信が終わってから次のチャンクを取得する
+            results.extend(send_push_messages(
+                executor, message_items, message_infos,
+                channel_access_tokens))
+
+    return results
+
+
+def send_push_messages(executor, message_items, message_infos,
+                       channel_access_tokens):
+    """
+    プッシュメッセージを並行して送信する。
+    送信が完了したメッセージから順に、1件ずつ送信済みにする。
+    呼び出し回数の制限超過で送信できなかったメッセージは、再度送信キューに積み直す。
+    最終回も制限超過のメッセージは送信済みにせず、次回の実行で再送する。
+
+    Parameters
+    ----------
+    executor : concurrent.futures.ThreadPoolExecutor
+        送信に使用するスレッドプール
+    message_items : list of dict
+        メッセージテーブルのアイテムのリスト
+    message_infos : list of dict
+        Decimal型をintに変換したメッセージ情報のリスト
+    channel_access_tokens : dict
+        チャネルIDをキー、短期チャネルアクセストークンを値としたdict
+
+    Returns
+    -------
+    results : list of dict
+        メッセージ毎の送信結果
+    """
+    results = []
+    pending_messages = list(zip(message_items, message_infos))
+    for attempt in range(1, PUSH_MAX_ATTEMPTS + 1):
+        future_messages = {
+            executor.submit(send_push_message, *message,
+                            channel_access_tokens, attempt): message
+            for message in pending_messages}
+
+        throttled_messages = []
+        throttled_results = []
+        for future in as_completed(future_messages):
+            result = future.result()
+            # 制限超過のメッセージは結果に含めず積み直す
+            if result.get('throttled'):
+                throttled_messages.append(future_messages[future])
+                throttled_results.append(result)
+                continue
+            # 途中で実行が終了しても送信済みのメッセージを再送しないよう、すぐに登録する
+            # boto3のリソースはスレッドセーフではないため、送信スレッドではなくこのスレッドで行う
+            mark_sent_message(result)
+            results.append(result)
+        if not throttled_messages:
+            return results
+        pending_messages = throttled_messages
+        if attempt < PUSH_MAX_ATTEMPTS:
+            logger.info('呼び出し回数の制限超過により再送します 件数:%d 試行回数:%d',
+                        len(throttled_messages), attempt)
+
+    # 未送信(pendingRemindDateあり)のまま残し、次回の実行で取得されるようにする
+    logger.warning('呼び出し回数の制限超過により、次回の実行で再送します 件数:%d',
+                   len(throttled_results))
+    results.extend(throttled_results)
+    return results
+
+
+def send_push_message(message_item, message_info, channel_access_tokens,
+                      attempt=1):
+    """
+    1件のプッシュメッセージを送信し、送信結果を返却する。
+    送信に失敗した場合もエラーとせず、他のメッセージの送信を継続する。
+    トークンが存在しないチャネルのメッセージは送信せず、未送信のまま次回の実行に残す。
+    チャネル毎の呼び出し回数の上限を超えないよう、送信前に待機する。
+    ※送信スレッドから呼び出すため、DynamoDBへのアクセスは行わない。
+
+    Parameters
+    ----------
+    message_item : dict
+        メッセージテーブルのアイテム
+    message_info : dict
+        Decimal型をintに変換したメッセージ情報
+    channel_access_tokens : dict
+        チャネルIDをキー、短期チャネルアクセストークンを値としたdict
+    attempt : int, optional
+        このメッセージの送信回数(1始まり), by default 1
+
+    Returns
+    -------
+    result : dict
+        メッセージIDと送信結果
+        呼び出し回数の制限超過の場合、throttledをTrueとする
+    """
+    channel_access_token = channel_access_tokens.get(
+        message_info['channelId'])
+    if channel_access_token is None:
+        return {'id': message_item['id'], 'sent': False,
+                'error': 'channel access token not found'}
+
+    channel_rate_limiter = rate_limiter.get_rate_limiter(
+        message_info['channelId'])
+    try:
+        flex_message = get_message_body(message_info)
+        channel_rate_limiter.acquire()
+        line.send_push_message(
+            channel_access_token,
+            flex_message,
+            message_info['userId'],
+            create_retry_key(message_item['id']),
+            message_info['channelId'])
+    except line.LineRateLimitError as e:
+        # 同じチャネルの送信をまとめて待機させる
+        channel_rate_limiter.pause(
+            rate_limiter.get_backoff_delay(attempt, e.retry_after))
+        logger.warning('呼び出し回数の制限を超過しました。メッセージID：%s', message_item['id'])
+        return {'id': message_item['id'], 'sent': False, 'throttled': True,
+                'error': str(e)}
+    except Exception as e:
+        logger.exception(
+            'プッシュメッセージ送信でエラーが発生しました。該当メッセージを確認してください。メッセージID：%s',
+            message_item['id'])
+        logger.exception('エラー内容: %s', e)
+        return {'id': message_item['id'], 'sent': False, 'error': str(e)}
+
+    return {'id': message_item['id'], 'sent': True}
+
+
+def create_retry_key(message_id):
+    """
+    メッセージIDからプッシュメッセージ送信のリトライキーを作成する。
+    送信後に送信済みの登録ができなかった場合も、再実行時にLINE側で二重送信を防ぐ。
+
+    Parameters
+    ----------
+    message_id : str
+        メッセージID
+
+    Returns
+    -------
+    retry_key : str
+        メッセージIDから一意に決まるUUID形式の文字列
+    """
+    return str(uuid.uuid5(RETRY_KEY_NAMESPACE, message_id))
+
+
+def mark_sent_message(result):
+    """
+    送信に成功したメッセージを送信済みにし、再実行時に二重送信しないようにする。
+    送信済みの登録に失敗した場合もエラーとせず、送信を継続する。
+
+    Parameters
+    ----------
+    result : dict
+        send_push_messageで取得したメッセージの送信結果
+    """
+    if not result['sent']:
+        return
+    try:
+        if not remind_message_table_controller.mark_sent(result['id']):
+            logger.warning('既に送信済みのメッセージです。メッセージID：%s', result['id'])
+    except Exception as e:
+        # 送信は完了しているため、送信結果は成功とする
+        logger.exception('送信済みの登録でエラーが発生しました。メッセージID：%s',
+                         result['id'])
+        logger.exception('エラー内容: %s', e)
+
+
+def get_message_body(message_info):
+    """
+    送信するフレックスメッセージを取得する。
+    テンプレートIDで登録されたメッセージは、テンプレートパラメータからメッセージを作成する。
+
+    Parameters
+    ----------
+    message_info : dict
+        Decimal型をintに変換したメッセージ情報
+
+    Returns
+    -------
+    flex_message : dict or str
+        フレックスメッセージ
+        テンプレートから作成した場合は、シリアライズ済みのJSON文字列
+    """
+    if 'templateId' in message_info:
+        return flex_message_builder.render_template(
+            message_info['templateId'], message_info['templateParams'])
+    return message_info['messageBody']
 
 
 def lambda_handler(event, context):
@@ -80,9 +299,19 @@ def lambda_handler(event, context):
     logger.info(event)
 
     try:
-        send_message_from_dynamodb()
+        results = send_message_from_dynamodb()
     except Exception as e:
         logger.exception('Occur Exception: %s', e)
         return utils.create_error_response('ERROR')
 
+    failed_ids = [result['id'] for result in results if not result['sent']]
+    throttled_number = sum(
+        1 for result in results if result.get('throttled'))
+    logger.info('プッシュメッセージ送信結果 送信件数:%d 失敗件数:%d(うち制限超過:%d) '
+                '失敗メッセージID:%s', len(results) - len(failed_ids),
+                len(failed_ids), throttled_number, failed_ids)
+
     return utils.create_success_response('OK')
+
+
+lazy_loader.log_import_time(__name__)
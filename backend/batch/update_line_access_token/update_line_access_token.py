@@ -1,11 +1,12 @@
 import os
 import logging
 import json
-import requests
 from datetime import (datetime, timedelta)
 from dateutil.tz import gettz
 
-from common import common_const as const
+# 読み込み時間の計測開始点とするため、最初にimportする
+from common import lazy_loader
+from common import line_transport
 from common.channel_access_token import ChannelAccessToken
 
 # 環境変数
@@ -17,8 +18,8 @@ if LOGGER_LEVEL == 'DEBUG':
 else:
     logger.setLevel(logging.INFO)
 
-# テーブル操作クラスの初期化
-channel_access_token_table_controller = ChannelAccessToken()
+# テーブル操作クラスの初期化(初回アクセス時に初期化する)
+channel_access_token_table_controller = lazy_loader.LazyObject(ChannelAccessToken)  # noqa: E501
 
 
 def update_limited_channel_access_token(channel_id, channel_access_token):  # noqa 501
@@ -61,11 +62,8 @@ def get_channel_access_token(channel_id, channel_secret):
         'client_secret': channel_secret
     }
 
-    response = requests.post(
-        const.const.API_ACCESSTOKEN_URL,
-        headers=headers,
-        data=body
-    )
+    response = line_transport.post('access_token', headers=headers,
+                                   data=body)
     logger.debug('new_channel_access_token %s', response.text)
     res_body = json.loads(response.text)
 
@@ -81,7 +79,9 @@ def lambda_handler(event, contexts):
     event
         channel_access_token:短期チャネルアクセストークン
     """
-    channel_access_token_info = channel_access_token_table_controller.scan()
+    # テーブルをセグメントに分割して並列に取得する(並列度は環境変数SCAN_TOTAL_SEGMENTS)
+    channel_access_token_info = \
+        channel_access_token_table_controller.parallel_scan_iter()
     for item in channel_access_token_info:
         # 途中処理でエラーが発生した場合でも後続処理が走るようにする
         try:
@@ -109,3 +109,6 @@ def lambda_handler(event, contexts):
         except Exception as e:
             logger.error('Occur Exception: %s', e)
             continue
+
+
+lazy_loader.log_import_time(__name__)
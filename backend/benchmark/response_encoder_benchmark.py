@@ -0,0 +1,152 @@
+"""
+APIレスポンスのJSON変換のベンチマーク
+従来のjson.dumps(default=decimal_to_int)とresponse_encoderの処理時間を比較します
+
+実行方法(backendディレクトリで実行):
+    PYTHONPATH=Layer/layer python benchmark/response_encoder_benchmark.py
+"""
+from decimal import Decimal
+import glob
+import json
+import os
+import timeit
+
+from common import response_encoder
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'APP',
+                        'dynamodb_data')
+# 計測の繰り返し回数
+NUMBER = 200
+# 店舗一覧の店舗数(サンプルデータを複製して増やす)
+SHOP_COUNT = 300
+# カレンダーの月数
+CALENDAR_MONTHS = 12
+
+
+def decimal_to_int(obj):
+    """
+    従来のjson.dumpsのdefaultに指定していた、Decimal型をint型に変換する関数
+
+    Parameters
+    ----------
+    obj : obj
+        Decimal型の可能性があるオブジェクト
+
+    Returns
+    -------
+    int, other
+        Decimal型の場合int型で返す。
+    """
+    if isinstance(obj, Decimal):
+        return int(obj)
+
+
+def load_shop_items():
+    """
+    サンプルの店舗データをDynamoDBから取得した形式(数値はDecimal型)で読み込む
+
+    Returns
+    -------
+    shop_items : list of dict
+        店舗データのリスト
+    """
+    shop_items = []
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, '*.json'))):
+        with open(path, encoding='utf-8') as f:
+            shop_items.append(json.load(f, parse_int=Decimal,
+                                        parse_float=Decimal))
+    return shop_items
+
+
+def create_shop_list_payload(shop_items):
+    """
+    地域毎の店舗一覧のレスポンスを作成する
+
+    Parameters
+    ----------
+    shop_items : list of dict
+        店舗データのリスト
+
+    Returns
+    -------
+    payload : list of dict
+        地域毎の店舗情報のリスト
+    """
+    area_shop_dict = {}
+    for index in range(SHOP_COUNT):
+        shop_item = shop_items[index % len(shop_items)]
+        area = area_shop_dict.setdefault(shop_item['areaId'], {
+            'areaId': shop_item['areaId'],
+            'areaName': shop_item['areaName'], 'shop': []})
+        area['shop'].append(dict(shop_item['shop'], shopId=Decimal(index)))
+    return list(area_shop_dict.values())
+
+
+def create_calendar_payload():
+    """
+    1年分の予約カレンダーのレスポンスを作成する
+
+    Returns
+    -------
+    payload : dict
+        月毎の予約カレンダー
+    """
+    return {'calendars': [
+        {'shopId': Decimal(1), 'year_month': f'2021-{month:02}',
+         'reservedDays': [
+             {'reservedDay': f'2021-{month:02}-{day:02}',
+              'vacancyFlg': Decimal(day % 3),
+              'totalReservedNumber': Decimal(day * 7)}
+             for day in range(1, 32)]}
+        for month in range(1, CALENDAR_MONTHS + 1)]}
+
+
+def measure(func):
+    """
+    処理時間を計測する
+
+    Parameters
+    ----------
+    func : function
+        計測する処理
+
+    Returns
+    -------
+    elapsed : float
+        1回あたりの処理時間(マイクロ秒)
+    """
+    return min(timeit.repeat(func, number=NUMBER, repeat=3)) / NUMBER * 1e6
+
+
+def main():
+    shop_list = create_shop_list_payload(load_shop_items())
+    calendar = create_calendar_payload()
+    message_info = {
+        'messageType': 'push', 'userId': 'U0', 'channelId': '0',
+        'templateId': 'restaurantRemind',
+        'templateParams': {'shopName': '店舗', 'courseName': 'コース',
+                           'reservationDate': '2021-05-01 10:00-12:00',
+                           'numberOfPeople': '2',
+                           'remindDateDifference': Decimal(-1)}}
+
+    print(f'backend: {response_encoder.JSON_BACKEND}')
+    for name, payload in [('shop list', shop_list), ('calendar', calendar)]:
+        assert json.loads(response_encoder.dumps(payload)) == json.loads(
+            json.dumps(payload, default=decimal_to_int))
+        before = measure(lambda: json.dumps(
+            payload, default=decimal_to_int, ensure_ascii=False))
+        after = measure(lambda: response_encoder.dumps(payload))
+        print(f'{name:<12} json.dumps: {before:9.1f}us  '
+              f'response_encoder.dumps: {after:9.1f}us  '
+              f'({before / after:.1f}x)')
+
+    before = measure(lambda: json.loads(json.dumps(
+        message_info, default=decimal_to_int)))
+    after = measure(lambda: response_encoder.to_native(message_info))
+    print(f'{"message":<12} json round trip: {before:6.1f}us  '
+          f'response_encoder.to_native: {after:6.1f}us  '
+          f'({before / after:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
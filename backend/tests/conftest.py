@@ -0,0 +1,126 @@
+"""
+テスト共通設定
+Lambdaの実行環境と同じく、レイヤーと関数のディレクトリをimportパスに追加し、
+motoでモックしたDynamoDBのテーブルを作成します
+
+実行方法(backendディレクトリで実行):
+    pip install -r Layer/layer/requirements.txt -r tests/requirements.txt
+    python -m pytest -q
+"""
+import os
+import sys
+
+import pytest
+# botocoreのセッションの作成前にimportし、モックの処理を登録しておく
+from moto import mock_aws
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..')
+
+# 関数のモジュールはimport時に環境変数を読み込むため、importより前に設定する
+os.environ.update({
+    'AWS_DEFAULT_REGION': 'ap-northeast-1',
+    'AWS_ACCESS_KEY_ID': 'testing',
+    'AWS_SECRET_ACCESS_KEY': 'testing',
+    'SHOP_INFO_TABLE': 'RestaurantShopMaster',
+    'SHOP_RESERVATION_TABLE': 'RestaurantShopReservation',
+    'CUSTOMER_RESERVATION_TABLE': 'RestaurantReservationInfo',
+    'CHANNEL_ACCESS_TOKEN_DB': 'LINEChannelAccessTokenRestaurant',
+    'MESSAGE_DB': 'RemindMessageTableRestaurant',
+    'REMIND_DATE_DIFFERENCE': '-1',
+    'TTL_DAY': '10',
+    'OA_CHANNEL_ID': 'oa_channel_id',
+    'LIFF_CHANNEL_ID': 'liff_channel_id',
+})
+for path in [os.path.join('Layer', 'layer'),
+             os.path.join('APP', 'dynamodb_data'),
+             os.path.join('APP', 'reservation_put'),
+             os.path.join('APP', 'reservation_time_get'),
+             os.path.join('APP', 'shop_calendar_get'),
+             os.path.join('APP', 'shop_list_get'),
+             os.path.join('batch', 'messaging_put_dynamo')]:
+    sys.path.insert(0, os.path.join(BACKEND_DIR, path))
+
+# テーブル名、キー(属性名, 型)、GSI(インデックス名, ハッシュキー, レンジキー)のリスト
+TABLE_DEFINITIONS = [
+    ('RestaurantShopMaster', ('shopId', 'N'), None, []),
+    ('RestaurantShopReservation', ('shopId', 'N'), ('reservedDay', 'S'),
+     [('shopId-reservedYearMonth-index', ('shopId', 'N'),
+       ('reservedYearMonth', 'S'))]),
+    ('RestaurantReservationInfo', ('reservationId', 'S'), None, []),
+    ('LINEChannelAccessTokenRestaurant', ('channelId', 'S'), None, []),
+    ('RemindMessageTableRestaurant', ('id', 'S'), None,
+     [('remindDate-index', ('remindDate', 'S'), None),
+      ('pendingRemindDate-index', ('pendingRemindDate', 'S'), None)]),
+]
+
+
+def create_table(client, table_name, hash_key, range_key, indexes):
+    """
+    テスト用のテーブルを作成する
+
+    Parameters
+    ----------
+    client : botocore.client.DynamoDB
+        DynamoDBのクライアント
+    table_name : str
+        テーブル名
+    hash_key : tuple
+        ハッシュキーの属性名と型
+    range_key : tuple
+        レンジキーの属性名と型(無い場合はNone)
+    indexes : list of tuple
+        GSIのインデックス名、ハッシュキー、レンジキー(無い場合はNone)のリスト
+
+    """
+    attributes = {}
+    key_schema = []
+    for key, key_type in [(hash_key, 'HASH'), (range_key, 'RANGE')]:
+        if key:
+            attributes[key[0]] = key[1]
+            key_schema.append({'AttributeName': key[0], 'KeyType': key_type})
+    options = {}
+    global_secondary_indexes = []
+    for index_name, index_hash_key, index_range_key in indexes:
+        index_key_schema = []
+        for key, key_type in [(index_hash_key, 'HASH'),
+                              (index_range_key, 'RANGE')]:
+            if key:
+                attributes[key[0]] = key[1]
+                index_key_schema.append(
+                    {'AttributeName': key[0], 'KeyType': key_type})
+        global_secondary_indexes.append({
+            'IndexName': index_name,
+            'KeySchema': index_key_schema,
+            'Projection': {'ProjectionType': 'ALL'},
+        })
+    if global_secondary_indexes:
+        options['GlobalSecondaryIndexes'] = global_secondary_indexes
+    client.create_table(
+        TableName=table_name,
+        AttributeDefinitions=[
+            {'AttributeName': name, 'AttributeType': attribute_type}
+            for name, attribute_type in attributes.items()],
+        KeySchema=key_schema, BillingMode='PAY_PER_REQUEST', **options)
+
+
+@pytest.fixture
+def dynamodb():
+    """
+    motoでモックしたDynamoDBに全テーブルを作成する
+
+    Yields
+    ------
+    resource : boto3.resources.base.ServiceResource
+        DynamoDBのresource
+    """
+    import boto3
+    from restaurant.restaurant_shop_master import shop_master_cache
+
+    with mock_aws():
+        client = boto3.client('dynamodb')
+        for table_definition in TABLE_DEFINITIONS:
+            create_table(client, *table_definition)
+        # 前のテストで取得した店舗情報を使わないようにする
+        shop_master_cache.invalidate()
+        yield boto3.resource('dynamodb')
+        shop_master_cache.invalidate()
@@ -0,0 +1,165 @@
+"""
+日×30分枠の空き状況計算(availability)と、予約可能な日時を返却するAPIのテスト
+"""
+from decimal import Decimal
+import json
+import os
+
+import pytest
+
+from restaurant import slot_array
+from restaurant.availability import ShopAvailability
+from restaurant.restaurant_shop_reservation import (
+    RestaurantShopReservation, VACANCY_FLG_MAP)
+
+SHOP_ID = 1
+RESERVED_DAY = '2030-05-10'
+# 10:00-23:00営業のため、1日は26枠
+SLOT_COUNT = 26
+SEATS_NUMBER = 10
+# 120分のコース(4枠)は、4枠毎に満席の枠がある日は開始できない
+FULL_SLOT_TIMES = ['11:30', '13:30', '15:30', '17:30', '19:30', '21:30']
+
+
+@pytest.fixture
+def shop_tables(dynamodb):
+    """席数を減らしたサンプルの店舗情報を登録する"""
+    data_path = os.path.join(os.path.dirname(__file__), '..', 'APP',
+                             'dynamodb_data', f'restaurant_{SHOP_ID}.json')
+    with open(data_path, encoding='utf-8') as f:
+        shop_item = json.load(f, parse_float=Decimal)
+    shop_item['shop']['seatsNumber'] = SEATS_NUMBER
+    dynamodb.Table('RestaurantShopMaster').put_item(Item=shop_item)
+    return dynamodb
+
+
+def put_reserved_slots(reserved_day, reserved_slots):
+    """指定日の予約人数の配列を登録する"""
+    RestaurantShopReservation().init_reserved_slots(
+        SHOP_ID, reserved_day, reserved_day[:7], '10:00', SLOT_COUNT,
+        VACANCY_FLG_MAP['AVAILABLE_MUCH'], reserved_slots=reserved_slots,
+        total_reserved_number=sum(reserved_slots.values()))
+
+
+def call(module, params):
+    """APIを呼び出し、ステータスコードとbodyを返却する(エラー時はbodyの文字列)"""
+    response = module.lambda_handler({'queryStringParameters': params}, None)
+    if response['statusCode'] != 200:
+        return response['statusCode'], response['body']
+    return response['statusCode'], json.loads(response['body'])
+
+
+def test_feasible_start_times():
+    """コースの時間中の全ての枠に予約人数分の空きがある開始時刻のみ返却する"""
+    shop_availability = ShopAvailability(
+        '10:00', '12:00', 4, {'2030-05-10': [4, 0, 2, 0]},
+        ['2030-05-10', '2030-05-11'])
+
+    assert shop_availability.get_feasible_start_times(60, 2) == {
+        '2030-05-10': ['10:30', '11:00'],
+        '2030-05-11': ['10:00', '10:30', '11:00']}
+    assert shop_availability.get_unavailable_days(60, 3) == ['2030-05-10']
+
+
+def test_over_reserved_slot_has_no_remaining_seats():
+    """席数を超えて予約された枠の残席数は0とする"""
+    shop_availability = ShopAvailability(
+        '10:00', '11:00', 4, {'2030-05-10': [6, 1]}, ['2030-05-10'])
+
+    assert shop_availability.get_remaining_seats() == [[0, 3]]
+
+
+def test_course_longer_than_opening_hours_is_unavailable():
+    """営業時間より長いコースは予約情報に関わらず予約できない"""
+    days = ['2030-05-10', '2030-05-11']
+    shop_availability = ShopAvailability('10:00', '11:00', 4, {}, days)
+
+    assert shop_availability.get_unavailable_days(90, 1) == days
+
+
+def test_reservation_time_without_course_keeps_response(shop_tables):
+    """コースを指定しない場合は、これまで通り予約情報のリストを返却する"""
+    import reservation_time_get
+    put_reserved_slots(RESERVED_DAY, {'10:30': 2})
+
+    status, body = call(reservation_time_get, {
+        'shopId': str(SHOP_ID), 'preferredDay': RESERVED_DAY})
+
+    assert status == 200
+    assert [reserved_time_info['reservedStartTime']
+            for reserved_time_info in body] == ['10:30']
+
+
+def test_reservation_time_returns_available_start_times(shop_tables):
+    """コースと予約人数を指定した場合は、予約できる開始時刻も返却する"""
+    import reservation_time_get
+    put_reserved_slots(RESERVED_DAY, {'10:30': 9, '20:00': 10})
+
+    status, body = call(reservation_time_get, {
+        'shopId': str(SHOP_ID), 'preferredDay': RESERVED_DAY,
+        'courseId': '1', 'reservationPeopleNumber': '2'})
+
+    assert status == 200
+    assert [reserved_time_info['reservedStartTime']
+            for reserved_time_info in body['reservedInfo']] == \
+        ['10:30', '20:00']
+    # 10:30と20:00の枠を含まず、23:00までに終了する開始時刻
+    assert body['availableStartTimes'] == [
+        slot_array.minutes_to_time(minutes)
+        for minutes in range(11 * 60, 18 * 60 + 1, slot_array.SLOT_MINUTES)
+    ] + ['20:30', '21:00']
+
+
+@pytest.mark.parametrize('params, status', [
+    ({'courseId': '99', 'reservationPeopleNumber': '2'}, 400),
+    ({'reservationPeopleNumber': '2'}, 400),
+    ({'courseId': '1', 'reservationPeopleNumber': 'two'}, 400),
+])
+def test_reservation_time_rejects_invalid_course(shop_tables, params, status):
+    """存在しないコースや、コースと予約人数の片方のみの指定はエラーとする"""
+    import reservation_time_get
+
+    response_status, _ = call(reservation_time_get, {
+        'shopId': str(SHOP_ID), 'preferredDay': RESERVED_DAY, **params})
+
+    assert response_status == status
+
+
+def test_shop_calendar_returns_unavailable_days(shop_tables):
+    """コースと予約人数を指定した場合は、予約できない日も返却する"""
+    import shop_calendar_get
+    put_reserved_slots(RESERVED_DAY, dict.fromkeys(FULL_SLOT_TIMES, 10))
+    put_reserved_slots('2030-05-11', {'11:30': 10})
+
+    status, body = call(shop_calendar_get, {
+        'shopId': str(SHOP_ID), 'preferredYearMonth': '2030-05',
+        'courseId': '1', 'reservationPeopleNumber': '2'})
+
+    assert status == 200
+    assert [reserved_day['day'] for reserved_day in body['reservedDays']] \
+        == [10, 11]
+    assert body['unavailableDays'] == [10]
+
+
+def test_shop_calendar_range_returns_unavailable_days(shop_tables):
+    """複数月の取得時は、年月毎に予約できない日を返却する"""
+    import shop_calendar_get
+    put_reserved_slots('2030-06-01', {'10:00': 9})
+
+    status, body = call(shop_calendar_get, {
+        'shopId': str(SHOP_ID), 'preferredYearMonth': '2030-05',
+        'preferredYearMonthTo': '2030-06',
+        'courseId': '1', 'reservationPeopleNumber': '2'})
+
+    assert status == 200
+    assert [shop_calendar['unavailableDays']
+            for shop_calendar in body['calendars']] == [[], []]
+
+    # 予約人数が席数を超える場合は全ての日を予約できない
+    status, body = call(shop_calendar_get, {
+        'shopId': str(SHOP_ID), 'preferredYearMonth': '2030-06',
+        'courseId': '1', 'reservationPeopleNumber': str(SEATS_NUMBER + 1)})
+
+    assert body['unavailableDays'] == list(range(1, 31))
+    assert 'unavailableDays' not in call(shop_calendar_get, {
+        'shopId': str(SHOP_ID), 'preferredYearMonth': '2030-06'})[1]
@@ -0,0 +1,55 @@
+"""
+低レベルクライアント用デシリアライザー(aws.dynamodb.deserializer)のテスト
+"""
+from decimal import Decimal
+
+from boto3.dynamodb.types import TypeSerializer
+import pytest
+
+from aws.dynamodb import deserializer
+
+serializer = TypeSerializer()
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('テスト店舗', 'テスト店舗'),
+    (Decimal('1'), 1),
+    (Decimal('-30'), -30),
+    (Decimal('2.5'), 2.5),
+    (True, True),
+    (False, False),
+    (None, None),
+    ({'a', 'b'}, {'a', 'b'}),
+    ({Decimal('1'), Decimal('0.5')}, {1, 0.5}),
+    ([Decimal('0'), 'x', None, [True]], [0, 'x', None, [True]]),
+    ({'shop': {'seatsNumber': Decimal('10'), 'tags': {'和食'},
+               'course': [{'courseId': Decimal('2')}]}},
+     {'shop': {'seatsNumber': 10, 'tags': {'和食'},
+               'course': [{'courseId': 2}]}}),
+])
+def test_deserialize_round_trip(value, expected):
+    """TypeSerializerで変換した値を、数値はint、floatとして元の値に戻す"""
+    deserialized = deserializer.deserialize(serializer.serialize(value))
+
+    assert deserialized == expected
+    assert type(deserialized) is type(expected)
+
+
+def test_deserialize_number_types():
+    """数値は整数の場合int、小数の場合floatに変換する"""
+    numbers = deserializer.deserialize(
+        serializer.serialize([Decimal('3'), Decimal('3.25')]))
+
+    assert [type(number) for number in numbers] == [int, float]
+
+
+def test_deserialize_item_selects_attributes():
+    """属性を指定した場合、指定した属性のみ変換する"""
+    item = {name: serializer.serialize(value) for name, value in {
+        'shopId': Decimal('1'), 'reservedDay': '2030-05-10',
+        'reservedSlots': [Decimal('0'), Decimal('2')]}.items()}
+
+    assert deserializer.deserialize_item(item) == {
+        'shopId': 1, 'reservedDay': '2030-05-10', 'reservedSlots': [0, 2]}
+    assert deserializer.deserialize_item(
+        item, ['reservedSlots', 'slotOpenTime']) == {'reservedSlots': [0, 2]}
@@ -0,0 +1,178 @@
+"""
+DynamoDB操作用基底クラス(aws.dynamodb.base)のページ分割取得・並列scanのテスト
+"""
+import threading
+
+import pytest
+
+from aws.dynamodb import base
+from restaurant.restaurant_shop_reservation import RestaurantShopReservation
+
+SHOP_ID = 1
+RESERVED_DAYS = [f'2030-05-{day:02d}' for day in range(1, 8)]
+PAGE_SIZE = 3
+
+
+class RequestRecorder:
+    """テーブルへのquery、scanのパラメータを記録するラッパー"""
+
+    def __init__(self, table):
+        self._table = table
+        self.requests = []
+
+    def query(self, **kwargs):
+        self.requests.append(kwargs)
+        return self._table.query(**kwargs)
+
+    def scan(self, **kwargs):
+        self.requests.append(kwargs)
+        return self._table.scan(**kwargs)
+
+
+class SegmentScanError(Exception):
+    """セグメントのscanで発生させる例外"""
+
+
+class SegmentFailingTable(RequestRecorder):
+    """指定したセグメントのscanで例外を発生させるラッパー"""
+
+    def __init__(self, table, requests, failing_segment=None):
+        super().__init__(table)
+        self.requests = requests
+        self._failing_segment = failing_segment
+
+    def scan(self, **kwargs):
+        if kwargs.get('Segment') == self._failing_segment:
+            self.requests.append(kwargs)
+            raise SegmentScanError(kwargs['Segment'])
+        return super().scan(**kwargs)
+
+
+@pytest.fixture
+def segment_requests(monkeypatch):
+    """
+    並列scanのスレッドで取得するテーブルを差し替え、全スレッドのscanを記録する
+
+    Returns
+    -------
+    segment_requests : list of dict
+        scanのパラメータのリスト
+        failing_segment属性に指定したセグメントのscanで例外を発生させる
+    """
+    class SegmentRequests(list):
+        failing_segment = None
+
+    requests = SegmentRequests()
+    get_resource = base.get_resource
+
+    class Resource:
+        def Table(self, table_name):
+            return SegmentFailingTable(get_resource().Table(table_name),
+                                       requests, requests.failing_segment)
+
+    monkeypatch.setattr(base, 'get_resource', Resource)
+    return requests
+
+
+@pytest.fixture
+def shop_reservation(dynamodb):
+    """予約情報を登録し、リクエストを記録するテーブル操作クラスを返却する"""
+    table = dynamodb.Table('RestaurantShopReservation')
+    for reserved_day in RESERVED_DAYS:
+        table.put_item(Item={'shopId': SHOP_ID, 'reservedDay': reserved_day,
+                             'reservedYearMonth': reserved_day[:7]})
+    # 別店舗のアイテムはqueryで取得しない
+    table.put_item(Item={'shopId': 2, 'reservedDay': RESERVED_DAYS[0],
+                         'reservedYearMonth': RESERVED_DAYS[0][:7]})
+    controller = RestaurantShopReservation()
+    controller._table = RequestRecorder(controller._table)
+    return controller
+
+
+def assert_paginated(requests):
+    """2ページ目以降はLastEvaluatedKeyから取得していることを確認する"""
+    assert len(requests) > 1
+    assert 'ExclusiveStartKey' not in requests[0]
+    assert all('ExclusiveStartKey' in request for request in requests[1:])
+    assert all(request['Limit'] == PAGE_SIZE for request in requests)
+
+
+def test_scan_iter_follows_last_evaluated_key(shop_reservation):
+    """scanは1ページ目以降のアイテムも全て取得する"""
+    items = list(shop_reservation._scan_iter(
+        'shopId', page_size=PAGE_SIZE))
+
+    assert len(items) == len(RESERVED_DAYS) + 1
+    assert_paginated(shop_reservation._table.requests)
+
+
+def test_query_iter_follows_last_evaluated_key(shop_reservation):
+    """queryは1ページ目以降のアイテムも全て取得する"""
+    items = list(shop_reservation._query_iter(
+        'shopId', SHOP_ID, page_size=PAGE_SIZE))
+
+    assert [item['reservedDay'] for item in items] == RESERVED_DAYS
+    assert_paginated(shop_reservation._table.requests)
+
+
+def test_query_index_iter_follows_last_evaluated_key(shop_reservation):
+    """indexのqueryは1ページ目以降のアイテムも全て取得する"""
+    items = list(shop_reservation._query_index_iter(
+        'shopId-reservedYearMonth-index',
+        'shopId = :shopId AND reservedYearMonth = :reservedYearMonth',
+        {':shopId': SHOP_ID, ':reservedYearMonth': '2030-05'},
+        page_size=PAGE_SIZE))
+
+    assert sorted(item['reservedDay'] for item in items) == RESERVED_DAYS
+    assert_paginated(shop_reservation._table.requests)
+
+
+def test_max_items_stops_reading_pages(shop_reservation):
+    """最大件数に達した後のページは読み込まない"""
+    items = list(shop_reservation._query_iter(
+        'shopId', SHOP_ID, page_size=PAGE_SIZE, max_items=4))
+
+    assert [item['reservedDay'] for item in items] == RESERVED_DAYS[:4]
+    assert [request['Limit'] for request in
+            shop_reservation._table.requests] == [PAGE_SIZE, 1]
+
+
+def test_parallel_scan_returns_all_segments(shop_reservation,
+                                            segment_requests):
+    """並列scanは全セグメントの全ページのアイテムを1件ずつ返却する"""
+    items = list(shop_reservation._parallel_scan_iter(
+        'shopId', total_segments=4, max_workers=2, page_size=1))
+
+    assert sorted((item['shopId'], item['reservedDay']) for item in items) \
+        == sorted([(SHOP_ID, reserved_day) for reserved_day in RESERVED_DAYS]
+                  + [(2, RESERVED_DAYS[0])])
+    assert {request['Segment'] for request in segment_requests} \
+        == {0, 1, 2, 3}
+
+
+def test_parallel_scan_raises_segment_error(shop_reservation,
+                                            segment_requests):
+    """セグメントのscanで発生した例外は呼び出し元に送出する"""
+    segment_requests.failing_segment = 1
+
+    with pytest.raises(SegmentScanError):
+        list(shop_reservation._parallel_scan_iter(
+            'shopId', total_segments=4, page_size=1))
+
+
+def test_parallel_scan_stops_threads_when_consumer_stops(
+        shop_reservation, segment_requests, monkeypatch):
+    """呼び出し元が途中で取得を止めた場合、キューの空き待ちのスレッドも終了する"""
+    monkeypatch.setattr(base, 'PARALLEL_SCAN_QUEUE_TIMEOUT', 0.01)
+    # キューの上限(2ページ)を超えるページを取得させ、スレッドを空き待ちにする
+    items = shop_reservation._parallel_scan_iter(
+        'shopId', total_segments=1, max_workers=1, page_size=1)
+    next(items)
+
+    # スレッドの終了を待つため、終了しない場合はcloseが戻らない
+    closer = threading.Thread(target=items.close)
+    closer.start()
+    closer.join(timeout=5)
+
+    assert not closer.is_alive()
+    assert len(segment_requests) < len(RESERVED_DAYS) + 1
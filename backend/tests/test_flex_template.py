@@ -0,0 +1,114 @@
+"""
+フレックスメッセージのテンプレート(FlexTemplate)のテスト
+"""
+import json
+import os
+
+import pytest
+import requests
+
+from common import (line, line_transport)
+from common.flex_template import (FlexTemplate, placeholder)
+from restaurant import flex_message_builder
+
+LEGACY_MESSAGES_PATH = os.path.join(os.path.dirname(__file__), 'data',
+                                    'restaurant_remind_legacy.json')
+
+
+def load_legacy_messages():
+    """
+    テンプレート化する前のフレックスメッセージの作成結果を読み込む
+    ※各ケースのパラメータと、dictで組み立てていた時の作成結果を保持しています
+    """
+    with open(LEGACY_MESSAGES_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize('case', sorted(load_legacy_messages()))
+def test_render_template_matches_legacy_message(case):
+    """テンプレートIDとパラメータから、従来と同じメッセージを作成できる"""
+    legacy_message = load_legacy_messages()[case]
+    params = legacy_message['params']
+    template_params = flex_message_builder.create_remind_template_params(
+        params['shop_name'], params['reservation_date'],
+        params['course_name'], params['number_of_people'],
+        params['remind_date_difference'])
+
+    flex_message = flex_message_builder.render_template(
+        flex_message_builder.REMIND_TEMPLATE_ID, template_params)
+
+    assert json.loads(flex_message) == legacy_message['message']
+
+
+def test_render_template_rejects_unknown_template_id():
+    """存在しないテンプレートIDはValueErrorとなる"""
+    with pytest.raises(ValueError):
+        flex_message_builder.render_template('unknown', {})
+
+
+def test_render_escapes_values():
+    """埋め込む値はJSON文字列としてエスケープする"""
+    template = FlexTemplate({
+        'type': 'text', 'text': placeholder('text'),
+        'contents': [placeholder('number'), 'fixed'],
+    })
+    values = {'text': '"引用"\\\n\u0000', 'number': 2}
+
+    rendered = template.render(values)
+
+    assert template.fields == ['text', 'number']
+    assert json.loads(rendered) == {
+        'type': 'text', 'text': values['text'], 'contents': [2, 'fixed']}
+
+
+def test_render_requires_all_fields():
+    """可変項目の値が無い場合はKeyErrorとなる"""
+    template = FlexTemplate({'text': placeholder('text')})
+
+    with pytest.raises(KeyError):
+        template.render({})
+
+
+def create_response(status_code, body, headers=None):
+    """Messaging APIのレスポンスを作成する"""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(body).encode('utf-8')
+    response.headers.update(headers or {})
+    return response
+
+
+def test_serialized_message_is_posted_as_utf8(monkeypatch):
+    """シリアライズ済みのメッセージをUTF-8のリクエストボディで送信する"""
+    requests_sent = []
+
+    def post(endpoint, headers=None, data=None, path=''):
+        requests_sent.append((endpoint, headers, data, path))
+        return create_response(200, {})
+
+    monkeypatch.setattr(line_transport, 'post', post)
+    flex_message = flex_message_builder.render_template(
+        flex_message_builder.REMIND_TEMPLATE_ID,
+        flex_message_builder.create_remind_template_params(
+            '店舗', '2030-05-10 18:00-19:00', 'コース', '2', -1))
+
+    line.send_push_message('access_token', flex_message, 'U0')
+
+    (endpoint, headers, data, path), = requests_sent
+    assert (endpoint, path) == ('messaging', line.PUSH_MESSAGE_PATH)
+    assert headers['Authorization'] == 'Bearer access_token'
+    assert json.loads(data.decode('utf-8')) == {
+        'to': 'U0', 'messages': [json.loads(flex_message)]}
+
+
+def test_serialized_message_rate_limit(monkeypatch):
+    """呼び出し回数の制限超過の場合は、待機秒数を付与したLineRateLimitErrorとなる"""
+    monkeypatch.setattr(
+        line_transport, 'post',
+        lambda endpoint, headers=None, data=None, path='': create_response(
+            429, {'message': 'The API rate limit has been exceeded.'},
+            {'Retry-After': '3'}))
+
+    with pytest.raises(line.LineRateLimitError) as e:
+        line.send_push_message('access_token', '{"type":"text"}', 'U0')
+    assert e.value.retry_after == 3
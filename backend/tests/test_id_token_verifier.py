@@ -0,0 +1,166 @@
+"""
+IDトークン検証(IdTokenVerifier)のテスト
+"""
+import json
+import time
+
+import jwt
+import pytest
+import requests
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from common import (id_token_verifier, line, line_transport)
+from common.id_token_verifier import IdTokenVerifier
+
+CHANNEL_ID = 'liff_channel_id'
+KEY_ID = 'key_id'
+
+
+@pytest.fixture
+def signing_key():
+    """IDトークンの署名用の秘密鍵"""
+    return ec.generate_private_key(ec.SECP256R1())
+
+
+@pytest.fixture
+def jwks_requests(monkeypatch, signing_key):
+    """JWKSの取得を、署名用の秘密鍵の公開鍵を返却するように置き換える"""
+    jwk = json.loads(jwt.algorithms.ECAlgorithm.to_jwk(
+        signing_key.public_key()))
+    jwk.update({'kid': KEY_ID, 'alg': 'ES256', 'use': 'sig'})
+    jwks_requests = []
+
+    def get(endpoint, **kwargs):
+        jwks_requests.append(endpoint)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({'keys': [jwk]}).encode('utf-8')
+        return response
+
+    monkeypatch.setattr(line_transport, 'get', get)
+    return jwks_requests
+
+
+class VerifyRequests(list):
+    """verifyエンドポイントで検証したIDトークンのリスト"""
+
+    def __init__(self):
+        """初期化メソッド"""
+        super().__init__()
+        # 検証時に指定したタイムアウト
+        self.timeouts = []
+
+
+@pytest.fixture
+def verify_requests(monkeypatch):
+    """verifyエンドポイントでの検証を記録に置き換える"""
+    verify_requests = VerifyRequests()
+
+    def get_profile(id_token, channel_id, timeout=None):
+        verify_requests.append(id_token)
+        verify_requests.timeouts.append(timeout)
+        return {'sub': 'U_verified', 'exp': int(time.time()) + 60}
+
+    monkeypatch.setattr(line, 'get_profile', get_profile)
+    return verify_requests
+
+
+def create_id_token(key, algorithm='ES256', key_id=KEY_ID, expires_in=60):
+    """IDトークンを作成する"""
+    now = int(time.time())
+    claims = {'iss': id_token_verifier.LINE_ISSUER, 'sub': 'U_local',
+              'aud': CHANNEL_ID, 'iat': now, 'exp': now + expires_in}
+    return jwt.encode(claims, key, algorithm=algorithm,
+                      headers={'kid': key_id})
+
+
+def test_valid_token_is_verified_locally(signing_key, jwks_requests,
+                                         verify_requests):
+    """ES256のトークンは公開鍵でローカルに検証し、結果をキャッシュする"""
+    verifier = IdTokenVerifier(CHANNEL_ID)
+    id_token = create_id_token(signing_key)
+
+    assert verifier.get_profile(id_token)['sub'] == 'U_local'
+    assert verifier.get_profile(id_token)['sub'] == 'U_local'
+    assert jwks_requests == ['jwks']
+    assert verify_requests == []
+
+
+def test_expired_token(signing_key, jwks_requests, verify_requests):
+    """有効期限切れのトークンは、verifyエンドポイントと同じ形式のエラーとなる"""
+    verifier = IdTokenVerifier(CHANNEL_ID)
+    id_token = create_id_token(
+        signing_key, expires_in=-(id_token_verifier.CLOCK_SKEW_LEEWAY + 60))
+
+    profile = verifier.get_profile(id_token)
+
+    assert profile == id_token_verifier.EXPIRED_RESPONSE
+    assert 'expired' in profile['error_description']
+    assert verify_requests == []
+
+
+def test_unknown_key_id_falls_back_to_verify_endpoint(
+        signing_key, jwks_requests, verify_requests):
+    """未知の鍵IDはJWKSを再取得し、無い場合はverifyエンドポイントで検証する"""
+    verifier = IdTokenVerifier(CHANNEL_ID)
+    verifier.get_profile(create_id_token(signing_key))
+    id_token = create_id_token(signing_key, key_id='unknown')
+
+    assert verifier.get_profile(id_token)['sub'] == 'U_verified'
+    # 最小間隔を空けるまではJWKSを再取得しない
+    assert jwks_requests == ['jwks']
+    assert verify_requests == [id_token]
+
+
+def test_unknown_key_id_refreshes_jwks(monkeypatch, signing_key,
+                                       jwks_requests, verify_requests):
+    """最小間隔を空けた後の未知の鍵IDは、JWKSを再取得して検証する"""
+    monkeypatch.setattr(id_token_verifier, 'JWKS_REFRESH_INTERVAL', 0)
+    verifier = IdTokenVerifier(CHANNEL_ID)
+    verifier.get_profile(create_id_token(signing_key))
+    id_token = create_id_token(signing_key, key_id='unknown')
+
+    assert verifier.get_profile(id_token)['sub'] == 'U_verified'
+    assert jwks_requests == ['jwks', 'jwks']
+    assert verify_requests == [id_token]
+
+
+def test_hs256_token_is_verified_by_endpoint(jwks_requests, verify_requests):
+    """HS256のトークンはJWKSを取得せず、verifyエンドポイントで検証する"""
+    verifier = IdTokenVerifier(CHANNEL_ID)
+    id_token = create_id_token('channel_secret' * 3, algorithm='HS256')
+
+    assert verifier.get_profile(id_token)['sub'] == 'U_verified'
+    assert jwks_requests == []
+    assert verify_requests == [id_token]
+
+
+def test_jwks_failure_falls_back_within_deadline(monkeypatch, signing_key,
+                                                 verify_requests):
+    """JWKSの取得に失敗した場合は、残りの期限内でverifyエンドポイントで検証する"""
+    jwks_requests = []
+
+    def get(endpoint, **kwargs):
+        jwks_requests.append(endpoint)
+        raise requests.Timeout('jwks timeout')
+
+    monkeypatch.setattr(line_transport, 'get', get)
+    verifier = IdTokenVerifier(CHANNEL_ID)
+    id_token = create_id_token(signing_key)
+
+    assert verifier.get_profile(id_token)['sub'] == 'U_verified'
+    assert jwks_requests == ['jwks']
+    assert verify_requests == [id_token]
+    assert sum(verify_requests.timeouts[0]) <= \
+        id_token_verifier.ID_TOKEN_VERIFY_DEADLINE
+
+
+def test_verify_deadline_is_below_lambda_timeout():
+    """公開鍵の取得とverifyエンドポイントの最長の待ち時間は、予約登録のタイムアウト未満とする"""
+    def max_wait(endpoint):
+        policy = line_transport.ENDPOINT_POLICIES[endpoint]
+        return sum(policy['timeout']) * (policy['retries'] + 1)
+
+    assert max_wait('jwks') < id_token_verifier.ID_TOKEN_VERIFY_DEADLINE
+    assert max_wait('verify') <= id_token_verifier.ID_TOKEN_VERIFY_DEADLINE
+    assert id_token_verifier.ID_TOKEN_VERIFY_DEADLINE < 3
@@ -0,0 +1,287 @@
+"""
+リマインド通知のプッシュメッセージ送信バッチ(messaging_put_dynamo)のテスト
+"""
+import datetime
+import threading
+
+import pytest
+from dateutil.tz import gettz
+
+from common import (line, rate_limiter)
+from common.channel_access_token import (
+    ChannelAccessToken, ChannelAccessTokenProvider)
+from common.remind_message import RemindMessage
+from restaurant import flex_message_builder
+
+CHANNEL_ID = 'channel_id'
+
+
+class PushMessageRecorder:
+    """送信したユーザーIDを記録するプッシュメッセージ送信の代替"""
+
+    def __init__(self):
+        """初期化メソッド"""
+        self.sent_user_ids = []
+        self.retry_keys = []
+        # ユーザーIDをキー、制限超過とする残りの回数を値としたdict
+        self.throttled_counts = {}
+        self._lock = threading.Lock()
+
+    def send_push_message(self, channel_access_token, flex_obj, user_id,
+                          retry_key=None, channel_id=None):
+        """制限超過の回数が残っている場合はLineRateLimitErrorとする"""
+        with self._lock:
+            if self.throttled_counts.get(user_id, 0):
+                self.throttled_counts[user_id] -= 1
+                raise line.LineRateLimitError(0)
+            self.sent_user_ids.append(user_id)
+            self.retry_keys.append(retry_key)
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    """プッシュメッセージの送信を記録に置き換える"""
+    recorder = PushMessageRecorder()
+    monkeypatch.setattr(line, 'send_push_message', recorder.send_push_message)
+    return recorder
+
+
+@pytest.fixture
+def messaging(dynamodb, monkeypatch):
+    """呼び出し回数の制限超過時に待機しないようにした送信バッチのモジュール"""
+    import messaging_put_dynamo
+
+    dynamodb.Table('LINEChannelAccessTokenRestaurant').put_item(Item={
+        'channelId': CHANNEL_ID, 'channelAccessToken': 'access_token',
+        'limitDate': '2099-01-01 00:00:00+0900'})
+    monkeypatch.setattr(rate_limiter, 'get_backoff_delay',
+                        lambda attempt, retry_after=None: 0)
+    monkeypatch.setattr(messaging_put_dynamo, 'PUSH_MAX_ATTEMPTS', 3)
+    return messaging_put_dynamo
+
+
+def put_today_messages(user_ids, channel_id=CHANNEL_ID):
+    """本日送信するメッセージを登録する"""
+    today = datetime.datetime.now(gettz('Asia/Tokyo')).strftime('%Y-%m-%d')
+    template_params = flex_message_builder.create_remind_template_params(
+        'shop', today + ' 18:00-19:00', 'course', '2', 0)
+    RemindMessage().put_push_messages([
+        {'user_id': user_id, 'channel_id': channel_id,
+         'remind_date': today,
+         'template_id': flex_message_builder.REMIND_TEMPLATE_ID,
+         'template_params': template_params}
+        for user_id in user_ids])
+
+
+def test_throttled_messages_are_requeued(messaging, recorder):
+    """制限超過のメッセージは積み直して再送し、1回だけ送信する"""
+    user_ids = [f'U{index}' for index in range(10)]
+    put_today_messages(user_ids)
+    recorder.throttled_counts = {'U1': 1, 'U2': 2}
+
+    results = messaging.send_message_from_dynamodb(max_workers=4)
+
+    assert sorted(recorder.sent_user_ids) == sorted(user_ids)
+    assert len(results) == len(user_ids)
+    assert all(result['sent'] for result in results)
+
+
+def test_throttled_on_last_attempt_are_left_unsent(messaging, recorder):
+    """最終回も制限超過のメッセージは送信済みにせず、次回の実行で送信する"""
+    put_today_messages(['U0', 'U1'])
+    recorder.throttled_counts = {'U1': messaging.PUSH_MAX_ATTEMPTS}
+
+    results = messaging.send_message_from_dynamodb(max_workers=2)
+
+    assert recorder.sent_user_ids == ['U0']
+    throttled_results = [result for result in results
+                         if result.get('throttled')]
+    assert len(throttled_results) == 1
+    assert not throttled_results[0]['sent']
+
+    messaging.send_message_from_dynamodb(max_workers=2)
+
+    assert recorder.sent_user_ids == ['U0', 'U1']
+
+
+def test_mark_sent_only_once(dynamodb):
+    """未送信のメッセージのみ送信日時(sentAt)を登録し、未送信のindexから外す"""
+    put_today_messages(['U0'])
+    controller = RemindMessage()
+    message = dynamodb.Table(
+        'RemindMessageTableRestaurant').scan()['Items'][0]
+    message_id = message['id']
+    assert message['pendingRemindDate'] == message['remindDate']
+
+    assert controller.mark_sent(message_id)
+    assert not controller.mark_sent(message_id)
+    item = controller.get_item(message_id)
+    assert 'sentAt' in item
+    assert 'pendingRemindDate' not in item
+    assert list(controller.query_index_pending_remind_date_iter(
+        item['remindDate'])) == []
+
+
+def test_rerun_resumes_from_unsent_messages(messaging, recorder, dynamodb):
+    """送信済みのメッセージは再実行時に送信しない"""
+    put_today_messages(['U0', 'U1', 'U2'])
+    sent_message = next(
+        item for item in dynamodb.Table(
+            'RemindMessageTableRestaurant').scan()['Items']
+        if item['messageInfo']['userId'] == 'U1')
+    RemindMessage().mark_sent(sent_message['id'])
+
+    results = messaging.send_message_from_dynamodb(max_workers=2)
+
+    assert sorted(recorder.sent_user_ids) == ['U0', 'U2']
+    assert len(results) == 2
+    assert messaging.send_message_from_dynamodb(max_workers=2) == []
+    assert sorted(recorder.sent_user_ids) == ['U0', 'U2']
+
+
+def test_failed_messages_are_not_marked_sent(messaging, recorder,
+                                             monkeypatch):
+    """送信に失敗したメッセージは送信済みにせず、再実行時に送信する"""
+    put_today_messages(['U0', 'U1'])
+
+    def send_push_message(channel_access_token, flex_obj, user_id,
+                          retry_key=None, channel_id=None):
+        if user_id == 'U1':
+            raise ValueError('send error')
+        recorder.send_push_message(channel_access_token, flex_obj, user_id,
+                                   retry_key)
+
+    monkeypatch.setattr(line, 'send_push_message', send_push_message)
+    results = messaging.send_message_from_dynamodb(max_workers=2)
+
+    assert [result['sent'] for result in sorted(
+        results, key=lambda result: result['sent'])] == [False, True]
+    monkeypatch.setattr(line, 'send_push_message', recorder.send_push_message)
+    messaging.send_message_from_dynamodb(max_workers=2)
+    assert sorted(recorder.sent_user_ids) == ['U0', 'U1']
+
+
+def test_mark_sent_runs_on_main_thread(messaging, recorder, monkeypatch):
+    """送信済みの登録は送信スレッドではなく呼び出し元のスレッドで行う"""
+    put_today_messages([f'U{index}' for index in range(5)])
+    marked_threads = []
+    mark_sent = RemindMessage.mark_sent
+
+    def record_thread(self, id):
+        marked_threads.append(threading.current_thread())
+        return mark_sent(self, id)
+
+    monkeypatch.setattr(RemindMessage, 'mark_sent', record_thread)
+    messaging.send_message_from_dynamodb(max_workers=4)
+
+    assert len(marked_threads) == 5
+    assert set(marked_threads) == {threading.current_thread()}
+
+
+def test_messages_are_marked_sent_as_each_push_completes(
+        messaging, recorder, monkeypatch):
+    """チャンク内の送信の完了を待たず、送信が完了したメッセージから送信済みにする"""
+    put_today_messages(['U0', 'U1'])
+    marked = threading.Event()
+    mark_sent = RemindMessage.mark_sent
+
+    def set_marked(self, id):
+        result = mark_sent(self, id)
+        marked.set()
+        return result
+
+    marked_before_next_send = []
+
+    def send_push_message(channel_access_token, flex_obj, user_id,
+                          retry_key=None, channel_id=None):
+        # 2件目の送信前に、1件目が送信済みになるまで待つ
+        if recorder.sent_user_ids:
+            marked_before_next_send.append(marked.wait(5))
+        recorder.send_push_message(channel_access_token, flex_obj, user_id,
+                                   retry_key)
+
+    monkeypatch.setattr(RemindMessage, 'mark_sent', set_marked)
+    monkeypatch.setattr(line, 'send_push_message', send_push_message)
+    messaging.send_message_from_dynamodb(max_workers=1)
+
+    assert marked_before_next_send == [True]
+
+
+def test_push_uses_retry_key_from_message_id(messaging, recorder, dynamodb):
+    """メッセージIDから作成したリトライキーを指定して送信する"""
+    put_today_messages(['U0'])
+    message_id = dynamodb.Table(
+        'RemindMessageTableRestaurant').scan()['Items'][0]['id']
+
+    messaging.send_message_from_dynamodb(max_workers=1)
+
+    assert recorder.retry_keys == [messaging.create_retry_key(message_id)]
+    assert messaging.create_retry_key(message_id) == \
+        messaging.create_retry_key(message_id)
+
+
+def test_accepted_retry_key_is_treated_as_sent(monkeypatch):
+    """リトライキーが受け付け済み(409)の場合は送信成功として扱う"""
+    from common import line_transport
+
+    class ConflictResponse:
+        status_code = 409
+        headers = {'X-Line-Accepted-Request-Id': 'accepted_request_id'}
+        text = '{"message": "The retry key is already accepted"}'
+
+        def json(self):
+            return {'message': 'The retry key is already accepted'}
+
+    request_headers = []
+
+    def post(endpoint, headers=None, data=None, path=''):
+        request_headers.append(headers)
+        return ConflictResponse()
+
+    monkeypatch.setattr(line_transport, 'post', post)
+    retry_key = '5a4c0e5c-0d0e-5d57-9b1c-4a0a3d0b5e6f'
+
+    assert line.send_push_message(
+        'access_token', '{"type": "flex"}', 'U0', retry_key) is None
+    assert request_headers[0]['X-Line-Retry-Key'] == retry_key
+
+
+def test_line_bot_api_is_replaced_when_token_changes():
+    """LineBotApiはチャネル毎に保持し、トークンが変わった場合は置き換える"""
+    from common import line_transport
+
+    line_transport.line_bot_api_cache.invalidate()
+    try:
+        line_bot_api = line_transport.get_line_bot_api('token_1', 'channel')
+        assert line_transport.get_line_bot_api(
+            'token_1', 'channel') is line_bot_api
+
+        refreshed = line_transport.get_line_bot_api('token_2', 'channel')
+
+        assert refreshed is not line_bot_api
+        assert refreshed.headers['Authorization'] == 'Bearer token_2'
+        assert line_transport.line_bot_api_cache.get('channel') == \
+            ('token_2', refreshed)
+        assert line_transport.line_bot_api_cache.get('token_1') is None
+    finally:
+        line_transport.line_bot_api_cache.invalidate()
+
+
+def test_get_token_of_missing_channel_returns_none(dynamodb):
+    """テーブルに存在しないチャネルのトークンはNoneを返却する"""
+    provider = ChannelAccessTokenProvider(ChannelAccessToken())
+
+    assert provider.get_token('missing_channel_id') is None
+
+
+def test_missing_channel_is_skipped(messaging, recorder):
+    """トークンが存在しないチャネルは送信せず、他のチャネルの送信を継続する"""
+    put_today_messages(['U0'])
+    put_today_messages(['U1'], channel_id='missing_channel_id')
+
+    results = messaging.send_message_from_dynamodb(max_workers=2)
+
+    assert recorder.sent_user_ids == ['U0']
+    assert sorted(result['sent'] for result in results) == [False, True]
+    # 未送信のまま残し、次回の実行で再度送信を試みる
+    assert len(messaging.send_message_from_dynamodb(max_workers=2)) == 1
@@ -0,0 +1,255 @@
+"""
+席数を上限とした予約枠の登録(reservation_put)のテスト
+"""
+from decimal import Decimal
+import json
+import os
+
+import pytest
+from botocore.exceptions import ClientError
+
+from aws.dynamodb.base import TransactWriter
+from common.id_token_verifier import IdTokenVerifier
+from restaurant.restaurant_shop_reservation import (
+    RestaurantShopReservation, VACANCY_FLG_MAP)
+
+SHOP_ID = 1
+RESERVED_DAY = '2030-05-10'
+SEATS_NUMBER = 4
+
+
+@pytest.fixture
+def shop_tables(dynamodb):
+    """席数を減らしたサンプルの店舗情報を登録する"""
+    data_path = os.path.join(os.path.dirname(__file__), '..', 'APP',
+                             'dynamodb_data', f'restaurant_{SHOP_ID}.json')
+    with open(data_path, encoding='utf-8') as f:
+        shop_item = json.load(f, parse_float=Decimal)
+    shop_item['shop']['seatsNumber'] = SEATS_NUMBER
+    dynamodb.Table('RestaurantShopMaster').put_item(Item=shop_item)
+    return dynamodb
+
+
+@pytest.fixture
+def reservation_put(monkeypatch):
+    """IDトークンの検証を行わないようにした予約登録の関数のモジュール"""
+    import reservation_put
+
+    monkeypatch.setattr(IdTokenVerifier, 'get_profile',
+                        lambda self, id_token: {'sub': 'U' + id_token})
+    return reservation_put
+
+
+def book(reservation_put, start_time, end_time, people_number,
+         reserved_day=RESERVED_DAY):
+    """予約登録のAPIを呼び出す"""
+    body = {
+        'idToken': 'token', 'accessToken': 'token',
+        'shopId': SHOP_ID, 'shopName': 'shop',
+        'userName': 'user', 'courseId': 1, 'courseName': 'course',
+        'reservationDate': reserved_day,
+        'reservationStarttime': start_time,
+        'reservationEndtime': end_time,
+        'reservationPeopleNumber': people_number,
+    }
+    return reservation_put.lambda_handler({'body': json.dumps(body)}, None)
+
+
+def test_add_reserved_number_guards_capacity(dynamodb):
+    """加算後に席数を超過する枠がある場合は条件エラーとなり、加算されない"""
+    controller = RestaurantShopReservation()
+    controller.init_reserved_slots(SHOP_ID, RESERVED_DAY, '2030-05', '10:00',
+                                   4, 1)
+    controller.add_reserved_number(SHOP_ID, RESERVED_DAY, '10:00', 4,
+                                   {'10:00': 3, '10:30': 3}, 6,
+                                   capacity=SEATS_NUMBER)
+
+    with pytest.raises(ClientError) as e:
+        controller.add_reserved_number(SHOP_ID, RESERVED_DAY, '10:00', 4,
+                                       {'10:30': 2, '11:00': 2}, 4,
+                                       capacity=SEATS_NUMBER)
+    assert e.value.response['Error']['Code'] == \
+        'ConditionalCheckFailedException'
+
+    item = controller.get_item(SHOP_ID, RESERVED_DAY)
+    assert item['reservedSlots'] == [3, 3, 0, 0]
+    assert item['totalReservedNumber'] == 6
+
+
+def test_get_conflicting_slots():
+    """席数を超過する枠と残席数を取得できる"""
+    controller = RestaurantShopReservation()
+    item = {'reservedSlots': [3, 4, 0], 'slotOpenTime': '10:00'}
+
+    assert controller.get_conflicting_slots(
+        item, '10:00', 3, {'10:00': 2, '10:30': 1, '11:00': 2},
+        SEATS_NUMBER) == [
+            {'reservedStartTime': '10:00', 'reservedEndTime': '10:30',
+             'remainingNumber': 1},
+            {'reservedStartTime': '10:30', 'reservedEndTime': '11:00',
+             'remainingNumber': 0},
+    ]
+
+
+def test_first_booking_creates_slot_array(shop_tables, reservation_put):
+    """初回の予約で、営業時間の配列を作成して予約人数を登録する"""
+    response = book(reservation_put, '10:00', '11:00', 2)
+
+    assert response['statusCode'] == 200
+    item = RestaurantShopReservation().get_item(SHOP_ID, RESERVED_DAY)
+    assert item['slotOpenTime'] == '10:00'
+    assert item['reservedSlots'][:3] == [2, 2, 0]
+    assert len(item['reservedSlots']) == 26
+    assert item['totalReservedNumber'] == 4
+
+
+def test_over_capacity_returns_409(shop_tables, reservation_put):
+    """席数を超過する場合は409を返却し、予約情報を登録しない"""
+    assert book(reservation_put, '10:00', '11:00', 3)['statusCode'] == 200
+
+    response = book(reservation_put, '10:30', '11:30', 2)
+
+    assert response['statusCode'] == 409
+    assert json.loads(response['body'])['conflictingSlots'] == [
+        {'reservedStartTime': '10:30', 'reservedEndTime': '11:00',
+         'remainingNumber': 1},
+    ]
+    item = RestaurantShopReservation().get_item(SHOP_ID, RESERVED_DAY)
+    assert item['reservedSlots'][:3] == [3, 3, 0]
+    assert item['totalReservedNumber'] == 6
+    assert shop_tables.Table(
+        'RestaurantReservationInfo').scan()['Count'] == 1
+    assert shop_tables.Table(
+        'RemindMessageTableRestaurant').scan()['Count'] == 2
+
+
+def test_transaction_conflict_is_retried(shop_tables, reservation_put,
+                                         monkeypatch):
+    """同時のトランザクションと競合した場合は、同じ書き込みで再実行する"""
+    commit = TransactWriter.commit
+    transact_item_counts = []
+
+    def conflict_once(self):
+        transact_item_counts.append(len(self._transact_items))
+        if len(transact_item_counts) == 1:
+            raise ClientError({
+                'Error': {'Code': 'TransactionCanceledException',
+                          'Message': 'Transaction cancelled'},
+                'CancellationReasons': [
+                    {'Code': 'TransactionConflict',
+                     'Message': 'Transaction is ongoing for the item'},
+                    {'Code': 'None'}, {'Code': 'None'}, {'Code': 'None'}],
+            }, 'TransactWriteItems')
+        return commit(self)
+
+    monkeypatch.setattr(TransactWriter, 'commit', conflict_once)
+    monkeypatch.setattr(reservation_put, 'PUT_RESERVATION_RETRY_BASE_DELAY',
+                        0)
+
+    assert book(reservation_put, '10:00', '11:00', 2)['statusCode'] == 200
+    # 競合後は同じ書き込みで再実行し、配列が無いため作り直して登録する
+    assert len(transact_item_counts) == 3
+    item = RestaurantShopReservation().get_item(SHOP_ID, RESERVED_DAY)
+    assert item['reservedSlots'][:3] == [2, 2, 0]
+    assert shop_tables.Table(
+        'RestaurantReservationInfo').scan()['Count'] == 1
+
+
+def test_transaction_conflict_gives_up_after_attempts(
+        shop_tables, reservation_put, monkeypatch):
+    """競合が続く場合は、再実行の上限回数でエラーとする"""
+    commits = []
+
+    def always_conflict(self):
+        commits.append(self)
+        raise ClientError({
+            'Error': {'Code': 'TransactionCanceledException',
+                      'Message': 'Transaction cancelled'},
+            'CancellationReasons': [{'Code': 'TransactionConflict'}],
+        }, 'TransactWriteItems')
+
+    monkeypatch.setattr(TransactWriter, 'commit', always_conflict)
+    monkeypatch.setattr(reservation_put, 'PUT_RESERVATION_RETRY_BASE_DELAY',
+                        0)
+
+    assert book(reservation_put, '10:00', '11:00', 2)['statusCode'] == 500
+    assert len(commits) == reservation_put.PUT_RESERVATION_MAX_ATTEMPTS
+
+
+def get_vacancy_flgs():
+    """指定日と月毎の集約アイテムの空き状況フラグを取得する"""
+    controller = RestaurantShopReservation()
+    return (controller.get_item(SHOP_ID, RESERVED_DAY)['vacancyFlg'],
+            controller.get_item(SHOP_ID, 'MONTH#2030-05')['vacancyFlgs'][9])
+
+
+def test_booking_updates_day_and_month_vacancy_flg(shop_tables,
+                                                   reservation_put):
+    """予約の登録後に、合計予約人数に合わせて指定日と集約アイテムのフラグを更新する"""
+    # 1日の予約可能人数は席数*26枠
+    assert book(reservation_put, '10:00', '11:00', 2)['statusCode'] == 200
+    assert get_vacancy_flgs() == (VACANCY_FLG_MAP['AVAILABLE_MUCH'],) * 2
+
+    assert book(reservation_put, '11:00', '21:00', 4)['statusCode'] == 200
+    assert get_vacancy_flgs() == (VACANCY_FLG_MAP['AVAILABLE_FEW'],) * 2
+
+    assert book(reservation_put, '21:00', '23:00', 4)['statusCode'] == 200
+    assert book(reservation_put, '10:00', '11:00', 2)['statusCode'] == 200
+    assert get_vacancy_flgs() == (VACANCY_FLG_MAP['AVAILABLE_NOTHING'],) * 2
+
+
+def test_vacancy_flg_error_keeps_booking(shop_tables, reservation_put,
+                                         monkeypatch):
+    """空き状況フラグの更新に失敗しても、登録済みの予約は成功として返却する"""
+    def raise_error(*args):
+        raise ValueError('update error')
+
+    monkeypatch.setattr(reservation_put, 'update_vacancy_flg', raise_error)
+
+    assert book(reservation_put, '10:00', '11:00', 2)['statusCode'] == 200
+    assert shop_tables.Table(
+        'RestaurantReservationInfo').scan()['Count'] == 1
+
+
+def get_vacancy_flgs_of_month():
+    """月毎の集約アイテムの空き状況フラグを取得する"""
+    return RestaurantShopReservation().get_item(
+        SHOP_ID, 'MONTH#2030-05')['vacancyFlgs']
+
+
+def test_stale_month_flag_update_does_not_query_month(dynamodb, monkeypatch):
+    """更新前のフラグにより更新しない場合は、集約アイテムを作成し直さない"""
+    controller = RestaurantShopReservation()
+    all_vacancy_flgs = [-1] + list(VACANCY_FLG_MAP.values())
+    assert controller.update_month_vacancy_flg(
+        SHOP_ID, RESERVED_DAY, VACANCY_FLG_MAP['AVAILABLE_NOTHING'],
+        all_vacancy_flgs, 104)
+
+    def query_day_range(self, *args, **kwargs):
+        raise AssertionError('query_day_range must not be called')
+
+    monkeypatch.setattr(RestaurantShopReservation, 'query_day_range',
+                        query_day_range)
+
+    assert not controller.update_month_vacancy_flg(
+        SHOP_ID, RESERVED_DAY, VACANCY_FLG_MAP['AVAILABLE_MUCH'],
+        [-1, VACANCY_FLG_MAP['AVAILABLE_MUCH']], 104)
+    assert get_vacancy_flgs_of_month()[9] == \
+        VACANCY_FLG_MAP['AVAILABLE_NOTHING']
+
+
+def test_raised_capacity_moves_month_flag_back(shop_tables, reservation_put):
+    """席数を増やした場合は、空き無しの日も空き状況フラグを戻す"""
+    from restaurant.restaurant_shop_master import shop_master_cache
+
+    assert book(reservation_put, '10:00', '23:00', 4)['statusCode'] == 200
+    assert get_vacancy_flgs() == (VACANCY_FLG_MAP['AVAILABLE_NOTHING'],) * 2
+
+    shop_tables.Table('RestaurantShopMaster').update_item(
+        Key={'shopId': SHOP_ID},
+        UpdateExpression='SET shop.seatsNumber = :seats_number',
+        ExpressionAttributeValues={':seats_number': SEATS_NUMBER * 2})
+    shop_master_cache.invalidate()
+
+    assert book(reservation_put, '10:00', '11:00', 2)['statusCode'] == 200
+    assert get_vacancy_flgs() == (VACANCY_FLG_MAP['AVAILABLE_MUCH'],) * 2
@@ -0,0 +1,88 @@
+"""
+APIレスポンスのJSON変換(response_encoder)のテスト
+"""
+from decimal import Decimal
+import json
+
+import pytest
+
+from common import response_encoder
+
+# DynamoDBから取得したアイテムを想定した値(Decimal型、set型を含む)
+ITEM = {
+    'shopId': Decimal('1'),
+    'shopName': 'テスト店舗',
+    'price': Decimal('1500.00'),
+    'rate': Decimal('3.75'),
+    'negative': Decimal('-1'),
+    'tags': {'和食'},
+    'course': [
+        {'courseId': Decimal('2'), 'courseMinutes': Decimal('90'),
+         'reservedSlots': [Decimal('0'), Decimal('2.5')]},
+    ],
+    'nested': {'numbers': {Decimal('7')}, 'empty': [], 'none': None,
+               'flag': True},
+}
+EXPECTED = {
+    'shopId': 1,
+    'shopName': 'テスト店舗',
+    'price': 1500,
+    'rate': 3.75,
+    'negative': -1,
+    'tags': ['和食'],
+    'course': [
+        {'courseId': 2, 'courseMinutes': 90, 'reservedSlots': [0, 2.5]},
+    ],
+    'nested': {'numbers': [7], 'empty': [], 'none': None, 'flag': True},
+}
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def backend(request, monkeypatch):
+    """orjsonと標準ライブラリのそれぞれでシリアライズする"""
+    if request.param == 'json':
+        monkeypatch.setattr(response_encoder, 'orjson', None)
+    elif response_encoder.orjson is None:
+        pytest.skip('orjsonがインストールされていません')
+    return request.param
+
+
+@pytest.mark.parametrize('value, expected', [
+    (Decimal('10'), 10), (Decimal('10.0'), 10), (Decimal('-3'), -3),
+    (Decimal('0.5'), 0.5), (Decimal('1E+2'), 100)])
+def test_decimal_to_number(value, expected):
+    """整数のDecimal型はint、小数部があるDecimal型はfloatに変換する"""
+    number = response_encoder.to_native(value)
+
+    assert number == expected
+    assert type(number) is type(expected)
+
+
+def test_to_native_converts_nested_values():
+    """dict、listを辿り、Decimal型を数値、set型をlistに変換する"""
+    assert response_encoder.to_native(ITEM) == EXPECTED
+
+
+def test_dumps_converts_nested_values(backend):
+    """入れ子のDecimal型、set型を変換し、日本語はエスケープしない"""
+    body = response_encoder.dumps(ITEM)
+
+    assert json.loads(body) == EXPECTED
+    assert 'テスト店舗' in body
+    assert '"price":1500,' in body
+
+
+def test_dumps_is_same_for_each_backend(monkeypatch):
+    """orjsonの有無に関わらず同じJSON文字列を返却する"""
+    if response_encoder.orjson is None:
+        pytest.skip('orjsonがインストールされていません')
+    orjson_body = response_encoder.dumps(ITEM)
+    monkeypatch.setattr(response_encoder, 'orjson', None)
+
+    assert response_encoder.dumps(ITEM) == orjson_body
+
+
+def test_dumps_rejects_unsupported_type(backend):
+    """Decimal型、set型以外のJSONに変換できない値はエラーとする"""
+    with pytest.raises(TypeError):
+        response_encoder.dumps({'value': object()})
@@ -0,0 +1,94 @@
+"""
+店舗マスタ(RestaurantShopMaster)のキャッシュのテスト
+"""
+import pytest
+
+from load_shop_data import load_shop_items
+from restaurant.restaurant_shop_master import RestaurantShopMaster
+
+
+@pytest.fixture
+def shop_table(dynamodb):
+    """店舗情報を1件登録し、テーブルを返却する"""
+    table = dynamodb.Table('RestaurantShopMaster')
+    table.put_item(Item={'shopId': 1, 'shopName': 'テスト店舗'})
+    return table
+
+
+def test_get_item_shares_cache_between_str_and_int(shop_table):
+    """文字列と数値の同じ店舗IDは同じキャッシュを参照する"""
+    shop_master = RestaurantShopMaster()
+    assert shop_master.get_item('1')['shopName'] == 'テスト店舗'
+
+    # テーブルから削除してもキャッシュから取得できる
+    shop_table.delete_item(Key={'shopId': 1})
+    assert shop_master.get_item(1)['shopName'] == 'テスト店舗'
+
+
+def test_invalidate_cache_with_str_id(shop_table):
+    """文字列の店舗IDでも数値の店舗IDで登録したキャッシュを破棄する"""
+    shop_master = RestaurantShopMaster()
+    shop_master.get_item(1)
+    shop_table.delete_item(Key={'shopId': 1})
+
+    shop_master.invalidate_cache('1')
+    assert shop_master.get_item(1) == {}
+
+
+class UnprocessedOnceResource:
+    """初回のBatchWriteItemで最後の1件を未処理として返却するresource"""
+
+    def __init__(self, resource):
+        self._resource = resource
+        self.request_counts = []
+
+    def batch_write_item(self, RequestItems):
+        (table_name, write_requests), = RequestItems.items()
+        self.request_counts.append(len(write_requests))
+        if len(self.request_counts) > 1:
+            return self._resource.batch_write_item(RequestItems=RequestItems)
+        response = self._resource.batch_write_item(
+            RequestItems={table_name: write_requests[:-1]})
+        response['UnprocessedItems'] = {table_name: write_requests[-1:]}
+        return response
+
+
+def test_put_items_writes_in_batches_of_25(shop_table):
+    """26件以上の店舗情報は25件毎に分割して登録する"""
+    shop_master = RestaurantShopMaster()
+    shop_master.put_items([{'shopId': shop_id, 'shopName': f'店舗{shop_id}'}
+                           for shop_id in range(1, 31)])
+
+    assert sorted(item['shopId'] for item in shop_table.scan()['Items']) \
+        == list(range(1, 31))
+
+
+def test_put_items_retries_unprocessed_items(shop_table):
+    """UnprocessedItemsとして返却されたアイテムを再送する"""
+    shop_master = RestaurantShopMaster()
+    resource = UnprocessedOnceResource(shop_master._db)
+    shop_master._db = resource
+    shop_master.put_items([{'shopId': shop_id} for shop_id in range(2, 5)])
+
+    assert resource.request_counts == [3, 1]
+    assert sorted(item['shopId'] for item in shop_table.scan()['Items']) \
+        == [1, 2, 3, 4]
+
+
+def test_put_items_invalidates_cache(shop_table):
+    """一括登録後はキャッシュではなく登録した店舗情報を返却する"""
+    shop_master = RestaurantShopMaster()
+    assert shop_master.get_item(1)['shopName'] == 'テスト店舗'
+
+    shop_master.put_items([{'shopId': 1, 'shopName': '変更後の店舗'}])
+    assert shop_master.get_item(1)['shopName'] == '変更後の店舗'
+
+
+def test_load_shop_data(dynamodb):
+    """dynamodb_data配下の店舗情報を全件登録する"""
+    shop_items = load_shop_items()
+    RestaurantShopMaster().put_items(shop_items)
+
+    items = dynamodb.Table('RestaurantShopMaster').scan()['Items']
+    assert sorted(item['shopId'] for item in items) \
+        == sorted(item['shopId'] for item in shop_items)
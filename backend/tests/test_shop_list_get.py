@@ -0,0 +1,86 @@
+"""
+店舗一覧取得API(shop_list_get)のETagによる条件付き取得のテスト
+"""
+import json
+
+import pytest
+
+from common import ttl_cache
+from load_shop_data import load_shop_items
+from restaurant.restaurant_shop_master import (
+    RestaurantShopMaster, SHOP_MASTER_CACHE_TTL)
+import shop_list_get
+
+
+@pytest.fixture
+def shop_table(dynamodb):
+    """サンプルの店舗情報を登録し、前のテストのスナップショットを破棄する"""
+    RestaurantShopMaster().put_items(load_shop_items())
+    shop_list_get.shop_list_snapshot.update(source=None, body=None, etag=None)
+    return dynamodb.Table('RestaurantShopMaster')
+
+
+def call(headers=None):
+    """APIを呼び出し、レスポンスを返却する"""
+    return shop_list_get.lambda_handler({'headers': headers}, None)
+
+
+def test_returns_shop_list_with_etag(shop_table):
+    """店舗一覧とbodyから算出したETagを返却する"""
+    response = call()
+
+    assert response['statusCode'] == 200
+    assert response['headers']['ETag'] == \
+        shop_list_get.create_etag(response['body'])
+    assert response['headers']['Cache-Control'] == 'no-cache'
+    area_shop_list = json.loads(response['body'])
+    assert sum(len(area['shop']) for area in area_shop_list) == \
+        len(load_shop_items())
+
+
+@pytest.mark.parametrize('header_name', ['If-None-Match', 'if-none-match'])
+@pytest.mark.parametrize('if_none_match', [
+    '{etag}', 'W/{etag}', '"other", {etag}', '*'])
+def test_returns_not_modified_for_matching_etag(shop_table, header_name,
+                                                if_none_match):
+    """If-None-MatchがETagと一致する場合、bodyを返却せず304を返却する"""
+    etag = call()['headers']['ETag']
+
+    response = call({header_name: if_none_match.format(etag=etag)})
+
+    assert response['statusCode'] == 304
+    assert response['body'] == ''
+    assert response['headers']['ETag'] == etag
+
+
+@pytest.mark.parametrize('if_none_match', [
+    '"other"', '{unquoted_etag}'])
+def test_returns_shop_list_for_other_etag(shop_table, if_none_match):
+    """If-None-MatchがETagと一致しない場合、店舗一覧を返却する"""
+    etag = call()['headers']['ETag']
+
+    response = call({'If-None-Match': if_none_match.format(
+        unquoted_etag=etag.strip('"'))})
+
+    assert response['statusCode'] == 200
+    assert response['body']
+
+
+def test_rebuilds_snapshot_after_shop_cache_expires(shop_table,
+                                                    monkeypatch):
+    """店舗情報のキャッシュの有効期限が切れた後は、最新の店舗情報で作り直す"""
+    etag = call()['headers']['ETag']
+    shop_table.delete_item(Key={'shopId': 1})
+
+    # 有効期限内はキャッシュした店舗情報から作成したbodyを使い回す
+    assert call({'If-None-Match': etag})['statusCode'] == 304
+
+    now = ttl_cache.time.monotonic()
+    monkeypatch.setattr(ttl_cache.time, 'monotonic',
+                        lambda: now + SHOP_MASTER_CACHE_TTL + 1)
+    response = call({'If-None-Match': etag})
+
+    assert response['statusCode'] == 200
+    assert response['headers']['ETag'] != etag
+    assert sum(len(area['shop']) for area in json.loads(response['body'])) \
+        == len(load_shop_items()) - 1
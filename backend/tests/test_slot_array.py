@@ -0,0 +1,151 @@
+"""
+予約人数の配列(reservedSlots)と旧形式のデータの変換のテスト
+"""
+import pytest
+
+from restaurant import slot_array
+from restaurant.restaurant_shop_reservation import RestaurantShopReservation
+
+SHOP_ID = 1
+RESERVED_DAY = '2030-05-10'
+
+
+def create_reserved_time_info(start_time, reserved_number):
+    """reservedInfo形式の30分毎の予約情報を作成する"""
+    return {
+        'reservedStartTime': start_time,
+        'reservedEndTime': slot_array.minutes_to_time(
+            slot_array.time_to_minutes(start_time) + slot_array.SLOT_MINUTES),
+        'reservedNumber': reserved_number,
+    }
+
+
+def test_get_slot_count():
+    """営業時間内の30分枠の数を取得できる"""
+    assert slot_array.get_slot_count('10:00', '23:00') == 26
+    assert slot_array.get_slot_count('17:30', '22:00') == 9
+
+
+def test_get_slot_index_rejects_out_of_slot_time():
+    """営業開始前、30分単位でない時刻はValueErrorとなる"""
+    assert slot_array.get_slot_index('10:00', '11:30') == 3
+    with pytest.raises(ValueError):
+        slot_array.get_slot_index('10:00', '09:30')
+    with pytest.raises(ValueError):
+        slot_array.get_slot_index('10:00', '10:15')
+
+
+def test_encode_decode_round_trip():
+    """配列への変換と元の形式への変換で同じ予約情報に戻る"""
+    reserved_info = [create_reserved_time_info('10:30', 4),
+                     create_reserved_time_info('12:00', 2)]
+
+    reserved_slots = slot_array.encode_reserved_info(
+        reserved_info, '10:00', 6)
+
+    assert reserved_slots == [0, 4, 0, 0, 2, 0]
+    assert slot_array.decode_reserved_slots(
+        reserved_slots, '10:00') == reserved_info
+
+
+def test_encode_merges_same_slot_and_drops_out_of_hours():
+    """同じ枠の予約は合算し、営業時間外の予約は含まない"""
+    reserved_info = [create_reserved_time_info('09:30', 5),
+                     create_reserved_time_info('10:00', 1),
+                     create_reserved_time_info('10:00', 2),
+                     create_reserved_time_info('11:00', 7)]
+
+    assert slot_array.encode_reserved_info(
+        reserved_info, '10:00', 2) == [3, 0]
+
+
+def test_get_reserved_slots_merges_legacy_attributes():
+    """配列とreservedInfoの予約人数を合算した配列を取得できる"""
+    controller = RestaurantShopReservation()
+    item = {
+        'reservedSlots': [1, 0, 0, 0],
+        'slotOpenTime': '10:00',
+        'reservedInfo': [create_reserved_time_info('10:00', 2),
+                         create_reserved_time_info('10:30', 3)],
+    }
+
+    assert controller.get_reserved_slots(item, '10:00', 4) == [3, 3, 0, 0]
+    assert not controller.has_slot_layout(item, '10:00', 4)
+
+
+def test_get_reserved_slots_rebases_on_open_time_change():
+    """営業開始時刻の変更前の配列は、変更後の営業時間の配列に変換する"""
+    controller = RestaurantShopReservation()
+    item = {'reservedSlots': [1, 2, 3, 4], 'slotOpenTime': '10:00'}
+
+    assert controller.get_reserved_slots(item, '11:00', 4) == [3, 4, 0, 0]
+
+
+def test_init_reserved_slots_migrates_legacy_item(dynamodb):
+    """旧形式のデータを配列に移行し、旧形式の属性を削除する"""
+    table = dynamodb.Table('RestaurantShopReservation')
+    table.put_item(Item={
+        'shopId': SHOP_ID, 'reservedDay': RESERVED_DAY,
+        'reservedYearMonth': '2030-05', 'vacancyFlg': 1,
+        'totalReservedNumber': 5,
+        'reservedInfo': [create_reserved_time_info('10:00', 2),
+                         create_reserved_time_info('10:30', 3)],
+    })
+    controller = RestaurantShopReservation()
+    item = controller.get_item(SHOP_ID, RESERVED_DAY)
+
+    assert controller.init_reserved_slots(
+        SHOP_ID, RESERVED_DAY, '2030-05', '10:00', 4, 1, item,
+        reserved_slots={'11:00': 4}, total_reserved_number=4)
+
+    item = controller.get_item(SHOP_ID, RESERVED_DAY)
+    assert item['reservedSlots'] == [2, 3, 4, 0]
+    assert item['slotOpenTime'] == '10:00'
+    assert item['totalReservedNumber'] == 9
+    assert 'reservedInfo' not in item
+    assert controller.has_slot_layout(item, '10:00', 4)
+
+
+def test_init_reserved_slots_skips_changed_item(dynamodb):
+    """更新前のアイテムから予約人数が変わっていた場合は作り直さない"""
+    controller = RestaurantShopReservation()
+    assert controller.init_reserved_slots(
+        SHOP_ID, RESERVED_DAY, '2030-05', '10:00', 4, 1,
+        reserved_slots={'10:00': 1}, total_reserved_number=1)
+    stale_item = controller.get_item(SHOP_ID, RESERVED_DAY)
+    controller.add_reserved_number(
+        SHOP_ID, RESERVED_DAY, '10:00', 4, {'10:30': 2}, 2)
+
+    assert not controller.init_reserved_slots(
+        SHOP_ID, RESERVED_DAY, '2030-05', '11:00', 4, 1, stale_item)
+
+    item = controller.get_item(SHOP_ID, RESERVED_DAY)
+    assert item['slotOpenTime'] == '10:00'
+    assert item['reservedSlots'] == [1, 2, 0, 0]
+
+
+@pytest.mark.parametrize('low_level', [False, True])
+def test_get_reserved_info_reads_only_slot_attributes(dynamodb, low_level):
+    """30分毎の予約情報は予約人数の配列と旧形式の属性のみ取得して作成する"""
+    controller = RestaurantShopReservation()
+    controller.init_reserved_slots(
+        SHOP_ID, RESERVED_DAY, '2030-05', '10:00', 4, 1,
+        reserved_slots={'10:30': 2}, total_reserved_number=2)
+    read_attributes = []
+    get_item = RestaurantShopReservation.get_item
+
+    def record_attributes(self, shop_id, reserved_day, attributes=None):
+        read_attributes.append(attributes)
+        item = get_item(self, shop_id, reserved_day, attributes)
+        assert set(item) <= {'reservedSlots', 'slotOpenTime'}
+        return item
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(RestaurantShopReservation, 'get_item',
+                            record_attributes)
+        reserved_info = RestaurantShopReservation(
+            low_level=low_level).get_reserved_info(SHOP_ID, RESERVED_DAY)
+
+    assert read_attributes == [
+        ['reservedSlots', 'slotOpenTime', 'reservedInfo']]
+    assert reserved_info == [create_reserved_time_info('10:30', 2)]